@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Custom middleware: first, so its latency histograms (rest/metrics.py) cover the whole stack
+    'rest.middleware.ExecutionTimeMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,10 +61,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.flatpages.middleware.FlatpageFallbackMiddleware',
 
-    # Auto logout middleware
+    # Auto logout middleware (sync-only: under ASGI, Django runs it in a thread)
     'django_auto_logout.middleware.auto_logout',
-    # Custom middleware
-    'rest.middleware.ExecutionTimeMiddleware', # Middleware to log execution time of requests
 ]
 
 ROOT_URLCONF = 'django_quickstart.urls'
@@ -82,6 +82,8 @@ TEMPLATES = [
                 'django_auto_logout.context_processors.auto_logout_client',
                 # Context processor for dark mode
                 'json_app.context_processors.dark_mode_context',
+                # Role label of the signed-in user, from the permission cache
+                'rest.context_processors.user_role_context',
             ],
         },
     },
@@ -119,6 +121,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ModelBackend with permissions cached across requests (rest/permission_cache.py).
+# ModelBackend stays listed so sessions logged in through it remain valid: Django
+# drops a session whose backend path is no longer in this list. A failed login is
+# checked by both; remove it once those sessions have expired (SESSION_COOKIE_AGE)
+AUTHENTICATION_BACKENDS = [
+    'rest.permission_cache.CachedPermissionBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
@@ -161,6 +172,18 @@ AUTO_LOGOUT = {
 }
 
 
+# UserLog events are buffered and written in batches by a background thread
+# (rest/audit.py); True writes each one immediately, e.g. for tests
+AUDIT_LOG_SYNC = False
+
+# Request latency histograms (rest/metrics.py): empty keeps them in this process only. With
+# several workers, set a directory each one writes a shard to; clear it when the server starts
+METRICS_DIR = config('METRICS_DIR', default='')
+# Clients allowed to scrape /metrics without logging in, e.g. 127.0.0.1,::1 (none by default;
+# users with rest.manage_users always can)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+
 # Email settings
 EMAIL_BACKEND = config('EMAIL_BACKEND')
 EMAIL_HOST = config('EMAIL_HOST', default='localhost')
@@ -0,0 +1,337 @@
+"""Set-based bulk writes for the json_app CRUD endpoints.
+
+Sending a JSON array (instead of one object) to POST / PUT / DELETE on
+table1/, table2/ or table3/ routes the request here:
+
+    POST   [{...}, {...}]             -> bulk_create
+    PUT    [{"id": 1, ...}, ...]      -> bulk_update
+    DELETE [1, 2, {"id": 3}, ...]     -> one DELETE ... WHERE id IN (...)
+
+Every item is validated up front without per-item queries (field cleaning in
+Python, FK / M2M ids and unique values checked with one query per field and
+BULK_BATCH_SIZE values).
+Invalid items are reported by index and skipped; the valid ones are written
+in a single transaction. Table1 M2M links go straight to the through table
+with bulk_create. File fields are not accepted in bulk payloads.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import FileField
+from django.forms.models import model_to_dict
+
+from rest.deletion import DELETE_BATCH_SIZE, schedule_file_cleanup, stored_files
+from rest.models import Table1
+from rest.stats import batch_table1_stats, deleted_links, record_table1_change, stats_values
+from rest.versioning import bump_version, coalesce_version_bumps
+from .serializers import serialize_table1, table1_queryset
+
+BULK_METHODS = ('POST', 'PUT', 'DELETE')
+BULK_MAX_ITEMS = 10000
+# Rows per INSERT/UPDATE/IN(...) statement: the SQLite bound shared with rest/deletion.py
+BULK_BATCH_SIZE = DELETE_BATCH_SIZE
+
+
+class _Item:
+    """Bookkeeping for one payload entry while it is validated and written."""
+
+    def __init__(self, index, instance):
+        self.index = index
+        self.instance = instance
+        self.pk = None
+        self.touched = []
+        self.links = {}
+        self.errors = {}
+
+
+def is_bulk_request(request):
+    """True when a write request carries a JSON array body."""
+    if request.method not in BULK_METHODS or request.content_type != 'application/json':
+        return False
+    return request.body.lstrip().startswith(b'[')
+
+
+def _relation_id(value):
+    if isinstance(value, dict):
+        value = value.get('id')
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+def _apply_fields(model, item, payload):
+    """Copy payload values onto item.instance and clean them without queries."""
+    fields = {f.name: f for f in model._meta.concrete_fields if not f.primary_key}
+    m2m_fields = {f.name: f for f in model._meta.many_to_many}
+    for key, value in payload.items():
+        if key == 'id':
+            continue
+        if key in m2m_fields:
+            try:
+                item.links[key] = list(dict.fromkeys(_relation_id(v) for v in value or []))
+            except (TypeError, ValueError):
+                item.errors[key] = ['Expected a list of ids or {"id": ...} objects']
+            continue
+        field = fields.get(key)
+        if field is None or isinstance(field, FileField):
+            item.errors[key] = ['Unknown field or not supported in bulk payloads']
+            continue
+        if field.is_relation:
+            try:
+                setattr(item.instance, field.attname, _relation_id(value))
+            except (TypeError, ValueError):
+                item.errors[key] = ['Expected an id or {"id": ...}']
+                continue
+        else:
+            setattr(item.instance, field.name, value)
+        item.touched.append(field.name)
+
+    # Relations are excluded: ForeignKey.validate() would run one query per item
+    relation_names = [f.name for f in fields.values() if f.is_relation]
+    try:
+        item.instance.clean_fields(exclude=relation_names)
+    except ValidationError as e:
+        for name, messages in e.message_dict.items():
+            item.errors.setdefault(name, []).extend(messages)
+
+
+def _lookup(queryset, field, values, *columns):
+    """values_list(*columns) of the rows whose field is in values, BULK_BATCH_SIZE values per query."""
+    values = list(values)
+    for start in range(0, len(values), BULK_BATCH_SIZE):
+        yield from queryset.filter(**{f'{field}__in': values[start:start + BULK_BATCH_SIZE]}).values_list(*columns)
+
+
+def _existing_pks(model, pks):
+    return {pk for pk, in _lookup(model.objects.all(), 'pk', pks, 'pk')}
+
+
+def _check_relations(model, items):
+    """Flag FK / M2M ids that do not exist (one query per relation field and chunk)."""
+    for field in model._meta.concrete_fields:
+        if not field.is_relation:
+            continue
+        wanted = {getattr(i.instance, field.attname) for i in items} - {None}
+        found = _existing_pks(field.related_model, wanted)
+        for item in items:
+            value = getattr(item.instance, field.attname)
+            if value is not None and value not in found:
+                item.errors.setdefault(field.name, []).append(f'{field.related_model.__name__} {value} not found')
+
+    for field in model._meta.many_to_many:
+        wanted = {pk for i in items for pk in i.links.get(field.name, [])}
+        found = _existing_pks(field.related_model, wanted)
+        for item in items:
+            missing = [pk for pk in item.links.get(field.name, []) if pk not in found]
+            if missing:
+                item.errors.setdefault(field.name, []).append(
+                    f'{field.related_model.__name__} not found: {missing}'
+                )
+
+
+def _check_unique(model, items):
+    """Flag unique-field collisions inside the batch and against stored rows."""
+    for field in model._meta.concrete_fields:
+        if not field.unique or field.primary_key:
+            continue
+        seen = {}
+        for item in items:
+            value = getattr(item.instance, field.attname)
+            if value is None:
+                continue
+            if value in seen:
+                item.errors.setdefault(field.name, []).append(f'Duplicate value in payload (item {seen[value]})')
+            else:
+                seen[value] = item.index
+        stored = dict(_lookup(model.objects.all(), field.attname, seen, field.attname, 'pk'))
+        for item in items:
+            value = getattr(item.instance, field.attname)
+            if value in stored and stored[value] != item.instance.pk:
+                item.errors.setdefault(field.name, []).append(f'{field.verbose_name} already exists')
+
+
+def _validate(model, items):
+    valid = [i for i in items if not i.errors]
+    _check_relations(model, valid)
+    _check_unique(model, valid)
+    return [i for i in items if not i.errors]
+
+
+def _write_links(model, items, replace):
+    """Insert M2M through rows for items in bulk (optionally replacing old links).
+
+    Returns the net change in the number of link rows.
+    """
+    change = 0
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        owners = [i for i in items if field.name in i.links]
+        if not owners:
+            continue
+        if replace:
+            owner_ids = [i.instance.pk for i in owners]
+            for start in range(0, len(owner_ids), BULK_BATCH_SIZE):
+                change -= through.objects.filter(**{f'{source}__in': owner_ids[start:start + BULK_BATCH_SIZE]}).delete()[0]
+        rows = [
+            through(**{source: i.instance.pk, target: pk})
+            for i in owners
+            for pk in i.links[field.name]
+        ]
+        through.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+        change += len(rows)
+    return change
+
+
+def _serialize(model, instances):
+    if not instances:
+        return []
+    if model._meta.many_to_many:
+        # Re-read with FK/O2O joined so serialization stays at two queries per batch
+        ids = [obj.pk for obj in instances]
+        data = []
+        for start in range(0, len(ids), BULK_BATCH_SIZE):
+            chunk = ids[start:start + BULK_BATCH_SIZE]
+            data += serialize_table1(table1_queryset().filter(pk__in=chunk).order_by('id'))
+        return data
+    return [model_to_dict(obj) for obj in instances]
+
+
+def _error_list(items):
+    return [{'index': i.index, 'errors': i.errors} for i in items if i.errors]
+
+
+def _result(payload, done, items, success_status):
+    payload['errors'] = _error_list(items)
+    status = 400 if payload['errors'] and not done else success_status
+    return payload, status
+
+
+def bulk_create(model, payloads):
+    items = []
+    for index, payload in enumerate(payloads):
+        item = _Item(index, model())
+        if isinstance(payload, dict):
+            _apply_fields(model, item, payload)
+        else:
+            item.errors['__all__'] = ['Expected an object']
+        items.append(item)
+    valid = _validate(model, items)
+
+    if valid:
+        with transaction.atomic(), coalesce_version_bumps():
+            model.objects.bulk_create([i.instance for i in valid], batch_size=BULK_BATCH_SIZE)
+            links = _write_links(model, valid, replace=False)
+            # bulk_create sends no post_save, so bump and count explicitly
+            bump_version(model)
+            if model is Table1:
+                record_table1_change(added=[stats_values(i.instance) for i in valid], links=links)
+
+    instances = [i.instance for i in valid]
+    payload = {'created': len(instances), 'data': _serialize(model, instances)}
+    return _result(payload, instances, items, 201)
+
+
+def bulk_update(model, payloads):
+    items = []
+    ids = []
+    for index, payload in enumerate(payloads):
+        item = _Item(index, None)
+        try:
+            item.pk = int(payload['id'])
+            ids.append(item.pk)
+        except (KeyError, TypeError, ValueError):
+            item.errors['id'] = ['A numeric id is required for updates']
+        items.append(item)
+
+    # The rows are read (and locked, where the backend supports it) in the transaction
+    # that writes them, so the values taken out of Table1Stats are the ones replaced
+    with transaction.atomic(), coalesce_version_bumps():
+        existing = model.objects.select_for_update().in_bulk(ids)
+        # Values before the payload is applied, to take them out of Table1Stats
+        before = {pk: stats_values(obj) for pk, obj in existing.items()} if model is Table1 else {}
+        claimed = set()
+        for item, payload in zip(items, payloads):
+            if item.errors:
+                continue
+            if item.pk not in existing:
+                item.errors['id'] = [f'{model.__name__} {item.pk} not found']
+            elif item.pk in claimed:
+                item.errors['id'] = ['Duplicate id in payload']
+            else:
+                claimed.add(item.pk)
+                item.instance = existing[item.pk]
+                _apply_fields(model, item, payload)
+        valid = _validate(model, [i for i in items if i.instance is not None and not i.errors])
+
+        if valid:
+            fields = sorted({name for i in valid for name in i.touched})
+            if fields:
+                model.objects.bulk_update([i.instance for i in valid], fields, batch_size=BULK_BATCH_SIZE)
+            links = _write_links(model, valid, replace=True)
+            bump_version(model)
+            if model is Table1:
+                record_table1_change(
+                    added=[stats_values(i.instance) for i in valid],
+                    removed=[before[i.instance.pk] for i in valid],
+                    links=links,
+                )
+
+    instances = [i.instance for i in valid]
+    payload = {'updated': len(instances), 'data': _serialize(model, instances)}
+    return _result(payload, instances, items, 200)
+
+
+def bulk_delete(model, payloads):
+    items = []
+    for index, payload in enumerate(payloads):
+        item = _Item(index, None)
+        try:
+            item.pk = _relation_id(payload)
+            if item.pk is None:
+                raise ValueError
+        except (TypeError, ValueError):
+            item.errors['id'] = ['Expected an id or {"id": ...}']
+        items.append(item)
+
+    ids = list(dict.fromkeys(i.pk for i in items if not i.errors))
+    found = _existing_pks(model, ids)
+    for item in items:
+        if not item.errors and item.pk not in found:
+            item.errors['id'] = [f'{model.__name__} {item.pk} not found']
+    ids = [pk for pk in ids if pk in found]
+
+    deleted = 0
+    if ids:
+        # Table1 rows still leave through post_delete; the batch folds them into one stats update
+        with transaction.atomic(), coalesce_version_bumps(), batch_table1_stats():
+            files = []
+            for start in range(0, len(ids), BULK_BATCH_SIZE):
+                chunk = model.objects.filter(pk__in=ids[start:start + BULK_BATCH_SIZE])
+                files += stored_files(chunk)
+                counts = chunk.delete()[1]
+                deleted += counts.get(model._meta.label, 0)
+                record_table1_change(links=-deleted_links(counts))
+            bump_version(model)
+            # Files go only once the rows are really gone, off the request thread
+            schedule_file_cleanup(files)
+
+    return _result({'deleted': deleted}, ids, items, 200)
+
+
+def handle_bulk(model, request, payloads):
+    """Dispatch a bulk payload by HTTP method; returns (response_dict, status)."""
+    if not isinstance(payloads, list):
+        return {'error': 'Bulk payload must be a JSON array'}, 400
+    if len(payloads) > BULK_MAX_ITEMS:
+        return {'error': f'At most {BULK_MAX_ITEMS} items per request'}, 400
+    try:
+        if request.method == 'POST':
+            return bulk_create(model, payloads)
+        if request.method == 'PUT':
+            return bulk_update(model, payloads)
+        return bulk_delete(model, payloads)
+    except DatabaseError as e:
+        # The whole batch was rolled back
+        return {'error': str(e)}, 400
@@ -0,0 +1,178 @@
+"""Query-string filters for Table1 translated into ORM lookups.
+
+The search page used to download every Table1 row and filter in the browser.
+This module turns query parameters into a single SQL WHERE clause instead,
+so the database (and its indexes) does the work and only matches travel.
+
+Supported parameters (field names are Table1 fields):
+    char/text fields     -> field, field__iexact, field__icontains, field__istartswith
+    id, integer/float    -> field, field__gt, field__gte, field__lt, field__lte
+    boolean fields       -> field=true|false
+    date/time/datetime   -> field, field__gt, field__gte, field__lt, field__lte
+    foreign_key/one_to_one -> field=<id>, field__in=<id,id>, field__isnull=true|false
+    many_to_many         -> many_to_many=<id,id> (rows linked to ANY of the ids)
+    q                    -> free text over the text fields, linked emails, the text
+                            form of numbers/dates, yes/no and the foreign key label
+
+Unknown parameters are ignored so pagination/sort params can share the query
+string; invalid values raise FilterError.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db.models import CharField, Exists, OuterRef, Q
+from django.db.models.functions import Cast
+from django.db.models.lookups import Contains
+
+from rest.models import Table1
+
+
+class FilterError(ValueError):
+    """Raised when a filter value cannot be parsed for its field."""
+
+
+TEXT_LOOKUPS = ('exact', 'iexact', 'icontains', 'istartswith')
+RANGE_LOOKUPS = ('exact', 'gt', 'gte', 'lt', 'lte')
+RELATION_LOOKUPS = ('exact', 'in', 'isnull')
+
+LOOKUPS_BY_TYPE = {
+    'BigAutoField': RANGE_LOOKUPS,
+    'CharField': TEXT_LOOKUPS,
+    'TextField': TEXT_LOOKUPS,
+    'IntegerField': RANGE_LOOKUPS,
+    'FloatField': RANGE_LOOKUPS,
+    'BooleanField': ('exact',),
+    'DateField': RANGE_LOOKUPS,
+    'TimeField': RANGE_LOOKUPS,
+    'DateTimeField': RANGE_LOOKUPS,
+    'ForeignKey': RELATION_LOOKUPS,
+    'OneToOneField': RELATION_LOOKUPS,
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def _parse_bool(name, raw):
+    value = raw.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise FilterError(f"{name}: expected true/false, got '{raw}'")
+
+
+def _parse_ids(name, raw):
+    try:
+        return [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        raise FilterError(f"{name}: expected comma separated ids, got '{raw}'")
+
+
+def _parse_value(field, name, raw):
+    """Convert a raw query-string value with the field's own to_python()."""
+    if field.get_internal_type() == 'BooleanField':
+        return _parse_bool(name, raw)
+    if field.is_relation:
+        return _parse_ids(name, raw)[0] if raw.strip() else None
+    try:
+        return field.to_python(raw)
+    except ValidationError:
+        raise FilterError(f"{name}: invalid value '{raw}'")
+
+
+NUMBER_CHARS = frozenset('0123456789.-')
+DATE_CHARS = frozenset('0123456789-:. t')
+BOOLEAN_TEXT = {True: 'yes true', False: 'no false'}
+
+
+def _text_contains(field_name, term):
+    """Substring match on the text form of a non-text column."""
+    return Contains(Cast(field_name, CharField()), term)
+
+
+def _free_text_condition(model, term):
+    """OR of the matches the old in-browser search box made.
+
+    Numbers, dates and datetimes match on their text form (so "3.1" finds
+    3.14), booleans on "yes true"/"no false" and the foreign key on its
+    choice label.  The casts cannot use an index, so they are only added
+    when the term could appear in a number or a date at all.
+    """
+    through = model.many_to_many.through
+    email_match = through.objects.filter(
+        table1_id=OuterRef('pk'), table3__email_field__icontains=term,
+    )
+    condition = (
+        Q(char_field__icontains=term)
+        | Q(text_field__icontains=term)
+        | Exists(email_match)
+    )
+    lowered = term.lower()
+    if set(lowered) <= NUMBER_CHARS:
+        condition |= _text_contains('integer_field', term) | _text_contains('float_field', term)
+    if set(lowered) <= DATE_CHARS:
+        # Datetimes are shown as ISO 8601 but stored with a space before the time
+        condition |= (
+            _text_contains('date_field', lowered)
+            | _text_contains('datetime_field', lowered.replace('t', ' '))
+        )
+    for value, text in BOOLEAN_TEXT.items():
+        if lowered in text:
+            condition |= Q(boolean_field=value)
+    choices = model._meta.get_field('foreign_key').related_model.CHOICES
+    labels = [key for key, label in choices if lowered in label.lower()]
+    if labels:
+        condition |= Q(foreign_key__positive_small_int__in=labels)
+    return condition
+
+
+def filter_table1(queryset, params):
+    """Apply supported filters from params (a QueryDict) to a Table1 queryset."""
+    model = queryset.model
+    fields = {field.name: field for field in model._meta.concrete_fields}
+    conditions = []
+
+    for name, raw in params.items():
+        if name == 'q':
+            term = raw.strip()
+            if term:
+                conditions.append(_free_text_condition(model, term))
+            continue
+
+        if name == 'many_to_many':
+            # EXISTS keeps one row per Table1 even if several ids match (no DISTINCT)
+            ids = _parse_ids(name, raw)
+            if ids:
+                linked = model.many_to_many.through.objects.filter(
+                    table1_id=OuterRef('pk'), table3_id__in=ids,
+                )
+                conditions.append(Exists(linked))
+            continue
+
+        field_name, _, lookup = name.partition('__')
+        field = fields.get(field_name)
+        if field is None:
+            continue
+        lookup = lookup or 'exact'
+        allowed = LOOKUPS_BY_TYPE.get(field.get_internal_type(), ())
+        if lookup not in allowed:
+            raise FilterError(f"{name}: unsupported lookup (allowed: {', '.join(allowed)})")
+
+        if lookup == 'isnull':
+            value = _parse_bool(name, raw)
+        elif lookup == 'in':
+            value = _parse_ids(name, raw)
+        else:
+            value = _parse_value(field, name, raw)
+        column = field.attname if field.is_relation and lookup != 'isnull' else field.name
+        conditions.append(Q(**{f'{column}__{lookup}': value}))
+
+    for condition in conditions:
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def search_table1(params):
+    """Filtered Table1 queryset ready for serialization (relations joined)."""
+    queryset = Table1.objects.select_related('foreign_key', 'one_to_one')
+    return filter_table1(queryset, params)
@@ -0,0 +1,103 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    '/json_app/table1/?page_size=20&include_options=0',
+    '/json_app/table2/?page_size=20',
+    '/json_app/table3/?page_size=20',
+]
+
+
+# Management command comparing the sync json_app views with their /json_app/async/ twins
+class Command(BaseCommand):
+    help = (
+        'Load-test sync vs async json_app endpoints on a running server at high concurrency. '
+        'Start the project under ASGI first, e.g. `uvicorn django_quickstart.asgi:application`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=200, help='Open connections at once')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Sync path to test (repeatable); the async twin is /json_app/async/...')
+        parser.add_argument('--read-delay', type=float, default=0.0,
+                            help='Seconds a simulated slow client waits between 4 KB reads')
+        parser.add_argument('--cookie', default='', help='Cookie header, e.g. sessionid=... for login-only paths')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['base_url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--base-url must look like http://host:port')
+        target = (url.hostname, url.port or 80)
+
+        self.stdout.write(
+            f"{'endpoint':<60} {'req/s':>8} {'ttfb p50':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}"
+        )
+        for path in options['paths'] or DEFAULT_PATHS:
+            if not path.startswith('/json_app/'):
+                raise CommandError(f'{path}: only /json_app/ endpoints have async twins')
+            async_path = '/json_app/async/' + path[len('/json_app/'):]
+            for label, tested in (('sync ', path), ('async', async_path)):
+                stats = asyncio.run(_load(target, tested, options))
+                self.stdout.write(
+                    f"{label} {tested[:54]:<54} {stats['rps']:>8.1f} {stats['ttfb']:>9.1f} {stats['p50']:>8.1f} "
+                    f"{stats['p95']:>8.1f} {stats['errors']:>7}"
+                )
+
+
+async def _request(target, path, options):
+    """One GET over a fresh connection; returns (status, seconds to first byte, total seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(*target)
+    try:
+        head = f'GET {path} HTTP/1.1\r\nHost: {target[0]}\r\nConnection: close\r\n'
+        if options['cookie']:
+            head += f"Cookie: {options['cookie']}\r\n"
+        writer.write((head + '\r\n').encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        first_byte = time.perf_counter() - start
+        while await reader.read(4096):
+            if options['read_delay']:
+                await asyncio.sleep(options['read_delay'])
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, first_byte, time.perf_counter() - start
+
+
+async def _load(target, path, options):
+    gate = asyncio.Semaphore(options['concurrency'])
+    latencies = []
+    first_bytes = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            try:
+                status, first_byte, elapsed = await _request(target, path, options)
+            except OSError:
+                errors += 1
+                return
+        if status != 200:
+            errors += 1
+        first_bytes.append(first_byte * 1000)
+        latencies.append(elapsed * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(options['requests'])))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / wall if wall else 0.0,
+        'ttfb': statistics.median(first_bytes) if first_bytes else 0.0,
+        'p50': statistics.median(latencies) if latencies else 0.0,
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+        'errors': errors,
+    }
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from datetime import timedelta
+
+from json_app.models import Upload
+from json_app.uploads import discard_upload
+
+# Management command to remove resumable uploads that were abandoned
+class Command(BaseCommand):
+    help = 'Delete uploads (and their partial files) not touched for N hours (default 24).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        """Discard pending or unclaimed uploads older than the threshold."""
+        threshold = now() - timedelta(hours=options['hours'])
+        stale = Upload.objects.filter(updated_at__lt=threshold)
+        count = 0
+        for upload in stale.iterator():
+            discard_upload(upload)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} stale uploads deleted."))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+def complete_to_received(apps, schema_editor):
+    # 'complete' used to mean every byte arrived; attached uploads were deleted
+    Upload = apps.get_model('json_app', 'Upload')
+    Upload.objects.filter(status='complete').update(status='received')
+
+
+def received_to_complete(apps, schema_editor):
+    Upload = apps.get_model('json_app', 'Upload')
+    Upload.objects.filter(status='received').update(status='complete')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('json_app', '0001_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='upload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('received', 'Received'), ('complete', 'Complete')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(complete_to_received, received_to_complete),
+    ]
@@ -1,3 +1,47 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+
+class Upload(models.Model):
+    """A resumable file upload written to disk chunk by chunk (see uploads.py).
+
+    The partial file lives under MEDIA_ROOT/uploads/partial/<id>. Once every
+    byte has arrived the upload is 'received' and a Table1 payload can point at
+    it with {"upload_id": "<id>"}; the file is then moved (not copied) into the
+    field's upload_to directory. The upload is 'complete' once that save has
+    committed; purge_uploads removes the row later.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('received', 'Received'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()                       # Declared total length in bytes
+    offset = models.PositiveBigIntegerField(default=0)            # Bytes safely written so far
+    sha256 = models.CharField(max_length=64, blank=True)          # Expected digest (optional), then the real one
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size})"
+
+    @property
+    def path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', str(self.id))
+
+    @property
+    def is_received(self):
+        return self.status == 'received'
+
+    @property
+    def is_complete(self):
+        return self.status == 'complete'
@@ -0,0 +1,47 @@
+"""Cached Table2/Table3 option lists for the Table1 editor.
+
+The lists only change when Table2/Table3 are written, so they are cached
+under a key that embeds both table versions (rest.versioning). A write bumps
+the version through the post_save/post_delete receivers in rest.signals,
+which makes the old entry unreachable: no explicit cache delete is needed and
+a stale list can never be served, whatever cache backend is configured.
+"""
+
+from django.core.cache import cache
+
+from rest.models import Table2, Table3
+from rest.versioning import version_token
+
+OPTIONS_CACHE_TIMEOUT = 60 * 60  # seconds; entries are also dropped on version change
+
+
+def relation_options_version():
+    """Version token of the option lists (changes on any Table2/Table3 write)."""
+    return version_token(Table2, Table3)
+
+
+def _cache_key(token):
+    return f'json_app:table1_options:{token}'
+
+
+def get_relation_options(token=None):
+    """Return {'options_version', 'table2_options', 'table3_options'} from cache or DB."""
+    token = token or relation_options_version()
+    key = _cache_key(token)
+    options = cache.get(key)
+    if options is None:
+        options = {
+            'options_version': token,
+            'table2_options': list(Table2.objects.order_by('id').values('id', 'positive_small_int')),
+            'table3_options': list(Table3.objects.order_by('id').values('id', 'email_field')),
+        }
+        cache.set(key, options, OPTIONS_CACHE_TIMEOUT)
+    return options
+
+
+def relation_options_payload(client_version=None):
+    """Option lists, or just the version when the client already holds it."""
+    token = relation_options_version()
+    if client_version and client_version == token:
+        return {'options_version': token, 'options_unchanged': True}
+    return get_relation_options(token)
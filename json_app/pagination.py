@@ -0,0 +1,249 @@
+"""Keyset (cursor) pagination for the JSON list endpoints.
+
+Offset pagination (Django's Paginator) costs an OFFSET scan plus a COUNT(*)
+on every request, so deep pages get slower the further a client walks.
+Keyset pagination remembers the sort value + primary key of the boundary row
+and asks the database for rows strictly after it, which an index answers in
+the same time for page 1 and page 10,000.
+
+Usage from a view:
+    rows, pagination = keyset_paginate(queryset, request.GET, page_size)
+
+Query parameters understood:
+    cursor  -> opaque token from a previous response ('' starts at the top)
+    sort    -> indexed field name, '-' prefix for descending (default: id)
+    count   -> 'exact' | 'estimate' | 'none' (default: none, so page N is O(page))
+
+Cursors are urlsafe base64 JSON blobs; clients must treat them as opaque.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.db.models import F, Max, Min, Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor/sort parameter cannot be decoded or is not allowed."""
+
+
+COUNT_MODES = ('none', 'estimate', 'exact')
+
+
+def sortable_fields(model):
+    """Return {field_name: field} for concrete columns backed by an index.
+
+    Primary key, unique fields, db_index fields (ForeignKeys get one by default)
+    and the leading column of any Meta.indexes entry qualify.
+    """
+    indexed_names = {
+        index.fields[0].lstrip('-')
+        for index in model._meta.indexes
+        if index.fields
+    }
+    fields = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.unique or field.db_index or field.name in indexed_names:
+            fields[field.name] = field
+    return fields
+
+
+def parse_sort(model, raw_sort):
+    """Validate a 'sort' value and return (field, descending)."""
+    raw_sort = (raw_sort or model._meta.pk.name).strip()
+    descending = raw_sort.startswith('-')
+    name = raw_sort.lstrip('-')
+    if name == 'pk':
+        name = model._meta.pk.name
+    field = sortable_fields(model).get(name)
+    if field is None:
+        allowed = ', '.join(sorted(sortable_fields(model)))
+        raise InvalidCursor(f"Cannot sort on '{name}'. Indexed fields: {allowed}")
+    return field, descending
+
+
+def encode_cursor(payload):
+    """Serialize a cursor payload dict into an opaque urlsafe token."""
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises InvalidCursor on tampered input."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(payload, dict) or payload.get('d') not in ('next', 'prev'):
+        raise InvalidCursor('Malformed cursor')
+    if not isinstance(payload.get('k'), list) or len(payload['k']) != 2:
+        raise InvalidCursor('Malformed cursor')
+    return payload
+
+
+def estimate_count(queryset):
+    """Cheap row estimate for an auto-increment table (two index lookups).
+
+    Deleted rows make this an upper bound; it is meant for progress bars and
+    "about N results" labels, not for exact page math. Filtered querysets
+    cannot be estimated this way and return None.
+    """
+    if queryset.query.has_filters():
+        return None
+    pk_name = queryset.model._meta.pk.attname
+    bounds = queryset.model._default_manager.aggregate(low=Min(pk_name), high=Max(pk_name))
+    if bounds['low'] is None:
+        return 0
+    return bounds['high'] - bounds['low'] + 1
+
+
+def _dump_value(value):
+    # isoformat keeps full precision (DjangoJSONEncoder truncates microseconds)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return value
+
+
+def _load_value(field, value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and field.get_internal_type() == 'DurationField':
+        return datetime.timedelta(seconds=value)
+    try:
+        return field.to_python(value)
+    except Exception:
+        raise InvalidCursor('Malformed cursor')
+
+
+def _row_value(row, attname):
+    # Rows can be model instances or dicts produced by .values()
+    return row[attname] if isinstance(row, dict) else getattr(row, attname)
+
+
+def _ordering(field, pk, descending):
+    """ORDER BY clause with explicit NULL placement so the walk is total."""
+    if field.primary_key:
+        return [F(pk.attname).desc() if descending else F(pk.attname).asc()]
+    if not field.null:
+        # No NULLs to place: a plain ORDER BY matches a (column, id) index in
+        # either direction, where NULLS LAST would not on PostgreSQL
+        if descending:
+            return [F(field.attname).desc(), F(pk.attname).desc()]
+        return [F(field.attname).asc(), F(pk.attname).asc()]
+    if descending:
+        return [F(field.attname).desc(nulls_last=True), F(pk.attname).desc()]
+    return [F(field.attname).asc(nulls_first=True), F(pk.attname).asc()]
+
+
+def _after(field, pk, descending, value, pk_value):
+    """Q matching rows strictly after (value, pk_value) in _ordering order."""
+    op = 'lt' if descending else 'gt'
+    pk_lookup = {f'{pk.attname}__{op}': pk_value}
+    if field.primary_key:
+        return Q(**pk_lookup)
+
+    column = field.attname
+    if value is None:
+        # NULLs sort first ascending and last descending
+        condition = Q(**{f'{column}__isnull': True}, **pk_lookup)
+        if not descending:
+            condition |= Q(**{f'{column}__isnull': False})
+        return condition
+
+    condition = Q(**{f'{column}__{op}': value}) | Q(**{column: value}, **pk_lookup)
+    if descending and field.null:
+        condition |= Q(**{f'{column}__isnull': True})
+        return condition
+    # Redundant bound: the OR alone is not an index range, so without it the
+    # database walks the index from the top of the ordering to the cursor
+    return Q(**{f'{column}__{op}e': value}) & condition
+
+
+def _plan(queryset, params):
+    """Validate params; return (queryset ordered/filtered for the page, state)."""
+    model = queryset.model
+    pk = model._meta.pk
+    token = params.get('cursor') or ''
+    count_mode = params.get('count', 'none')
+    if count_mode not in COUNT_MODES:
+        raise InvalidCursor(f"count must be one of: {', '.join(COUNT_MODES)}")
+
+    boundary = None
+    backwards = False
+    if token:
+        state = decode_cursor(token)
+        field, descending = parse_sort(model, state.get('s'))
+        backwards = state['d'] == 'prev'
+        boundary = (_load_value(field, state['k'][0]), _load_value(pk, state['k'][1]))
+    else:
+        field, descending = parse_sort(model, params.get('sort'))
+
+    # Walking backwards is a forward walk over the reversed ordering
+    walk_descending = descending != backwards
+    page_qs = queryset.order_by(*_ordering(field, pk, walk_descending))
+    loaded, deferred = queryset.query.deferred_loading
+    if loaded and not deferred:
+        # only() projection: keep the sort column so cursors need no extra query
+        page_qs = page_qs.only(*loaded, field.name)
+    if boundary is not None:
+        page_qs = page_qs.filter(_after(field, pk, walk_descending, *boundary))
+    return page_qs, {
+        'field': field,
+        'pk': pk,
+        'sort_key': f"{'-' if descending else ''}{field.name}",
+        'backwards': backwards,
+        'has_boundary': boundary is not None,
+        'count_mode': count_mode,
+    }
+
+
+def _page(state, rows, page_size):
+    """Trim the page_size + 1 fetched rows and build the pagination payload."""
+    field, pk = state['field'], state['pk']
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if state['backwards']:
+        rows.reverse()
+        has_next, has_previous = state['has_boundary'], has_more
+    else:
+        has_next, has_previous = has_more, state['has_boundary']
+
+    def cursor_for(row, direction):
+        return encode_cursor({
+            's': state['sort_key'],
+            'd': direction,
+            'k': [_dump_value(_row_value(row, field.attname)), _dump_value(_row_value(row, pk.attname))],
+        })
+
+    return rows, {
+        'enabled': True,
+        'mode': 'cursor',
+        'page_size': page_size,
+        'sort': state['sort_key'],
+        'has_next': has_next,
+        'has_previous': has_previous,
+        'next_cursor': cursor_for(rows[-1], 'next') if rows and has_next else None,
+        'prev_cursor': cursor_for(rows[0], 'prev') if rows and has_previous else None,
+    }
+
+
+def keyset_paginate(queryset, params, page_size):
+    """Return (rows, pagination_payload) for one keyset page of queryset.
+
+    'params' is a QueryDict-like mapping (request.GET). The sort stored in a
+    cursor wins over the 'sort' parameter so a client cannot mix orderings
+    between pages.
+    """
+    page_qs, state = _plan(queryset, params)
+    # One extra row tells us whether another page exists, no COUNT needed
+    rows, pagination_payload = _page(state, list(page_qs[:page_size + 1]), page_size)
+    if state['count_mode'] == 'exact':
+        pagination_payload['total_items'] = queryset.count()
+    elif state['count_mode'] == 'estimate':
+        pagination_payload['estimated_total_items'] = estimate_count(queryset)
+    return rows, pagination_payload
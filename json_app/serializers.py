@@ -0,0 +1,186 @@
+"""Batched Table1 serialization shared by every json_app endpoint.
+
+Calling obj.many_to_many.values() per row bypasses prefetch_related and
+costs one query per row. serialize_table1() instead:
+- reads foreign_key / one_to_one from columns joined with select_related
+- loads the M2M rows of the whole batch with ONE through-table query
+so a page costs the same fixed number of queries whatever its size.
+
+Grid views can ask for less (see parse_table1_shape):
+- ?fields=id,char_field,foreign_key_id projects the listed columns down to
+  SQL with only() and skips joins / the M2M query that are not needed
+  (foreign_key_id / one_to_one_id give the raw id without the join)
+- ?format=columnar returns one header list plus one array per column
+"""
+
+from asgiref.sync import sync_to_async
+
+from rest.deletion import DELETE_BATCH_SIZE
+from rest.models import Table1
+
+FILE_FIELDS = ('image_field', 'file_field')
+RELATION_FIELDS = ('foreign_key', 'one_to_one')
+M2M_VALUE_FIELDS = ('id', 'email_field', 'duration_field')
+
+# Ids per IN (...) list: the SQLite bound shared with rest/deletion.py
+IN_CLAUSE_BATCH_SIZE = DELETE_BATCH_SIZE
+
+# Keys of a full row, in output order
+TABLE1_FIELDS = tuple(field.name for field in Table1._meta.fields) + ('many_to_many',)
+RELATION_ID_FIELDS = tuple(f'{name}_id' for name in RELATION_FIELDS)
+SPARSE_FIELDS = TABLE1_FIELDS + RELATION_ID_FIELDS
+RESPONSE_FORMATS = ('rows', 'columnar')
+# Written with isoformat() by the search endpoints (full microseconds, '+00:00'),
+# not by DjangoJSONEncoder, which cuts to milliseconds and writes 'Z'
+TEMPORAL_FIELDS = ('date_field', 'time_field', 'datetime_field')
+
+
+class FieldsError(ValueError):
+    """Raised for an unknown ?fields= name or ?format= value."""
+
+
+def parse_table1_shape(params):
+    """Read ?fields= and ?format= into (fields, columnar).
+
+    fields is None for full rows, otherwise a tuple of SPARSE_FIELDS names in
+    request order with 'id' first (always included).
+    """
+    response_format = params.get('format') or 'rows'
+    if response_format not in RESPONSE_FORMATS:
+        raise FieldsError(f"format must be one of: {', '.join(RESPONSE_FORMATS)}")
+
+    raw = (params.get('fields') or '').strip()
+    if not raw:
+        return None, response_format == 'columnar'
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in SPARSE_FIELDS]
+    if unknown:
+        raise FieldsError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(SPARSE_FIELDS)}")
+    if 'id' in names:
+        names.remove('id')
+    return ('id', *names), response_format == 'columnar'
+
+
+def project_table1(queryset, fields):
+    """Load only what fields needs: only() columns, joins for expanded relations."""
+    if fields is None:
+        return queryset
+    relations = [name for name in RELATION_FIELDS if name in fields]
+    columns = [name[:-len('_id')] if name in RELATION_ID_FIELDS else name
+               for name in fields if name != 'many_to_many']
+    columns += [f'{name}__positive_small_int' for name in relations]
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
+
+
+def shape_table1(items, fields=None, columnar=False):
+    """The {'data': ...} part of a response, as rows or as columns."""
+    if not columnar:
+        return {'data': items}
+    columns = list(fields or TABLE1_FIELDS)
+    return {
+        'format': 'columnar',
+        'columns': columns,
+        'data': [[item[name] for item in items] for name in columns],
+    }
+
+
+def table1_queryset():
+    """Base queryset the serializer expects (FK/O2O joined, M2M loaded separately)."""
+    return Table1.objects.select_related('foreign_key', 'one_to_one')
+
+
+def _many_to_many_rows(table1_ids):
+    return (
+        Table1.many_to_many.through.objects
+        .filter(table1_id__in=table1_ids)
+        .order_by('table1_id', 'table3_id')
+        .values_list('table1_id', *(f'table3__{name}' for name in M2M_VALUE_FIELDS))
+    )
+
+
+def fetch_many_to_many(table1_ids):
+    """Return {table1_id: [{'id', 'email_field', 'duration_field'}, ...]} for a batch."""
+    links = {pk: [] for pk in table1_ids}
+    table1_ids = list(links)
+    for start in range(0, len(table1_ids), IN_CLAUSE_BATCH_SIZE):
+        for table1_id, *values in _many_to_many_rows(table1_ids[start:start + IN_CLAUSE_BATCH_SIZE]):
+            links[table1_id].append(dict(zip(M2M_VALUE_FIELDS, values)))
+    return links
+
+
+def _serialize_relation(related):
+    if related is None:
+        return None
+    return {
+        'id': related.id,
+        'positive_small_int': related.positive_small_int,
+        'display': related.get_positive_small_int_display(),
+    }
+
+
+def serialize_table1_row(obj, many_to_many, fields=None, isoformat=False):
+    """Serialize one Table1 instance given its already-fetched M2M rows.
+
+    isoformat=True writes TEMPORAL_FIELDS as isoformat() strings (search payload shape).
+    """
+    item = {}
+    for name in fields or TABLE1_FIELDS:
+        if name in RELATION_FIELDS:
+            item[name] = _serialize_relation(getattr(obj, name))
+        elif name in FILE_FIELDS:
+            item[name] = obj.get_file_field_url(name)
+        elif name == 'many_to_many':
+            item[name] = many_to_many
+        elif isoformat and name in TEMPORAL_FIELDS:
+            value = getattr(obj, name)
+            item[name] = value.isoformat() if value else None
+        else:
+            item[name] = getattr(obj, name)
+    return item
+
+
+def _wants_many_to_many(fields):
+    return fields is None or 'many_to_many' in fields
+
+
+def serialize_table1(objects, fields=None, isoformat=False):
+    """Serialize an iterable of Table1 instances with one extra M2M query."""
+    objects = list(objects)
+    if not _wants_many_to_many(fields):
+        return [serialize_table1_row(obj, None, fields, isoformat) for obj in objects]
+    links = fetch_many_to_many([obj.pk for obj in objects])
+    return [serialize_table1_row(obj, links[obj.pk], fields, isoformat) for obj in objects]
+
+
+def iter_serialize_table1(queryset, chunk_size, fields=None, isoformat=False):
+    """Yield serialized rows from queryset.iterator(), batching M2M per chunk."""
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            yield from serialize_table1(batch, fields, isoformat)
+            batch = []
+    if batch:
+        yield from serialize_table1(batch, fields, isoformat)
+
+
+async def aserialize_table1(objects, fields=None, isoformat=False):
+    """serialize_table1() for async views; a queryset is fetched on the DB thread."""
+    return await sync_to_async(serialize_table1)(objects, fields, isoformat)
+
+
+async def aiter_serialize_table1(queryset, chunk_size, fields=None, isoformat=False):
+    """Async generator counterpart of iter_serialize_table1() using aiterator()."""
+    batch = []
+    async for obj in queryset.aiterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            for item in await aserialize_table1(batch, fields, isoformat):
+                yield item
+            batch = []
+    if batch:
+        for item in await aserialize_table1(batch, fields, isoformat):
+            yield item
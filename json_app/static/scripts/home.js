@@ -19,6 +19,7 @@
 let currentData = [];
 let table2Options = [];
 let table3Options = [];
+let optionsVersion = null; // version token of table2Options/table3Options
 let currentTable = null;
 let paginationInfo = {enabled:false, page:1, page_size:5, total_pages:1, has_next:false, has_previous:false, total_items:0};
 
@@ -41,6 +42,10 @@ function showTable(table, page=1) {
     currentTable = table;
     loadStoredPageSize(table);
     const params = new URLSearchParams({page: page, page_size: paginationInfo.page_size});
+    if (table === 'table1' && optionsVersion) {
+        // Server omits the option lists when our copy is still current
+        params.set('options_version', optionsVersion);
+    }
     fetch(getCrudUrl(table) + '?' + params.toString(), {method: 'GET'})
         .then(response => response.json())
         .then(data => {
@@ -55,13 +60,20 @@ function showTable(table, page=1) {
                 paginationInfo = {enabled:false,page:1,page_size:paginationInfo.page_size,total_pages:1,has_next:false,has_previous:false,total_items:0};
             }
             if (table === 'table1') {
-                table2Options = data.table2_options || [];
-                table3Options = data.table3_options || [];
+                storeOptions(data);
             }
             renderTable();
         });
 }
 
+// Keeps the cached option lists unless the server says they are unchanged
+function storeOptions(resp) {
+    if (resp.options_unchanged || !resp.options_version) return;
+    table2Options = resp.table2_options || [];
+    table3Options = resp.table3_options || [];
+    optionsVersion = resp.options_version || null;
+}
+
 // This function renders the table based on the current data
 function renderTable() {
     let info = document.querySelector(".info");
@@ -186,13 +198,14 @@ function openCrudModal(mode, id=null) {
         data = currentData.find(d => d.id == id) || {};
     }
 
-    // If it's Table1, fetch the options for foreign keys and many-to-many fields
+    // If it's Table1, refresh the options for foreign keys and many-to-many fields
+    // (only the version token comes back when nothing changed)
     if (currentTable === 'table1') {
-        fetch(getCrudUrl('table1'), {method: 'GET'})
+        const params = new URLSearchParams(optionsVersion ? {version: optionsVersion} : {});
+        fetch(getCrudUrl('table1') + 'options/?' + params.toString(), {method: 'GET'})
             .then(response => response.json())
             .then(resp => {
-                table2Options = resp.table2_options || [];
-                table3Options = resp.table3_options || [];
+                storeOptions(resp);
                 renderFormFields(data);
             });
     } else {
@@ -1,3 +1,552 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest.models import Table1, Table2, Table3
+from . import serializers, uploads, views
+from .bulk import BULK_BATCH_SIZE
+from .models import Upload
+
+
+# Search endpoints write dates and times with isoformat(), as before the batched serializer
+@override_settings(AUDIT_LOG_SYNC=True)
+class SearchPayloadFormatTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        self.row = Table1.objects.create(
+            char_field='row',
+            date_field=datetime.date(2024, 5, 6),
+            time_field=datetime.time(7, 8, 9, 123456),
+            datetime_field=datetime.datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=datetime.timezone.utc),
+        )
+
+    def assertIsoformat(self, item):
+        self.assertEqual(item['date_field'], '2024-05-06')
+        self.assertEqual(item['time_field'], '07:08:09.123456')
+        self.assertEqual(item['datetime_field'], '2024-05-06T07:08:09.123456+00:00')
+
+    def test_search_all(self):
+        for url in ('/json_app/search_all_json/', '/json_app/async/search_all_json/'):
+            with self.subTest(url=url):
+                self.assertIsoformat(self.client.get(url).json()['data'][0])
+
+    def test_search_all_streamed(self):
+        response = self.client.get('/json_app/search_all_json/', {'stream': 'ndjson'})
+        line = b''.join(response.streaming_content).decode().splitlines()[0]
+        self.assertIn('"datetime_field":"2024-05-06T07:08:09.123456+00:00"', line)
+
+    def test_search_page(self):
+        self.assertIsoformat(self.client.get('/json_app/search_table1_json/').json()['data'][0])
+
+    def test_crud_listing_keeps_encoder_format(self):
+        item = self.client.get('/json_app/table1/').json()['data'][0]
+        self.assertEqual(item['datetime_field'], '2024-05-06T07:08:09.123Z')
+
+
+# search_all_json streams NDJSON or an incremental JSON array in chunks
+@override_settings(AUDIT_LOG_SYNC=True)
+class SearchStreamTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        for n in range(5):
+            Table1.objects.create(char_field=f'row{n}').many_to_many.add(email)
+        # Several chunks for five rows
+        patcher = mock.patch.object(views, 'SEARCH_STREAM_CHUNK_SIZE', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, **params):
+        response = self.client.get('/json_app/search_all_json/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_json_stream_matches_the_buffered_response(self):
+        response, body = self.stream(stream='json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(body), self.client.get('/json_app/search_all_json/').json())
+
+    def test_ndjson_has_one_row_per_line(self):
+        response, body = self.stream(stream='ndjson', fields='char_field,many_to_many')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        items = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([item['char_field'] for item in items], [f'row{n}' for n in range(5)])
+        self.assertTrue(all(item['many_to_many'][0]['email_field'] == 'bob@example.com' for item in items))
+
+    def test_empty_table_streams_valid_json(self):
+        Table1.objects.all().delete()
+        self.assertEqual(json.loads(self.stream(stream='json')[1])['count'], 0)
+
+    def test_unknown_mode_and_columnar_are_400(self):
+        for params in ({'stream': 'xml'}, {'stream': 'json', 'format': 'columnar'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/json_app/search_all_json/', params).status_code, 400)
+
+
+# Keyset cursors walk a nullable sort column in both directions (json_app/pagination.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        self.rows = [Table1.objects.create(char_field=str(n), integer_field=value)
+                     for n, value in enumerate([3, None, 1, None, 2, 1])]
+
+    def page(self, **params):
+        response = self.client.get('/json_app/search_table1_json/', {'page_size': 2, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        return [item['id'] for item in body['data']], body['pagination']
+
+    def expected(self, descending=False):
+        # NULLs first ascending, last descending; ties broken by id in the sort direction
+        keyed = sorted(self.rows, key=lambda row: (row.integer_field is not None, row.integer_field or 0, row.pk))
+        ids = [row.pk for row in keyed]
+        return ids[::-1] if descending else ids
+
+    def walk(self, sort):
+        ids, pagination = self.page(sort=sort)
+        forward = list(ids)
+        while pagination['next_cursor']:
+            ids, pagination = self.page(cursor=pagination['next_cursor'])
+            forward += ids
+        backward = list(ids)
+        while pagination['prev_cursor']:
+            ids, pagination = self.page(cursor=pagination['prev_cursor'])
+            backward = ids + backward
+        self.assertFalse(pagination['has_previous'])
+        return forward, backward
+
+    def test_ascending_walk_places_nulls_first(self):
+        self.assertEqual(self.walk('integer_field'), (self.expected(), self.expected()))
+
+    def test_descending_walk_places_nulls_last(self):
+        expected = self.expected(descending=True)
+        self.assertEqual(self.walk('-integer_field'), (expected, expected))
+
+    def test_exact_count(self):
+        _, pagination = self.page(count='exact')
+        self.assertEqual(pagination['total_items'], 6)
+        self.assertTrue(pagination['has_next'])
+
+    def test_bad_cursor_or_sort_is_400(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'sort': 'text_field'}, {'count': 'all'}):
+            with self.subTest(params=params):
+                response = self.client.get('/json_app/search_table1_json/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+# The search box runs on the server (json_app/filters.py) with the old in-browser matches
+@override_settings(AUDIT_LOG_SYNC=True)
+class SearchFilterTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        option2 = Table2.objects.create(positive_small_int=2)
+        self.match = Table1.objects.create(
+            char_field='alpha', integer_field=4321, float_field=3.14159, boolean_field=True,
+            date_field=datetime.date(2024, 5, 6),
+            datetime_field=datetime.datetime(2023, 1, 2, 7, 8, 9, tzinfo=datetime.timezone.utc),
+            foreign_key=option2,
+        )
+        self.match.many_to_many.add(Table3.objects.create(
+            email_field='bob@example.com', duration_field=datetime.timedelta(hours=1),
+        ))
+        self.other = Table1.objects.create(char_field='beta', integer_field=7, float_field=2.5)
+
+    def search(self, **params):
+        response = self.client.get('/json_app/search_table1_json/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {item['id'] for item in response.json()['data']}
+
+    def test_text_fields_and_emails(self):
+        self.assertEqual(self.search(q='ALPH'), {self.match.pk})
+        self.assertEqual(self.search(q='bob@'), {self.match.pk})
+
+    def test_partial_numbers(self):
+        self.assertEqual(self.search(q='432'), {self.match.pk})
+        self.assertEqual(self.search(q='3.141'), {self.match.pk})
+
+    def test_dates_on_their_text_form(self):
+        self.assertEqual(self.search(q='2024-05'), {self.match.pk})
+        self.assertEqual(self.search(q='2023-01-02T07'), {self.match.pk})
+
+    def test_boolean_text(self):
+        self.assertEqual(self.search(q='yes'), {self.match.pk})
+        self.assertEqual(self.search(q='fals'), {self.other.pk})
+
+    def test_foreign_key_label(self):
+        self.assertEqual(self.search(q='option2'), {self.match.pk})
+
+    def test_combined_with_field_filters(self):
+        self.assertEqual(self.search(q='a', integer_field__lt=100), {self.other.pk})
+
+    def test_invalid_filter_value_is_400(self):
+        response = self.client.get('/json_app/search_table1_json/', {'integer_field__gte': 'many'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('integer_field__gte', response.json()['error'])
+
+
+# ?fields= / ?format=columnar shape the search payload (json_app/serializers.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        self.option = Table2.objects.create()
+        self.email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        self.rows = [Table1.objects.create(char_field=f'row{n}', foreign_key=self.option) for n in range(5)]
+        for row in self.rows:
+            row.many_to_many.add(self.email)
+
+    def search(self, **params):
+        response = self.client.get('/json_app/search_table1_json/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_columnar_projection(self):
+        body = self.search(fields='char_field,foreign_key_id', format='columnar')
+        self.assertEqual(body['columns'], ['id', 'char_field', 'foreign_key_id'])
+        self.assertEqual(body['data'][0], [row.pk for row in self.rows])
+        self.assertEqual(body['data'][1], [f'row{n}' for n in range(5)])
+        self.assertEqual(body['data'][2], [self.option.pk] * 5)
+
+    def test_many_to_many_loaded_in_in_clause_batches(self):
+        with mock.patch.object(serializers, 'IN_CLAUSE_BATCH_SIZE', 2):
+            body = self.search(fields='many_to_many')
+        self.assertEqual(len(body['data']), 5)
+        for item in body['data']:
+            self.assertEqual([link['email_field'] for link in item['many_to_many']], ['bob@example.com'])
+
+    def test_unknown_field_or_format_is_400(self):
+        for params in ({'fields': 'password'}, {'format': 'xml'}):
+            with self.subTest(params=params):
+                response = self.client.get('/json_app/search_table1_json/', params)
+                self.assertEqual(response.status_code, 400)
+
+
+# Table1 editor option lists are cached under the Table2/Table3 versions (json_app/options.py)
+class OptionsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.option = Table2.objects.create(positive_small_int=2)
+
+    def options(self, **params):
+        response = self.client.get('/json_app/table1/options/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_warm_cache_skips_the_option_queries(self):
+        first = self.options()
+        self.assertEqual(first['table2_options'], [{'id': self.option.pk, 'positive_small_int': 2}])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.options(), first)
+        # Only version lookups are left (the ETag and the payload token)
+        self.assertTrue(all('rest_tableversion' in query['sql'] for query in queries.captured_queries))
+
+    def test_current_version_returns_only_the_token(self):
+        token = self.options()['options_version']
+        self.assertEqual(self.options(version=token), {'options_version': token, 'options_unchanged': True})
+
+    def test_write_changes_the_token_and_the_lists(self):
+        token = self.options()['options_version']
+        email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        fresh = self.options(version=token)
+        self.assertNotEqual(fresh['options_version'], token)
+        self.assertEqual(fresh['table3_options'], [{'id': email.pk, 'email_field': 'bob@example.com'}])
+
+
+# GET endpoints answer If-None-Match with 304 until a table they embed is written
+@override_settings(AUDIT_LOG_SYNC=True)
+class ETagTests(TestCase):
+    url = '/json_app/search_table1_json/'
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        self.row = Table1.objects.create(char_field='row')
+
+    def etag(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_tables_answer_304_without_reading_rows(self):
+        etag = self.etag()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('rest_table1' in query['sql'] for query in queries.captured_queries))
+
+    def test_writes_to_embedded_tables_change_the_etag(self):
+        etag = self.etag()
+        self.row.char_field = 'renamed'
+        self.row.save()
+        after_table1 = self.etag()
+        self.assertNotEqual(after_table1, etag)
+        Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        self.assertNotEqual(self.etag(), after_table1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_query_string_is_part_of_the_etag(self):
+        self.assertNotEqual(self.etag(), self.etag(q='row'))
+
+
+# JSON array bodies on the CRUD endpoints go through json_app/bulk.py
+class BulkWriteTests(TestCase):
+    def send(self, method, url, payload):
+        response = getattr(self.client, method)(url, json.dumps(payload), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_create_checks_relations_and_writes_links(self):
+        table2 = Table2.objects.create()
+        table3 = Table3.objects.create(duration_field=datetime.timedelta(hours=1), email_field='a@example.com')
+        status, body = self.send('post', '/json_app/table1/', [
+            {'char_field': 'ok', 'foreign_key': table2.pk, 'many_to_many': [table3.pk]},
+            {'char_field': 'bad', 'foreign_key': table2.pk + 100},
+            {'char_field': 'x' * 20},
+        ])
+        self.assertEqual(status, 201)
+        self.assertEqual(body['created'], 1)
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2])
+        self.assertEqual(list(Table1.objects.get(char_field='ok').many_to_many.all()), [table3])
+
+    def lower_variable_limit(self, limit=999):
+        # SQLite builds differ (999, 32766, 250000); pin the historical default
+        connection.ensure_connection()
+        previous = connection.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+        self.addCleanup(connection.connection.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, previous)
+
+    def test_relation_lookups_are_chunked(self):
+        self.lower_variable_limit()
+        table2 = Table2.objects.create()
+        status, body = self.send('post', '/json_app/table1/', [
+            {'char_field': 'many', 'many_to_many': list(range(1, 2001))},
+            *({'char_field': str(n), 'foreign_key': table2.pk + n} for n in range(1200)),
+        ])
+        self.assertEqual(status, 201)
+        self.assertEqual(body['created'], 1)
+        self.assertIn('Table3 not found', body['errors'][0]['errors']['many_to_many'][0])
+        self.assertEqual(len(body['errors']), 1200)
+
+    def test_unique_values_checked_across_chunks(self):
+        self.lower_variable_limit()
+        rows = [
+            Table3(duration_field=datetime.timedelta(0), email_field=f'user{n}@example.com')
+            for n in range(BULK_BATCH_SIZE * 2 + 10)
+        ]
+        Table3.objects.bulk_create(rows)
+        payload = [
+            {'duration_field': '00:00:01', 'email_field': f'user{n}@example.com'} for n in range(BULK_BATCH_SIZE * 2 + 10)
+        ] + [{'duration_field': '00:00:01', 'email_field': 'new@example.com'}]
+        status, body = self.send('post', '/json_app/table3/', payload)
+        self.assertEqual(status, 201)
+        self.assertEqual(body['created'], 1)
+        self.assertEqual(len(body['errors']), BULK_BATCH_SIZE * 2 + 10)
+
+    def test_update_replaces_links(self):
+        first, second = (
+            Table3.objects.create(duration_field=datetime.timedelta(0), email_field=f'{n}@example.com')
+            for n in ('first', 'second')
+        )
+        row = Table1.objects.create(char_field='row')
+        row.many_to_many.add(first)
+        status, body = self.send('put', '/json_app/table1/', [
+            {'id': row.pk, 'char_field': 'renamed', 'many_to_many': [second.pk]},
+            {'id': row.pk + 100, 'char_field': 'missing'},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual(body['updated'], 1)
+        row.refresh_from_db()
+        self.assertEqual(row.char_field, 'renamed')
+        self.assertEqual(list(row.many_to_many.all()), [second])
+
+    def test_delete_in_chunks(self):
+        Table1.objects.bulk_create([Table1(char_field=str(n)) for n in range(BULK_BATCH_SIZE * 2 + 1)])
+        ids = list(Table1.objects.values_list('pk', flat=True))
+        status, body = self.send('delete', '/json_app/table1/', ids + [max(ids) + 1])
+        self.assertEqual(status, 200)
+        self.assertEqual(body['deleted'], len(ids))
+        self.assertEqual(len(body['errors']), 1)
+        self.assertFalse(Table1.objects.exists())
+
+
+# Resumable uploads (json_app/uploads.py): chunks, resume and attaching to Table1
+@override_settings(AUDIT_LOG_SYNC=True)
+class ResumableUploadTests(TestCase):
+    DATA = b'0123456789abcdef'
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = media_root
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+
+    def create(self, **extra):
+        response = self.client.post(
+            '/json_app/uploads/', {'filename': 'notes.txt', 'size': len(self.DATA), **extra},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return Upload.objects.get(pk=response.json()['id'])
+
+    def patch(self, upload, offset, data):
+        return self.client.patch(
+            f'/json_app/uploads/{upload.pk}/', data, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def attach(self, upload, **payload):
+        return self.client.post(
+            '/json_app/table1/', {'char_field': 'row', 'file_field': {'upload_id': str(upload.pk)}, **payload},
+            content_type='application/json',
+        )
+
+    def receive(self):
+        upload = self.create()
+        self.assertEqual(self.patch(upload, 0, self.DATA).status_code, 200)
+        upload.refresh_from_db()
+        return upload
+
+    def test_resume_on_a_process_without_the_hasher(self):
+        upload = self.create(sha256=hashlib.sha256(self.DATA).hexdigest())
+        self.assertEqual(self.patch(upload, 0, self.DATA[:6]).json()['offset'], 6)
+        self.assertEqual(self.client.head(f'/json_app/uploads/{upload.pk}/')['Upload-Offset'], '6')
+        uploads._hashers.clear()
+        body = self.patch(upload, 6, self.DATA[6:]).json()
+        self.assertEqual((body['offset'], body['status']), (len(self.DATA), 'received'))
+        self.assertEqual(body['sha256'], hashlib.sha256(self.DATA).hexdigest())
+
+    def test_offset_mismatch_is_rejected(self):
+        upload = self.create()
+        self.patch(upload, 0, self.DATA[:4])
+        response = self.patch(upload, 0, self.DATA[:4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '4')
+        with open(upload.path, 'rb') as partial:
+            self.assertEqual(partial.read(), self.DATA[:4])
+
+    def test_chunk_while_another_is_written_is_rejected(self):
+        if uploads.fcntl is None:
+            self.skipTest('no fcntl on this platform')
+        upload = self.create()
+        with open(upload.path, 'r+b') as partial:
+            uploads.fcntl.flock(partial.fileno(), uploads.fcntl.LOCK_EX)
+            response = self.patch(upload, 0, self.DATA)
+        self.assertEqual(response.status_code, 409)
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 0)
+
+    def test_checksum_mismatch_restarts(self):
+        upload = self.create(sha256='0' * 64)
+        self.assertEqual(self.patch(upload, 0, self.DATA).status_code, 422)
+        upload.refresh_from_db()
+        self.assertEqual((upload.offset, upload.status), (0, 'pending'))
+
+    def test_completion_attaches_once(self):
+        upload = self.receive()
+        self.assertEqual(upload.status, 'received')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.attach(upload)
+        self.assertEqual(response.status_code, 201)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'complete')
+        self.assertFalse(os.path.exists(upload.path))
+        row = Table1.objects.get(pk=response.json()['data']['id'])
+        with row.file_field.open('rb') as stored:
+            self.assertEqual(stored.read(), self.DATA)
+        self.assertEqual(self.attach(upload).status_code, 409)
+
+    def test_failed_save_leaves_upload_claimable(self):
+        taken = Table2.objects.create()
+        Table1.objects.create(char_field='owner', one_to_one=taken)
+        upload = self.receive()
+        # one_to_one is unique: the INSERT fails after the file was stored
+        self.assertEqual(self.attach(upload, one_to_one={'id': taken.pk}).status_code, 500)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'received')
+        self.assertTrue(os.path.exists(upload.path))
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'files')))
+        self.assertEqual(self.attach(upload).status_code, 201)
+
+    def test_idle_and_surplus_hashers_are_dropped(self):
+        uploads._hashers.clear()
+        self.addCleanup(uploads._hashers.clear)
+        uploads._hashers['idle'] = (0, hashlib.sha256(), time.monotonic() - uploads.UPLOAD_HASHER_IDLE - 1)
+        with mock.patch.object(uploads, 'UPLOAD_HASHER_MAX', 2):
+            for name in ('a', 'b', 'c'):
+                uploads._remember_hasher(name, 0, hashlib.sha256())
+        self.assertEqual(list(uploads._hashers), ['b', 'c'])
+
+
+# /json_app/async/ endpoints answer exactly like their sync counterparts (views_async.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        table2 = Table2.objects.create()
+        table3 = Table3.objects.create(duration_field=datetime.timedelta(hours=1), email_field='a@example.com')
+        for n in range(7):
+            row = Table1.objects.create(char_field=str(n), foreign_key=table2)
+            row.many_to_many.add(table3)
+
+    async def assertSameResponse(self, url, **params):
+        await self.async_client.aforce_login(await User.objects.aget(username='alice'))
+        sync = await sync_to_async(self.client.get)(f'/json_app/{url}', params)
+        response = await self.async_client.get(f'/json_app/async/{url}', params)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response.content, sync.content)
+        return response
+
+    async def test_reads_match(self):
+        for url, params in (
+            ('table1/', {'page': 2}),
+            ('table1/', {'cursor': '', 'page_size': 3, 'fields': 'id,char_field'}),
+            ('table2/', {}),
+            ('table3/', {'cursor': ''}),
+            ('search_all_json/', {}),
+        ):
+            with self.subTest(url=url, params=params):
+                await self.assertSameResponse(url, **params)
+
+    async def test_stream_matches(self):
+        def sync_body():
+            return b''.join(self.client.get('/json_app/search_all_json/', {'stream': 'ndjson'}).streaming_content)
+
+        await self.async_client.aforce_login(await User.objects.aget(username='alice'))
+        response = await self.async_client.get('/json_app/async/search_all_json/', {'stream': 'ndjson'})
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, await sync_to_async(sync_body)())
+        self.assertEqual(len(body.splitlines()), 7)
+
+    async def test_table2_and_table3_writes_share_the_sync_handler(self):
+        response = await self.async_client.post(
+            '/json_app/async/table3/', {'duration_field': '1 02:03:04', 'email_field': 'b@example.com'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['duration_field'], 'P1DT02H03M04S')
+        response = await self.async_client.post(
+            '/json_app/async/table3/', {'duration_field': 'soon', 'email_field': 'c@example.com'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(
+            '/json_app/async/table2/', {'positive_small_int': 2}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
@@ -0,0 +1,307 @@
+"""Streaming, resumable uploads for Table1 image_field / file_field.
+
+Base64 data-URLs inside the JSON body cost ~1.33x the file size in request
+body plus a full decoded copy in memory. Instead a client can:
+
+    POST   /json_app/uploads/              {"filename", "size", "sha256"?}  -> {"id", "offset": 0}
+    PATCH  /json_app/uploads/<id>/         raw bytes, header Upload-Offset: <n>
+    HEAD   /json_app/uploads/<id>/         -> Upload-Offset header (where to resume)
+    DELETE /json_app/uploads/<id>/         abort and remove the partial file
+
+and then send {"image_field": {"upload_id": "<id>"}} to table1/.
+
+Chunk bodies are read from the request stream UPLOAD_READ_SIZE bytes at a time
+and appended to the partial file, so memory per upload is bounded whatever
+the file size. A chunk that was cut off mid-way is kept up to the last byte
+written; HEAD tells the client where to resume.
+
+Chunks are written outside any database transaction. Holding one open while
+a slow client streams would keep SQLite's write lock for the whole chunk, and
+select_for_update() is a no-op on SQLite. Two guards stop concurrent PATCHes
+for the same upload instead:
+
+- the writer takes a non-blocking flock() on the partial file, and a second
+  writer gets 409 at once;
+- the new offset is recorded with a compare-and-set UPDATE ... WHERE
+  offset = <start>, a short autocommit write that also catches writers the
+  lock cannot see (other hosts, no fcntl).
+
+Once every byte has arrived (and matches the sha256, if one was given), the
+upload is 'received'. It becomes 'complete' only in the transaction of the
+Table1 save that attaches it (attach_uploads). The storage gets a hard link
+to the partial file, and the partial is removed after the commit. So a save
+that rolls back leaves the upload 'received' and claimable again.
+
+The SHA-256 is updated as bytes arrive. hashlib state cannot be stored in the
+database, so the running hasher is kept per process; if a resumed chunk lands
+on a process that does not have it (restart, other worker) the digest is
+rebuilt by re-reading the partial file from disk once. Hashers idle for
+UPLOAD_HASHER_IDLE seconds, or past the UPLOAD_HASHER_MAX most recent, are
+dropped, so abandoned uploads do not pin memory.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Upload
+
+try:
+    import fcntl
+except ImportError:  # Windows: the compare-and-set alone guards the offset
+    fcntl = None
+
+# Bytes pulled from the request stream per read()
+UPLOAD_READ_SIZE = 64 * 1024
+# Largest file accepted by the upload endpoint
+UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+# Running hashers kept per process (they can always be rebuilt from disk)
+UPLOAD_HASHER_MAX = 256
+UPLOAD_HASHER_IDLE = 3600  # seconds
+
+# upload id -> (offset, hasher, last used), least recently used first
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(ValueError):
+    """Raised for an invalid upload request; carries the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def create_upload(user, payload):
+    """Validate the POST payload and create an empty partial file."""
+    filename = os.path.basename(str(payload.get('filename') or '')).strip()
+    if not filename:
+        raise UploadError('filename is required')
+    try:
+        size = int(payload.get('size'))
+    except (TypeError, ValueError):
+        raise UploadError('size (in bytes) is required')
+    if size <= 0 or size > UPLOAD_MAX_SIZE:
+        raise UploadError(f'size must be between 1 and {UPLOAD_MAX_SIZE} bytes')
+    expected = str(payload.get('sha256') or '').lower()
+    if expected and (len(expected) != 64 or any(c not in '0123456789abcdef' for c in expected)):
+        raise UploadError('sha256 must be a hex digest')
+
+    upload = Upload.objects.create(user=user, filename=filename[:255], size=size, sha256=expected)
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    open(upload.path, 'wb').close()
+    return upload
+
+
+def _remember_hasher(upload_id, offset, hasher):
+    current = time.monotonic()
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher, current)
+        _hashers.move_to_end(upload_id)
+        while _hashers:
+            oldest_id, (_, _, used) = next(iter(_hashers.items()))
+            if len(_hashers) <= UPLOAD_HASHER_MAX and current - used < UPLOAD_HASHER_IDLE:
+                break
+            del _hashers[oldest_id]
+
+
+def _forget_hasher(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+def _hasher_for(upload):
+    """Running SHA-256 of the first upload.offset bytes."""
+    with _hashers_lock:
+        state = _hashers.get(upload.pk)
+    if state is not None and state[0] == upload.offset:
+        return state[1]
+    hasher = hashlib.sha256()
+    with open(upload.path, 'rb') as partial:
+        remaining = upload.offset
+        while remaining:
+            block = partial.read(min(UPLOAD_READ_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _lock(partial):
+    if fcntl is None:
+        return
+    try:
+        fcntl.flock(partial.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise UploadError('Another chunk is being written to this upload, retry after it', status=409)
+
+
+def _record_offset(upload, start, offset):
+    """Move the stored offset from start to offset; False if someone else moved it."""
+    updated = Upload.objects.filter(pk=upload.pk, offset=start, status='pending').update(
+        offset=offset, updated_at=timezone.now(),
+    )
+    if updated:
+        upload.offset = offset
+    return bool(updated)
+
+
+def write_chunk(upload, stream, offset, length=None):
+    """Append bytes from stream at offset; returns the refreshed upload.
+
+    Must not run inside a transaction: the chunk is streamed with no
+    database lock held (see the module docstring).
+    """
+    try:
+        partial = open(upload.path, 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Upload not found', status=404)
+    with partial:
+        _lock(partial)
+        # The offset the last writer recorded, now that no other writer runs
+        upload.refresh_from_db(fields=['offset', 'status', 'sha256'])
+        if upload.status != 'pending':
+            raise UploadError('Upload already received', status=409)
+        if offset != upload.offset:
+            raise UploadError(f'Upload-Offset must be {upload.offset}', status=409)
+        remaining = upload.size - upload.offset
+        if length is not None and length > remaining:
+            raise UploadError(f'Chunk exceeds the declared size by {length - remaining} bytes', status=413)
+
+        start = upload.offset
+        hasher = _hasher_for(upload)
+        written = 0
+        # Drop any tail past the recorded offset left by an interrupted write
+        partial.seek(start)
+        partial.truncate()
+        try:
+            while written < remaining:
+                block = stream.read(min(UPLOAD_READ_SIZE, remaining - written))
+                if not block:
+                    break
+                partial.write(block)
+                hasher.update(block)
+                written += len(block)
+        finally:
+            # Bytes that reached the disk before a dropped connection still count
+            partial.flush()
+            if not _record_offset(upload, start, start + written):
+                _forget_hasher(upload.pk)
+                raise UploadError('Upload changed while this chunk was written, check the offset', status=409)
+            _remember_hasher(upload.pk, upload.offset, hasher)
+
+        if upload.offset == upload.size:
+            _finish(upload, hasher)
+    return upload
+
+
+def _finish(upload, hasher):
+    _forget_hasher(upload.pk)
+    digest = hasher.hexdigest()
+    if upload.sha256 and upload.sha256 != digest:
+        # Never attach a corrupt file: start over from byte 0
+        open(upload.path, 'wb').close()
+        Upload.objects.filter(pk=upload.pk).update(offset=0, updated_at=timezone.now())
+        upload.offset = 0
+        raise UploadError('Checksum mismatch, upload restarted from offset 0', status=422)
+    upload.sha256 = digest
+    upload.status = 'received'
+    upload.save(update_fields=['sha256', 'status', 'updated_at'])
+
+
+def _remove_partial(upload):
+    _forget_hasher(upload.pk)
+    try:
+        os.remove(upload.path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_upload(upload):
+    """Remove the partial file and the row."""
+    _remove_partial(upload)
+    upload.delete()
+
+
+class CompletedUpload(File):
+    """File wrapper exposing temporary_file_path() so FileSystemStorage moves
+    the finished upload into place instead of copying it chunk by chunk.
+
+    What gets moved is a hard link to the partial file, so the partial stays
+    until attach_uploads() has committed.
+    """
+
+    def __init__(self, upload):
+        super().__init__(open(upload.path, 'rb'), name=upload.filename)
+        self.upload = upload
+        self._link = None
+
+    def temporary_file_path(self):
+        if self._link is None:
+            self._link = f"{self.upload.path}.{uuid.uuid4().hex}"
+            try:
+                os.link(self.upload.path, self._link)
+            except OSError:
+                # No hard links here (other filesystem, Windows without privileges)
+                shutil.copyfile(self.upload.path, self._link)
+        return self._link
+
+    def close(self):
+        super().close()
+        # Still there only when the storage never moved it
+        if self._link is not None and os.path.exists(self._link):
+            os.remove(self._link)
+
+
+def claim_upload(user, upload_id):
+    """Return a CompletedUpload for a received upload owned by user."""
+    if not user.is_authenticated:
+        raise UploadError('Login required to attach uploads', status=401)
+    try:
+        upload = Upload.objects.get(pk=upload_id, user=user)
+    except (Upload.DoesNotExist, ValidationError):
+        # Malformed UUIDs raise ValidationError on lookup
+        raise UploadError(f'Upload {upload_id} not found', status=404)
+    if upload.status == 'complete':
+        raise UploadError(f'Upload {upload_id} is already attached', status=409)
+    if not upload.is_received:
+        raise UploadError(f'Upload {upload_id} is not complete ({upload.offset}/{upload.size} bytes)', status=409)
+    return CompletedUpload(upload)
+
+
+def attach_uploads(files):
+    """Mark the claimed uploads among files complete; call inside the saving transaction.
+
+    Raises UploadError (409) if another save attached one of them first. The
+    partial files are removed once the transaction commits.
+    """
+    for file in files:
+        if not isinstance(file, CompletedUpload):
+            continue
+        upload = file.upload
+        updated = Upload.objects.filter(pk=upload.pk, status='received').update(
+            status='complete', updated_at=timezone.now(),
+        )
+        if not updated:
+            raise UploadError(f'Upload {upload.pk} is already attached', status=409)
+        upload.status = 'complete'
+        transaction.on_commit(lambda upload=upload: _remove_partial(upload))
+
+
+def delete_attached_copies(instance, files):
+    """Remove what the storage saved for claimed uploads when the save rolled back."""
+    for field, file in files.items():
+        if isinstance(file, CompletedUpload):
+            stored = getattr(instance, field)
+            if stored and stored.name and stored.name != file.name:
+                stored.storage.delete(stored.name)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, views_async
 from .views_dark_mode import toggle_dark_mode, get_dark_mode_status  # usado solo si se reactivan endpoints locales
 
 
@@ -13,10 +13,22 @@ urlpatterns = [
 
     # CRUD endpoints for JSON fetch
     path('table1/', views.table1_crud, name='table1_crud'),
+    path('table1/options/', views.table1_options, name='table1_options'),
     path('table2/', views.table2_crud, name='table2_crud'),
     path('table3/', views.table3_crud, name='table3_crud'),
+
+    # Resumable file uploads referenced from Table1 payloads by upload_id
+    path('uploads/', views.upload_create, name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
     
     # Table1 search
     path('search_json/', views.search_view, name='search_json'),
     path('search_all_json/', views.search_all_data, name='search_all_json'),
+    path('search_table1_json/', views.search_table1_data, name='search_table1_json'),
+
+    # Async-native variants (serve with an ASGI server, see views_async.py)
+    path('async/table1/', views_async.table1_crud, name='async_table1_crud'),
+    path('async/table2/', views_async.table2_crud, name='async_table2_crud'),
+    path('async/table3/', views_async.table3_crud, name='async_table3_crud'),
+    path('async/search_all_json/', views_async.search_all_data, name='async_search_all_json'),
 ]
@@ -4,18 +4,26 @@ This module exposes:
 1. User auth flows (register, login, logout, profile)
 2. Hybrid HTML/JSON profile response
 3. REST-like CRUD endpoints for Table1/Table2/Table3 (returning JSON only)
-4. Search endpoints for bulk retrieval (optimized with prefetch/select)
-5. File & image handling supporting multipart and base64 payloads
+4. Search endpoints: server-side filtered/sorted/paginated search and bulk retrieval
+5. File & image handling supporting multipart, base64 and resumable upload payloads
 
 Design notes:
 - Endpoints are intentionally CSRF-exempt for JSON clients (could be tightened with tokens)
 - Pagination logic caps page_size to protect the DB and prevent abuse (1..100)
+- Passing ?cursor= switches list endpoints to keyset pagination (see pagination.py)
+- search_all_json can stream NDJSON / a chunked JSON array for constant memory
 - Relationship fields are normalized in responses to stable id+label objects
+- Table1 rows go through serializers.serialize_table1 (fixed query count per page)
+- Table1 listings accept ?fields= (only() projection) and ?format=columnar
+- GET responses carry a strong ETag built from table versions; If-None-Match -> 304
+- JSON array bodies on POST/PUT/DELETE are bulk writes (see bulk.py)
+- Large files go through uploads/ (streamed to disk, resumable) and are referenced by upload_id
 - File update replaces old file safely and avoids orphan files
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 
 #message
 from django.contrib import messages
@@ -29,8 +37,13 @@ import string
 #auth
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
 from django.core.files.base import ContentFile
 from rest.models import Table1, Table2, Table3
+from rest.versioning import versioned_etag
+from rest.deletion import delete_table1
+from rest.permission_cache import get_permission_profile
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import json
 import base64
@@ -38,6 +51,19 @@ from django.db import transaction
 from django.db.models import Prefetch
 from django.forms.models import model_to_dict
 from datetime import timedelta
+from .pagination import keyset_paginate, InvalidCursor
+from .filters import search_table1, FilterError
+from .serializers import (
+    table1_queryset, serialize_table1, iter_serialize_table1,
+    parse_table1_shape, project_table1, shape_table1, FieldsError,
+)
+from .options import relation_options_payload
+from .bulk import is_bulk_request, handle_bulk
+from .models import Upload
+from .uploads import (
+    UploadError, CompletedUpload, create_upload, write_chunk, discard_upload, claim_upload,
+    attach_uploads, delete_attached_copies,
+)
 
 # Home view (simple template render)
 def home(request):
@@ -137,19 +163,10 @@ def profile(request):
     # Get the logged-in user
     user = request.user
 
-    # Determine the user's role based on group membership
-    if user.groups.filter(name='Admins').exists():
-        role = 'Administrator'
-    elif user.groups.filter(name='Customers').exists():
-        role = 'Customer'
-    else:
-        role = 'No role assigned'
-    
-    # Get user permissions
-    user_permissions = []
-    for group in user.groups.all():
-        for permission in group.permissions.all():
-            user_permissions.append(permission.name)
+    # Role, groups and permissions from the per-user permission cache (rest.permission_cache)
+    permission_profile = get_permission_profile(user)
+    role = permission_profile['role']
+    user_permissions = permission_profile['group_permission_names']
     
     # Remove duplicates and sort permissions
     if request.headers.get('Accept') == 'application/json' or request.GET.get('format') == 'json':
@@ -160,7 +177,7 @@ def profile(request):
             'role': role,
             'permissions': user_permissions,
             'is_admin': role == 'Administrator',
-            'groups': [group.name for group in user.groups.all()]
+            'groups': permission_profile['groups']
         }
         return JsonResponse(data)
     
@@ -183,10 +200,17 @@ def user_logout(request):
         messages.success(request, f"Session closed successfully.")
         return redirect('login_json')
 
+# Table1 payloads embed Table2 (FK labels) and Table3 (M2M emails, options)
+TABLE1_ETAG = versioned_etag(Table1, Table2, Table3)
+
 # CRUD views for Table1
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=TABLE1_ETAG)
 def table1_crud(request):
     """Multi-method endpoint dispatching CRUD operations for Table1."""
+    if is_bulk_request(request):
+        return _handle_bulk_request(Table1, request)
     if request.method == 'GET':
         return table1_crud_get(request)
     if request.method == 'POST':
@@ -199,7 +223,7 @@ def table1_crud(request):
 
 # Handles GET requests for Table1 objects with pagination
 def table1_crud_get(request):
-    """Return paginated Table1 objects with related data & option lists."""
+    """Return paginated Table1 objects with related data & (cached) option lists."""
     # Parse pagination parameters - defaults to page 1 with 5 items per page
     page = request.GET.get('page', 1)
     raw_page_size = request.GET.get('page_size', 5)
@@ -213,77 +237,79 @@ def table1_crud_get(request):
     if page_size > 100:
         page_size = 100
 
+    try:
+        fields, columnar = parse_table1_shape(request.GET)
+    except FieldsError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
     # Explicit ordering prevents UnorderedObjectListWarning
-    queryset = Table1.objects.all().order_by('id').prefetch_related('many_to_many', 'foreign_key', 'one_to_one')
-    total = queryset.count()
-    
-    # Only enable pagination if we have 5 or more items
-    if total >= 5:
-        # Use Django's Paginator for proper pagination handling
-        paginator = Paginator(queryset, page_size)
+    queryset = project_table1(table1_queryset(), fields).order_by('id')
+
+    # Keyset mode: cost of a page no longer depends on how deep the client is
+    if 'cursor' in request.GET:
         try:
-            page_obj = paginator.page(page)
-        except PageNotAnInteger:
-            page_obj = paginator.page(1)
-            page = 1
-        except EmptyPage:
-            # If page is out of range, return last page
-            page_obj = paginator.page(paginator.num_pages)
-            page = paginator.num_pages
-        
-        items = _serialize_table1_objects(page_obj.object_list)
-        pagination_payload = {
-            'enabled': True,
-            'page': int(page),
-            'page_size': page_size,
-            'total_items': paginator.count,
-            'total_pages': paginator.num_pages,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-        }
+            page_rows, pagination_payload = keyset_paginate(queryset, request.GET, page_size)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        items = serialize_table1(page_rows, fields)
     else:
-        # Return all items without pagination for small datasets
-        items = _serialize_table1_objects(queryset)
-        pagination_payload = {'enabled': False, 'total_items': total}
+        total = queryset.count()
+    
+        # Only enable pagination if we have 5 or more items
+        if total >= 5:
+            # Use Django's Paginator for proper pagination handling
+            paginator = Paginator(queryset, page_size)
+            # Reuse the count we already ran instead of letting Paginator issue a second COUNT(*)
+            paginator.count = total
+            try:
+                page_obj = paginator.page(page)
+            except PageNotAnInteger:
+                page_obj = paginator.page(1)
+                page = 1
+            except EmptyPage:
+                # If page is out of range, return last page
+                page_obj = paginator.page(paginator.num_pages)
+                page = paginator.num_pages
+        
+            items = serialize_table1(page_obj.object_list, fields)
+            pagination_payload = {
+                'enabled': True,
+                'page': int(page),
+                'page_size': page_size,
+                'total_items': paginator.count,
+                'total_pages': paginator.num_pages,
+                'has_next': page_obj.has_next(),
+                'has_previous': page_obj.has_previous(),
+            }
+        else:
+            # Return all items without pagination for small datasets
+            items = serialize_table1(queryset, fields)
+            pagination_payload = {'enabled': False, 'total_items': total}
 
-    # Get options for foreign key and many-to-many fields
-    table2_options = list(Table2.objects.all().values('id', 'positive_small_int'))
-    table3_options = list(Table3.objects.all().values('id', 'email_field'))
+    response_data = {**shape_table1(items, fields, columnar), 'pagination': pagination_payload}
 
-    return JsonResponse({
-        'data': items,
-        'pagination': pagination_payload,
-        'table2_options': table2_options,
-        'table3_options': table3_options
-    })
+    # Options for foreign key and many-to-many fields come from a versioned cache.
+    # Clients send back ?options_version= to skip lists they already hold, or
+    # ?include_options=0 to skip them entirely.
+    if request.GET.get('include_options', '1') != '0':
+        response_data.update(relation_options_payload(request.GET.get('options_version')))
 
+    return JsonResponse(response_data)
+
+
+# Option lists for the Table1 editor (cached, versioned)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(Table2, Table3))
+def table1_options(request):
+    """Return Table2/Table3 option lists plus their version token.
+
+    With ?version=<token> matching the current version only the token is
+    returned ('options_unchanged': true), so editors can poll cheaply.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    return JsonResponse(relation_options_payload(request.GET.get('version')))
 
-def _serialize_table1_objects(queryset):
-    """Serialize Table1 queryset into list of dicts."""
-    items = []
-    for obj in queryset:
-        # Handle file fields specially to get proper URLs
-        item_dict = {
-            field.name: (
-                getattr(obj, field.name) 
-                if field.name not in ['image_field', 'file_field'] 
-                else obj.get_file_field_url(field.name) if getattr(obj, field.name) else None
-            )
-            for field in obj._meta.fields
-        }
-        
-        # Serialize relationship fields with proper structure
-        item_dict['foreign_key'] = (
-            {'id': obj.foreign_key.id, 'positive_small_int': obj.foreign_key.positive_small_int} 
-            if obj.foreign_key else None
-        )
-        item_dict['one_to_one'] = (
-            {'id': obj.one_to_one.id, 'positive_small_int': obj.one_to_one.positive_small_int} 
-            if obj.one_to_one else None
-        )
-        item_dict['many_to_many'] = list(obj.many_to_many.values('id', 'email_field'))
-        items.append(item_dict)
-    return items
 
 # Handles POST requests for creating Table1 objects
 def table1_crud_post(request):
@@ -314,6 +340,9 @@ def handle_table1_crud(request, obj_id):
     Base64 file object format:
         { "image_field": {"name": "foo.png", "content": "data:image/png;base64,..."} }
 
+    Finished resumable upload (see uploads.py), moved into place without a copy:
+        { "file_field": {"upload_id": "<uuid>"} }
+
     Relationship payload expectations:
         foreign_key: {"id": int} or null
         one_to_one:  {"id": int} or null
@@ -328,10 +357,15 @@ def handle_table1_crud(request, obj_id):
             data = json.loads(request.body)
             files_data = {}
 
-        # Handle base64 files
+        # Handle resumable uploads and base64 files
         for field in ['image_field', 'file_field']:
             file_info = data.pop(field, None)
-            if file_info and isinstance(file_info, dict) and 'content' in file_info and 'name' in file_info:
+            if isinstance(file_info, dict) and 'upload_id' in file_info:
+                try:
+                    files_data[field] = claim_upload(request.user, file_info['upload_id'])
+                except UploadError as e:
+                    return JsonResponse({'error': f'{field}: {e}'}, status=e.status)
+            elif file_info and isinstance(file_info, dict) and 'content' in file_info and 'name' in file_info:
                 try:
                     format, imgstr = file_info['content'].split(';base64,')
                     file_content = ContentFile(base64.b64decode(imgstr), name=file_info['name'])
@@ -384,19 +418,23 @@ def handle_table1_crud(request, obj_id):
         obj.foreign_key = Table2.objects.get(id=foreign_key_id) if foreign_key_id else None
         obj.one_to_one = Table2.objects.get(id=one_to_one_id) if one_to_one_id else None
 
-        with transaction.atomic():
-            obj.save()
-            obj.many_to_many.set(Table3.objects.filter(id__in=many_to_many_ids))
-
-        # Prepare response data
-        response_data = {
-            'id': obj.id,
-            'image_field': obj.get_file_field_url('image_field'),
-            'file_field':  obj.get_file_field_url('file_field'),
-            'foreign_key': {'id': obj.foreign_key.id, 'positive_small_int': obj.foreign_key.positive_small_int} if obj.foreign_key else None,
-            'one_to_one': {'id': obj.one_to_one.id, 'positive_small_int': obj.one_to_one.positive_small_int} if obj.one_to_one else None,
-            'many_to_many': list(obj.many_to_many.values('id', 'email_field'))
-        }
+        try:
+            with transaction.atomic():
+                obj.save()
+                obj.many_to_many.set(Table3.objects.filter(id__in=many_to_many_ids))
+                # Claimed uploads are complete only if this save commits
+                attach_uploads(files_data.values())
+        except Exception:
+            # Rolled back: the uploads stay claimable, drop what was stored for them
+            delete_attached_copies(obj, files_data)
+            raise
+        finally:
+            for file in files_data.values():
+                if isinstance(file, CompletedUpload):
+                    file.close()
+
+        # Prepare response data (same row shape as the GET listing)
+        response_data = serialize_table1([obj])[0]
 
         status_code = 200 if obj_id else 201
         return JsonResponse({'data': response_data}, status=status_code)
@@ -408,6 +446,8 @@ def handle_table1_crud(request, obj_id):
         return JsonResponse({'error': 'Table2 object not found'}, status=400)
     except Table3.DoesNotExist:
         return JsonResponse({'error': 'Table3 object not found'}, status=400)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
     
@@ -418,12 +458,8 @@ def table1_crud_delete(request):
     try:
         data = json.loads(request.body)
         entry = get_object_or_404(Table1, id=data['id'])
-        # Delete associated files if they exist
-        if entry.image_field:
-            entry.image_field.delete(save=False)
-        if entry.file_field:
-            entry.file_field.delete(save=False)
-        entry.delete()
+        # One set-based delete; associated files are removed once it commits
+        delete_table1([entry.pk])
         return JsonResponse({'message': 'Deleted'}, status=204)
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON data'}, status=400)
@@ -436,6 +472,8 @@ def table1_crud_delete(request):
 def _handle_simple_table_get(model_class, request):
     """
     Generic pagination handler for simple CRUD operations.
+
+    Supports page-number pagination (?page=) and keyset pagination (?cursor=).
     
     Returns:
         JsonResponse with paginated data and pagination metadata
@@ -457,11 +495,22 @@ def _handle_simple_table_get(model_class, request):
     
     # Explicit ordering to prevent UnorderedObjectListWarning
     queryset = model_class.objects.all().order_by('id')
+
+    # Keyset mode: opaque cursor instead of page numbers, COUNT(*) only on request
+    if 'cursor' in request.GET:
+        try:
+            items, pagination_payload = keyset_paginate(queryset.values(), request.GET, page_size)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'data': items, 'pagination': pagination_payload}, status=200)
+
     total = queryset.count()
     
     # Enable pagination only when there are 5 or more records
     if total >= 5:
         paginator = Paginator(queryset, page_size)
+        # Reuse the count we already ran instead of letting Paginator issue a second COUNT(*)
+        paginator.count = total
         
         # Handle page validation and edge cases
         try:
@@ -491,100 +540,78 @@ def _handle_simple_table_get(model_class, request):
     
     return JsonResponse({'data': items, 'pagination': pagination_payload}, status=200)
 
+# Array payloads: many objects per request, one transaction
+def _handle_bulk_request(model_class, request):
+    """Run a bulk create/update/delete and report per-item errors."""
+    try:
+        payloads = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    response_data, status_code = handle_bulk(model_class, request, payloads)
+    return JsonResponse(response_data, status=status_code)
+
+# Table3.duration_field payloads: "DD HH:MM:SS" or "HH:MM:SS"
+DURATION_FORMAT_ERROR = 'Invalid duration format. Use "DD HH:MM:SS" or "HH:MM:SS"'
+
+def parse_duration_payload(duration_str):
+    """Parse a duration string into a timedelta (raises ValueError/AttributeError)."""
+    if ' ' in duration_str:
+        days_str, time_str = duration_str.split(' ')
+        days = int(days_str)
+    else:
+        time_str = duration_str
+        days = 0
+    hours, minutes, seconds = map(int, time_str.split(':'))
+    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+# Single-object writes shared by table2_crud and table3_crud (and their async twins)
+def _simple_table_write(model_class, request):
+    """Create (POST), update (PUT) or delete (DELETE) one Table2/Table3 object."""
+    data = json.loads(request.body)
+    if request.method == 'DELETE':
+        model_class.objects.filter(id=data['id']).delete()
+        return JsonResponse({'message': 'Deleted'}, status=204)
+
+    # Convert duration string to timedelta if present (Table3)
+    if model_class is Table3 and 'duration_field' in data:
+        try:
+            data['duration_field'] = parse_duration_payload(data['duration_field'])
+        except (ValueError, AttributeError):
+            return JsonResponse({'error': DURATION_FORMAT_ERROR}, status=400)
+
+    if request.method == 'POST':
+        obj = model_class.objects.create(**data)
+        return JsonResponse({'data': model_to_dict(obj)}, status=201)
+    obj = model_class.objects.get(id=data['id'])
+    for key, value in data.items():
+        setattr(obj, key, value)
+    obj.save()
+    return JsonResponse({'data': model_to_dict(obj)}, status=200)
+
 # CRUD views for Table2 and Table3
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(Table2))
 def table2_crud(request):
     """JSON CRUD + pagination for Table2."""
+    if is_bulk_request(request):
+        return _handle_bulk_request(Table2, request)
     if request.method == 'GET':
         return _handle_simple_table_get(Table2, request)
-    elif request.method == 'POST':
-        # Create a new Table2 object
-        data = json.loads(request.body)
-        obj = Table2.objects.create(**data)
-        return JsonResponse({'data': model_to_dict(obj)}, status=201)
-    elif request.method == 'PUT':
-        # Update an existing Table2 object
-        data = json.loads(request.body)
-        obj = Table2.objects.get(id=data['id'])
-        for key, value in data.items():
-            setattr(obj, key, value)
-        obj.save()
-        return JsonResponse({'data': model_to_dict(obj)}, status=200)
-    elif request.method == 'DELETE':
-        # Delete a Table2 object
-        data = json.loads(request.body)
-        Table2.objects.filter(id=data['id']).delete()
-        return JsonResponse({'message': 'Deleted'}, status=204)
+    elif request.method in ('POST', 'PUT', 'DELETE'):
+        return _simple_table_write(Table2, request)
 
 @csrf_exempt
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(Table3))
 def table3_crud(request):
-    """JSON CRUD + pagination for Table3 (same pattern as Table2)."""
+    """JSON CRUD + pagination for Table3 (same pattern as Table2, durations as "DD HH:MM:SS")."""
+    if is_bulk_request(request):
+        return _handle_bulk_request(Table3, request)
     if request.method == 'GET':
         return _handle_simple_table_get(Table3, request)
-    elif request.method == 'POST':
-        # Create a new Table3 object
-        data = json.loads(request.body)
-        
-        # Convert duration string to timedelta if present
-        if 'duration_field' in data:
-            duration_str = data['duration_field']
-            print(duration_str)
-            # Parse duration string in format "DD HH:MM:SS" or "HH:MM:SS"
-            try:
-                if ' ' in duration_str:
-                    days_str, time_str = duration_str.split(' ')
-                    days = int(days_str)
-                else:
-                    time_str = duration_str
-                    days = 0
-                    
-                hours, minutes, seconds = map(int, time_str.split(':'))
-                data['duration_field'] = timedelta(
-                    days=days,
-                    hours=hours,
-                    minutes=minutes,
-                    seconds=seconds
-                )
-            except (ValueError, AttributeError) as e:
-                return JsonResponse({'error': 'Invalid duration format. Use "DD HH:MM:SS" or "HH:MM:SS"'}, status=400)
-                
-        obj = Table3.objects.create(**data)
-        return JsonResponse({'data': model_to_dict(obj)}, status=201)
-    elif request.method == 'PUT':
-        # Update an existing Table3 object
-        data = json.loads(request.body)
-        obj = Table3.objects.get(id=data['id'])
-        
-        # Convert duration string to timedelta if present
-        if 'duration_field' in data:
-            duration_str = data['duration_field']
-            try:
-                if ' ' in duration_str:
-                    days_str, time_str = duration_str.split(' ')
-                    days = int(days_str)
-                else:
-                    time_str = duration_str
-                    days = 0
-                    
-                hours, minutes, seconds = map(int, time_str.split(':'))
-                data['duration_field'] = timedelta(
-                    days=days,
-                    hours=hours,
-                    minutes=minutes,
-                    seconds=seconds
-                )
-            except (ValueError, AttributeError) as e:
-                return JsonResponse({'error': 'Invalid duration format. Use "DD HH:MM:SS" or "HH:MM:SS"'}, status=400)
-                
-        for key, value in data.items():
-            setattr(obj, key, value)
-        obj.save()
-        return JsonResponse({'data': model_to_dict(obj)}, status=200)
-    elif request.method == 'DELETE':
-        # Delete a Table3 object
-        data = json.loads(request.body)
-        Table3.objects.filter(id=data['id']).delete()
-        return JsonResponse({'message': 'Deleted'}, status=204)
+    elif request.method in ('POST', 'PUT', 'DELETE'):
+        return _simple_table_write(Table3, request)
 
 # Search view to render the search page
 @login_required
@@ -592,52 +619,190 @@ def search_view(request):
     """Render the search interface HTML (AJAX front-end consumes JSON endpoints)."""
     return render(request, 'json_app/search.html')
 
+# Server-side search: filters, sort and keyset pagination run in SQL
+@csrf_exempt
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=TABLE1_ETAG)
+def search_table1_data(request):
+    """Return one page of Table1 rows matching the query-string filters.
+
+    Filters are documented in filters.py (e.g. ?q=foo&integer_field__gte=5&
+    date_field__lte=2024-12-31&many_to_many=3,4). Sorting (?sort=-date_field)
+    and paging (?cursor=, ?page_size=) follow pagination.py, so payload and
+    latency depend on the page, not on the table size.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    raw_page_size = request.GET.get('page_size', 25)
+    try:
+        page_size = int(raw_page_size)
+    except (TypeError, ValueError):
+        page_size = 25
+    # Same 1..100 cap as the CRUD endpoints
+    page_size = min(max(page_size, 1), 100)
+
+    try:
+        fields, columnar = parse_table1_shape(request.GET)
+        queryset = project_table1(search_table1(request.GET), fields)
+        page_rows, pagination_payload = keyset_paginate(queryset, request.GET, page_size)
+    except (FilterError, InvalidCursor, FieldsError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        **shape_table1(serialize_table1(page_rows, fields, isoformat=True), fields, columnar),
+        'pagination': pagination_payload,
+    })
+
+
+# Rows fetched per database round-trip when streaming search results
+SEARCH_STREAM_CHUNK_SIZE = 2000
+
+
+def _stream_search_items(queryset, mode, fields=None):
+    """Yield search results chunk by chunk as NDJSON lines or a JSON array.
+
+    Only one chunk of rows is alive at a time, so memory stays flat and the
+    first bytes leave the server as soon as the first chunk is serialized.
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    count = 0
+    buffer = []
+    if mode == 'json':
+        yield '{"data":['
+    for item in iter_serialize_table1(queryset, SEARCH_STREAM_CHUNK_SIZE, fields, isoformat=True):
+        line = encoder.encode(item)
+        if mode == 'ndjson':
+            buffer.append(line + '\n')
+        else:
+            buffer.append(line if count == 0 else ',' + line)
+        count += 1
+        if len(buffer) >= SEARCH_STREAM_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+    if mode == 'json':
+        # count is only known at the end, so it trails the data array
+        yield f'],"count":{count},"message":"All data loaded successfully"}}'
+
+
 # Search view to return all Table1 data in JSON format
 @csrf_exempt
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=TABLE1_ETAG)
 def search_all_data(request):
     """Return full unpaginated Table1 dataset (for client-side filtering/search).
 
-    WARNING: For very large tables this may be expensive
+    WARNING: For very large tables this may be expensive; pass ?stream=ndjson
+    (one JSON object per line) or ?stream=json (same shape as the default
+    response, encoded incrementally) to stream rows in constant memory.
+    ?fields= trims every row; ?format=columnar (not streamable) sends columns.
     """
 
     if request.method == 'GET':
-        # Prefetch related objects to reduce database queries
-        queryset = Table1.objects.all().prefetch_related('many_to_many', 'foreign_key', 'one_to_one')
+        try:
+            fields, columnar = parse_table1_shape(request.GET)
+        except FieldsError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        # FK/O2O are joined; M2M rows are batched by the serializer
+        queryset = project_table1(table1_queryset(), fields)
+
+        stream_mode = request.GET.get('stream')
+        if stream_mode:
+            if stream_mode not in ('ndjson', 'json'):
+                return JsonResponse({'error': 'stream must be "ndjson" or "json"'}, status=400)
+            if columnar:
+                return JsonResponse({'error': 'format=columnar cannot be streamed'}, status=400)
+            content_type = 'application/x-ndjson' if stream_mode == 'ndjson' else 'application/json'
+            # Explicit ordering keeps chunk boundaries stable while iterating
+            return StreamingHttpResponse(
+                _stream_search_items(queryset.order_by('id'), stream_mode, fields),
+                content_type=content_type,
+            )
         
         # Serialize the queryset into a list of dictionaries
-        items = []
-        for obj in queryset:
-            item_dict = {
-                'id': obj.id,
-                'char_field': obj.char_field,
-                'text_field': obj.text_field,
-                'integer_field': obj.integer_field,
-                'float_field': obj.float_field,
-                'boolean_field': obj.boolean_field,
-                'date_field': obj.date_field.isoformat() if obj.date_field else None,
-                'time_field': obj.time_field.isoformat() if obj.time_field else None,
-                'datetime_field': obj.datetime_field.isoformat() if obj.datetime_field else None,
-                'image_field': obj.get_file_field_url('image_field'),
-                'file_field': obj.get_file_field_url('file_field'),
-                'foreign_key': {
-                    'id': obj.foreign_key.id, 
-                    'positive_small_int': obj.foreign_key.positive_small_int,
-                    'display': obj.foreign_key.get_positive_small_int_display()
-                } if obj.foreign_key else None,
-                'one_to_one': {
-                    'id': obj.one_to_one.id, 
-                    'positive_small_int': obj.one_to_one.positive_small_int,
-                    'display': obj.one_to_one.get_positive_small_int_display()
-                } if obj.one_to_one else None,
-                'many_to_many': list(obj.many_to_many.values('id', 'email_field', 'duration_field'))
-            }
-            items.append(item_dict)
+        items = serialize_table1(queryset, fields, isoformat=True)
             
         # Return the serialized data as a JSON response
         return JsonResponse({
-            'data': items, 
+            **shape_table1(items, fields, columnar),
             'count': len(items),
             'message': 'All data loaded successfully'
         })
-    return JsonResponse({'error': 'Method not allowed'}, status=405)
\ No newline at end of file
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
+# Resumable uploads for Table1 image_field / file_field (see uploads.py)
+def _upload_response(upload, status=200, **extra):
+    response = JsonResponse({
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'sha256': upload.sha256 or None,
+        **extra,
+    }, status=status)
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    return response
+
+@csrf_exempt
+@login_required
+def upload_create(request):
+    """Start an upload: {"filename", "size", "sha256"?} -> 201 with its id and offset 0."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+    try:
+        upload = create_upload(request.user, payload)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return _upload_response(upload, status=201)
+
+@csrf_exempt
+@login_required
+def upload_detail(request, upload_id):
+    """HEAD/GET: current offset. PATCH/PUT: append a chunk. DELETE: abort."""
+    upload = Upload.objects.filter(pk=upload_id, user=request.user).first()
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+
+    if request.method in ('GET', 'HEAD'):
+        return _upload_response(upload)
+
+    if request.method in ('PATCH', 'PUT'):
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset header is required'}, status=400)
+        length = request.META.get('CONTENT_LENGTH')
+        length = int(length) if length and length.isdigit() else None
+
+        error = None
+        try:
+            # request.read() streams the body; request.body is never loaded.
+            # No transaction: write_chunk serializes writers itself
+            write_chunk(upload, request, offset, length)
+        except UploadError as e:
+            error = e
+        except OSError:
+            # Client went away mid-chunk; the bytes already written are recorded
+            error = UploadError('Upload interrupted, resume from the returned offset')
+        if error is not None:
+            return _upload_response(upload, status=error.status, error=str(error))
+        return _upload_response(upload)
+
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return JsonResponse({'message': 'Deleted'}, status=204)
+
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
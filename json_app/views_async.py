@@ -0,0 +1,160 @@
+"""Async variants of the json_app CRUD and search endpoints.
+
+Mounted under /json_app/async/ with the same query parameters, payloads and
+responses as their counterparts in views.py. Served by an ASGI server
+(django_quickstart/asgi.py, e.g. `uvicorn django_quickstart.asgi:application`),
+a request only holds a thread while it talks to the database; reading the
+body, waiting on slow clients and streaming the response happen on the event
+loop, so one process can keep many connections open.
+
+Design notes:
+- There is one implementation of each endpoint: everything but streaming
+  runs the sync view or helper from views.py through sync_to_async, one hop
+  to the request's DB thread per call (the async ORM makes one per query)
+- search_all_json?stream= streams from aiterator(), so rows go out while
+  later chunks are read, where Django would buffer a sync iterator in full
+- condition() calls etag_func synchronously, so ETags go through _acondition
+  with rest.versioning.aversioned_etag instead
+"""
+
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+
+from rest.models import Table1, Table2, Table3
+from rest.versioning import aversioned_etag
+from . import views
+from .bulk import is_bulk_request
+from .serializers import (
+    table1_queryset, aserialize_table1, aiter_serialize_table1,
+    parse_table1_shape, project_table1, shape_table1, FieldsError,
+)
+
+
+def _acondition(etag_func):
+    """condition(etag_func=...) for async views with a coroutine etag_func."""
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+# Table1 (same contract as views.table1_crud)
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@_acondition(aversioned_etag(Table1, Table2, Table3))
+async def table1_crud(request):
+    """Async multi-method endpoint for Table1."""
+    if is_bulk_request(request):
+        return await sync_to_async(views._handle_bulk_request)(Table1, request)
+    if request.method == 'GET':
+        return await sync_to_async(views.table1_crud_get)(request)
+    if request.method == 'POST':
+        return await sync_to_async(views.table1_crud_post)(request)
+    if request.method == 'PUT':
+        return await sync_to_async(views.table1_crud_put)(request)
+    if request.method == 'DELETE':
+        return await sync_to_async(views.table1_crud_delete)(request)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
+# Table2 / Table3 (same contract as views.table2_crud / views.table3_crud)
+async def _simple_table_crud(model_class, request):
+    if is_bulk_request(request):
+        return await sync_to_async(views._handle_bulk_request)(model_class, request)
+    if request.method == 'GET':
+        return await sync_to_async(views._handle_simple_table_get)(model_class, request)
+    if request.method not in ('POST', 'PUT', 'DELETE'):
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    return await sync_to_async(views._simple_table_write)(model_class, request)
+
+
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@_acondition(aversioned_etag(Table2))
+async def table2_crud(request):
+    """Async JSON CRUD + pagination for Table2."""
+    return await _simple_table_crud(Table2, request)
+
+
+@csrf_exempt
+@cache_control(private=True, no_cache=True)
+@_acondition(aversioned_etag(Table3))
+async def table3_crud(request):
+    """Async JSON CRUD + pagination for Table3 (durations as "DD HH:MM:SS")."""
+    return await _simple_table_crud(Table3, request)
+
+
+# Search (same contract as views.search_all_data)
+async def _astream_search_items(queryset, mode, fields=None):
+    """Async generator twin of views._stream_search_items (aiterator chunks)."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    count = 0
+    buffer = []
+    if mode == 'json':
+        yield '{"data":['
+    async for item in aiter_serialize_table1(queryset, views.SEARCH_STREAM_CHUNK_SIZE, fields, isoformat=True):
+        line = encoder.encode(item)
+        if mode == 'ndjson':
+            buffer.append(line + '\n')
+        else:
+            buffer.append(line if count == 0 else ',' + line)
+        count += 1
+        if len(buffer) >= views.SEARCH_STREAM_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+    if mode == 'json':
+        yield f'],"count":{count},"message":"All data loaded successfully"}}'
+
+
+@csrf_exempt
+@login_required
+@cache_control(private=True, no_cache=True)
+@_acondition(aversioned_etag(Table1, Table2, Table3))
+async def search_all_data(request):
+    """Full Table1 dataset; ?stream=ndjson|json streams it from aiterator()."""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    try:
+        fields, columnar = parse_table1_shape(request.GET)
+    except FieldsError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    queryset = project_table1(table1_queryset(), fields)
+
+    stream_mode = request.GET.get('stream')
+    if stream_mode:
+        if stream_mode not in ('ndjson', 'json'):
+            return JsonResponse({'error': 'stream must be "ndjson" or "json"'}, status=400)
+        if columnar:
+            return JsonResponse({'error': 'format=columnar cannot be streamed'}, status=400)
+        content_type = 'application/x-ndjson' if stream_mode == 'ndjson' else 'application/json'
+        return StreamingHttpResponse(
+            _astream_search_items(queryset.order_by('id'), stream_mode, fields),
+            content_type=content_type,
+        )
+
+    items = await aserialize_table1(queryset, fields, isoformat=True)
+    return JsonResponse({
+        **shape_table1(items, fields, columnar),
+        'count': len(items),
+        'message': 'All data loaded successfully'
+    })
@@ -8,6 +8,7 @@
 from django.contrib.auth.models import User
 from django.db import transaction
 from rest.models import Table1, Table2, Table3
+from rest.deletion import delete_table1
 
 
 # ======================
@@ -115,16 +116,16 @@ class Table1Repository(BaseRepository):
         return instance
 
     @classmethod
-    @transaction.atomic
     def delete(cls, instance):
-        """Delete with cleanup for file fields."""
-        if getattr(instance, "image_field", None):
-            instance.image_field.delete(save=False)
-        if getattr(instance, "file_field", None):
-            instance.file_field.delete(save=False)
-        instance.delete()
+        """Delete; stored files are removed in the background after commit."""
+        delete_table1([instance.pk])
         return True
 
+    @classmethod
+    def delete_many(cls, ids):
+        """Set-based delete of several rows; returns how many were deleted."""
+        return delete_table1(ids)
+
 # ======================
 # Table2 Repository
 # ======================
@@ -0,0 +1,140 @@
+"""Buffered UserLog writer: auth events leave the request path.
+
+The auth signal receivers (rest.signals) used to call
+UserLog.objects.create() inside the login / logout / failed-login request,
+one SQLite write per event. During a login storm each of those writes
+waits for the database write lock. record_user_event() now appends the
+event to an in-memory buffer and returns. A background thread writes the
+buffer with one bulk_create:
+
+- when AUDIT_FLUSH_SIZE events are waiting, or
+- every AUDIT_FLUSH_INTERVAL seconds.
+
+A caller that finds AUDIT_MAX_BUFFER events already waiting (the database
+cannot keep up) flushes in its own thread instead, so memory stays bounded
+and no event is dropped. The buffer is drained at interpreter exit
+(atexit). A hard kill loses at most the events of the last interval.
+Events keep the time they happened: timestamp is set when the event is
+recorded, not when it is flushed.
+
+Settings:
+    AUDIT_LOG_SYNC = True   write each event immediately (tests, scripts
+                            that read the log right after acting)
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils.timezone import now
+
+from .models import UserLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_FLUSH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_MAX_BUFFER = 10000
+
+
+class AuditLogWriter:
+    """Collects UserLog rows and inserts them in batches from a background thread."""
+
+    def __init__(self, flush_size=AUDIT_FLUSH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL, max_buffer=AUDIT_MAX_BUFFER):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def record(self, **fields):
+        entry = UserLog(timestamp=now(), **fields)
+        if getattr(settings, 'AUDIT_LOG_SYNC', False):
+            entry.save()
+            return
+        with self._lock:
+            self._buffer.append(entry)
+            waiting = len(self._buffer)
+            self._ensure_thread()
+        if waiting >= self.max_buffer:
+            self.flush()
+        elif waiting >= self.flush_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of events written."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._write(batch)
+        return len(batch)
+
+    def _write(self, batch):
+        try:
+            UserLog.objects.bulk_create(batch, batch_size=self.flush_size)
+            return
+        except DatabaseError:
+            logger.warning("Bulk UserLog insert failed, writing %d events one by one", len(batch), exc_info=True)
+        for entry in batch:
+            entry.pk = None
+            try:
+                with transaction.atomic():
+                    entry.save()
+            except IntegrityError:
+                # The user was deleted before the flush: keep the event without the link
+                entry.user = None
+                try:
+                    entry.save()
+                except DatabaseError:
+                    logger.exception("Dropped UserLog event %s for %s", entry.event_type, entry.username)
+            except DatabaseError:
+                logger.exception("Dropped UserLog event %s for %s", entry.event_type, entry.username)
+
+    def _ensure_thread(self):
+        # Called with the lock held. A forked worker does not inherit the
+        # parent's thread, so it starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                if self.flush():
+                    # Do not keep a connection open between flushes
+                    connection.close()
+            except Exception:
+                logger.exception("UserLog flush failed")
+
+    def stop(self, timeout=5.0):
+        """Stop the background thread and write what is left (runs at exit)."""
+        thread = self._thread
+        self._stopping = True
+        self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+
+audit_log = AuditLogWriter()
+
+
+def record_user_event(event_type, username, user=None, ip_address=None, details=''):
+    """Queue one UserLog event (written immediately when AUDIT_LOG_SYNC is set)."""
+    audit_log.record(
+        user=user, username=username, event_type=event_type, ip_address=ip_address, details=details,
+    )
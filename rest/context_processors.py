@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .permission_cache import NO_ROLE, get_permission_profile
+
+
+def user_role_context(request):
+    """Inject 'user_role' (Administrator / Customer / No role assigned) from the permission cache."""
+    def role():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return NO_ROLE
+        return get_permission_profile(user)['role']
+    return {'user_role': SimpleLazyObject(role)}
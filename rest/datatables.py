@@ -0,0 +1,227 @@
+"""Server-side processing for the rest CRUD tables (DataTables protocol).
+
+The get_data / update_data pages used to render every row of Table1, Table2
+and Table3 into the HTML. They now render empty tables that fetch one page at
+a time from /datatables/<table> (static/scripts/server_table.js). The request
+and response follow the DataTables server-side protocol, so the DataTables
+library itself can also point at the endpoint (serverSide: true):
+
+    draw                          echoed back so the client drops stale replies
+    start, length                 offset and page size (length capped at DATATABLES_MAX_LENGTH)
+    search[value]                 one term matched against the table's searchable columns
+    order[i][column], order[i][dir]   index into columns[i][data], 'asc' | 'desc'
+    columns[i][data]              column names (see the columns of each table below)
+
+    -> {"draw", "recordsTotal", "recordsFiltered", "data": [{column: display value,
+        "DT_RowId", "DT_RowData": raw values for edit forms}, ...]}
+
+Display values are formatted the way the templates printed them (localized
+dates, "Table2 ID: n" for relations). Each page costs a count when searching,
+one query for the rows and, for Table1, one prefetch for the links. The
+Table1 total comes from the Table1Stats row.
+"""
+
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.utils import timezone
+from django.utils.formats import localize
+
+from .models import Table1, Table2, Table3
+from .stats import get_table1_stats
+
+DATATABLES_DEFAULT_LENGTH = 10
+DATATABLES_MAX_LENGTH = 100
+
+
+class DataTablesError(ValueError):
+    """Raised for a request the endpoint cannot answer."""
+
+
+def _display(value):
+    # Same text as {{ value }} in a template
+    return str(localize(timezone.template_localtime(value)))
+
+
+def _as_int(term):
+    try:
+        return int(term)
+    except ValueError:
+        return None
+
+
+# Table1
+def _table1_queryset():
+    return Table1.objects.select_related('foreign_key', 'one_to_one').prefetch_related(
+        Prefetch('many_to_many', queryset=Table3.objects.only('id', 'email_field').order_by('id'))
+    )
+
+
+def _table1_search(term):
+    links = Table1.many_to_many.through.objects.filter(table1_id=OuterRef('pk'), table3__email_field__icontains=term)
+    condition = Q(char_field__icontains=term) | Q(text_field__icontains=term) | Exists(links)
+    number = _as_int(term)
+    if number is not None:
+        condition |= Q(pk=number) | Q(integer_field=number)
+    return condition
+
+
+def _table1_row(entry):
+    links = list(entry.many_to_many.all())
+    datetime_value = timezone.localtime(entry.datetime_field) if entry.datetime_field else None
+    return {
+        'id': entry.id,
+        'foreign_key': _display(entry.foreign_key),
+        'one_to_one': _display(entry.one_to_one),
+        'many_to_many': ', '.join(link.email_field for link in links) or '-',
+        'integer_field': _display(entry.integer_field),
+        'float_field': _display(entry.float_field),
+        'char_field': entry.char_field,
+        'text_field': entry.text_field or '-',
+        'boolean_field': _display(entry.boolean_field),
+        'date_field': _display(entry.date_field),
+        'time_field': _display(entry.time_field),
+        'datetime_field': _display(entry.datetime_field),
+        'image_field': entry.image_field.url if entry.image_field else None,
+        'file_field': entry.file_field.url if entry.file_field else None,
+        'DT_RowData': {
+            'foreign_key': entry.foreign_key_id,
+            'one_to_one': entry.one_to_one_id,
+            'many_to_many': [link.id for link in links],
+            'integer_field': entry.integer_field,
+            'float_field': entry.float_field,
+            'char_field': entry.char_field,
+            'text_field': entry.text_field,
+            'boolean_field': entry.boolean_field,
+            'date_field': entry.date_field.strftime('%Y-%m-%d') if entry.date_field else '',
+            'time_field': entry.time_field.strftime('%H:%M') if entry.time_field else '',
+            'datetime_field': datetime_value.strftime('%Y-%m-%dT%H:%M') if datetime_value else '',
+            'image_url': entry.image_field.url if entry.image_field else '',
+            'file_url': entry.file_field.url if entry.file_field else '',
+        },
+    }
+
+
+# Table2
+def _table2_search(term):
+    choices = Table2._meta.get_field('positive_small_int').choices
+    matching = [value for value, label in choices if term.lower() in str(label).lower()]
+    condition = Q(positive_small_int__in=matching)
+    number = _as_int(term)
+    if number is not None:
+        condition |= Q(pk=number) | Q(positive_small_int=number)
+    return condition
+
+
+def _table2_row(entry):
+    return {
+        'id': entry.id,
+        'positive_small_int': entry.positive_small_int,
+        'option': entry.get_positive_small_int_display(),
+        'DT_RowData': {'positive_small_int': entry.positive_small_int},
+    }
+
+
+# Table3
+def _table3_search(term):
+    condition = Q(email_field__icontains=term)
+    number = _as_int(term)
+    if number is not None:
+        condition |= Q(pk=number)
+    return condition
+
+
+def _table3_row(entry):
+    return {
+        'id': entry.id,
+        'duration_field': _display(entry.duration_field),
+        'email_field': entry.email_field,
+        'DT_RowData': {'duration_field': str(entry.duration_field), 'email_field': entry.email_field},
+    }
+
+
+# columns: {column name: field to order by (None = not orderable)}
+DATATABLES = {
+    'table1': {
+        'queryset': _table1_queryset,
+        'total': lambda: get_table1_stats().row_count,
+        'search': _table1_search,
+        'row': _table1_row,
+        'columns': {
+            'id': 'id', 'foreign_key': 'foreign_key_id', 'one_to_one': 'one_to_one_id', 'many_to_many': None,
+            'integer_field': 'integer_field', 'float_field': 'float_field', 'char_field': 'char_field',
+            'text_field': 'text_field', 'boolean_field': 'boolean_field', 'date_field': 'date_field',
+            'time_field': 'time_field', 'datetime_field': 'datetime_field',
+            'image_field': 'image_field', 'file_field': 'file_field',
+        },
+    },
+    'table2': {
+        'queryset': Table2.objects.all,
+        'total': Table2.objects.count,
+        'search': _table2_search,
+        'row': _table2_row,
+        'columns': {'id': 'id', 'positive_small_int': 'positive_small_int', 'option': 'positive_small_int'},
+    },
+    'table3': {
+        'queryset': Table3.objects.all,
+        'total': Table3.objects.count,
+        'search': _table3_search,
+        'row': _table3_row,
+        'columns': {'id': 'id', 'duration_field': 'duration_field', 'email_field': 'email_field'},
+    },
+}
+
+
+def _int_param(params, name, default):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise DataTablesError(f"{name} must be an integer")
+
+
+def _ordering(params, columns):
+    """order[i][column] / order[i][dir] pairs mapped to ORM order_by() terms."""
+    ordering = []
+    index = 0
+    while f'order[{index}][column]' in params:
+        position = _int_param(params, f'order[{index}][column]', 0)
+        name = params.get(f'columns[{position}][data]')
+        if name not in columns:
+            raise DataTablesError(f"order[{index}]: unknown column {position}")
+        field = columns[name]
+        if field is not None:
+            direction = params.get(f'order[{index}][dir]', 'asc')
+            ordering.append(f'-{field}' if direction == 'desc' else field)
+        index += 1
+    # id last so pages are stable when the sort column has duplicates
+    return ordering + ['id']
+
+
+def table_page(table, params):
+    """Answer one DataTables server-side request for table."""
+    spec = DATATABLES.get(table)
+    if spec is None:
+        raise DataTablesError(f"Unknown table '{table}'")
+    draw = _int_param(params, 'draw', 0)
+    start = max(_int_param(params, 'start', 0), 0)
+    length = _int_param(params, 'length', DATATABLES_DEFAULT_LENGTH)
+    # DataTables sends -1 for "all"; never more than one capped page here
+    if length < 1 or length > DATATABLES_MAX_LENGTH:
+        length = DATATABLES_MAX_LENGTH
+
+    queryset = spec['queryset']()
+    total = spec['total']()
+    filtered = total
+    term = params.get('search[value]', '').strip()
+    if term:
+        queryset = queryset.filter(spec['search'](term))
+        filtered = queryset.count()
+
+    rows = queryset.order_by(*_ordering(params, spec['columns']))[start:start + length]
+    data = []
+    for entry in rows:
+        row = spec['row'](entry)
+        row['DT_RowId'] = f'{table}-{entry.id}'
+        data.append(row)
+    return {'draw': draw, 'recordsTotal': total, 'recordsFiltered': filtered, 'data': data}
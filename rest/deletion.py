@@ -0,0 +1,95 @@
+"""Set-based Table1 deletes with file cleanup after commit.
+
+delete_data_2 and Table1Repository.delete removed image_field / file_field
+from disk one row at a time, inside the transaction. On SQLite the write
+lock is held from the first DELETE until COMMIT, so the lock was held for
+the whole filesystem walk.
+
+delete_table1() runs inside one transaction:
+
+- it reads the stored file names of the doomed rows (one SELECT per chunk)
+- it deletes the rows with queryset.delete(): one DELETE ... WHERE id IN
+  per chunk, plus one for the link rows
+- it folds the version bumps and Table1Stats changes into one write each
+- the file names go to schedule_file_cleanup(), which runs
+  transaction.on_commit()
+
+After the commit, a background thread (FILE_CLEANUP_WORKERS) deletes the
+files from storage. So how long the lock is held no longer depends on file
+I/O, and a rollback leaves every file in place. A file that cannot be
+removed is left behind, never retried. Nothing references it any more.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+from django.db.models import FileField
+
+from .models import Table1
+from .stats import batch_table1_stats, deleted_links, record_table1_change
+from .versioning import bump_version, coalesce_version_bumps
+
+logger = logging.getLogger(__name__)
+
+# Rows per DELETE ... WHERE id IN (...); keeps SQLite under its variable limit.
+# The one bound for every batched IN (...) / INSERT / UPDATE: the bulk endpoints,
+# the serializer, log retention and imports all import it from here
+DELETE_BATCH_SIZE = 500
+FILE_CLEANUP_WORKERS = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _cleanup_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FILE_CLEANUP_WORKERS, thread_name_prefix='file-cleanup')
+        return _executor
+
+
+def stored_files(queryset):
+    """[(storage, name)] of every file referenced by the queryset's rows (one query)."""
+    fields = [f for f in queryset.model._meta.concrete_fields if isinstance(f, FileField)]
+    if not fields:
+        return []
+    files = []
+    for names in queryset.values_list(*(f.name for f in fields)):
+        files += [(field.storage, name) for field, name in zip(fields, names) if name]
+    return files
+
+
+def _delete_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception("Could not delete stored file %s", name)
+
+
+def schedule_file_cleanup(files):
+    """Delete files from storage on a background thread once the transaction commits."""
+    files = list(files)
+    if files:
+        transaction.on_commit(lambda: _cleanup_executor().submit(_delete_files, files))
+
+
+def delete_table1(ids):
+    """Delete the Table1 rows with these ids; return how many were deleted."""
+    ids = list(dict.fromkeys(ids))
+    deleted = 0
+    with transaction.atomic(), coalesce_version_bumps(), batch_table1_stats():
+        files = []
+        for start in range(0, len(ids), DELETE_BATCH_SIZE):
+            chunk = Table1.objects.filter(pk__in=ids[start:start + DELETE_BATCH_SIZE])
+            files += stored_files(chunk)
+            counts = chunk.delete()[1]
+            deleted += counts.get(Table1._meta.label, 0)
+            record_table1_change(links=-deleted_links(counts))
+        if deleted:
+            bump_version(Table1)
+        schedule_file_cleanup(files)
+    return deleted
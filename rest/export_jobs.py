@@ -0,0 +1,179 @@
+"""Background PDF/XLSX exports with progress polling and cached artifacts.
+
+export_pdf / export_excel build the whole file inside the request, which for a
+big table outlives proxy timeouts and pins a server worker. The
+export_to_file page uses jobs instead:
+
+    POST /export_jobs                  format=pdf|xlsx [+ Table1 filters]  -> job
+    GET  /export_jobs/<id>             -> status, rows_done / rows_total, progress
+    GET  /export_jobs/<id>/download    -> the file once status is 'done'
+
+Filters use the json_app.filters syntax (e.g. integer_field__gte=5, q=term).
+Jobs run on a small thread pool in the web process (EXPORT_JOB_WORKERS); the
+PDF writer fans out to its own process pool from there. All state lives in
+the ExportJob row, so any server process can answer status polls.
+
+Artifacts are written to MEDIA_ROOT/exports/<cache_key>.<format>. The key
+hashes the format, the filters and the current Table1/Table2/Table3 version
+token (rest.versioning), so a repeat export of unchanged data finds its file
+and the job is created already done. Any write changes the token and the next
+export renders a fresh file. purge_exports deletes artifacts that are no
+longer current.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils.timezone import now
+
+from json_app.filters import filter_table1
+from .exports import write_table1_pdf, write_table1_xlsx
+from .models import ExportJob, Table1, Table2, Table3
+from .versioning import version_token
+
+EXPORT_WRITERS = {
+    'pdf': write_table1_pdf,
+    'xlsx': write_table1_xlsx,
+}
+# Exports rendered at the same time per server process
+EXPORT_JOB_WORKERS = 2
+# A running job that has not reported progress for this long is presumed lost
+# (e.g. the server restarted) and is no longer joined by new requests
+EXPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+# Queued or running jobs one user may have at a time; more get a 429
+EXPORT_JOBS_PER_USER = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ExportJobError(ValueError):
+    """Raised for an export request that cannot be queued; carries the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _job_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix='export-job')
+        return _executor
+
+
+def export_cache_key(export_format, params):
+    """Artifact key for an export of the current data with these filters."""
+    token = version_token(Table1, Table2, Table3)
+    payload = json.dumps([export_format, token, sorted(params.items())])
+    return hashlib.sha256(payload.encode()).hexdigest()[:40]
+
+
+def export_queryset(params):
+    return filter_table1(Table1.objects.all(), params)
+
+
+def start_export(user, export_format, params):
+    """Return the job serving this export request.
+
+    Done straight away when the artifact for the current data already exists,
+    the user's active job for the same key if there is one, otherwise a new
+    job queued on the worker pool (at most EXPORT_JOBS_PER_USER active per
+    user). Invalid filters raise FilterError here, before anything is queued.
+    """
+    if export_format not in EXPORT_WRITERS:
+        raise ExportJobError(f"format must be one of: {', '.join(EXPORT_WRITERS)}")
+    params = {str(name): str(value) for name, value in params.items()}
+    export_queryset(params)
+
+    job = ExportJob(user=user, format=export_format, params=params,
+                    cache_key=export_cache_key(export_format, params))
+    if os.path.exists(job.path):
+        job.status = 'done'
+        job.finished_at = now()
+        job.save()
+        return job
+
+    active = ExportJob.objects.filter(
+        user=user, status__in=('queued', 'running'), updated_at__gte=now() - EXPORT_JOB_STALE_AFTER,
+    )
+    same = active.filter(format=export_format, cache_key=job.cache_key).first()
+    if same is not None:
+        return same
+    # Each job renders the whole (filtered) table on a shared pool and writes a file
+    if active.count() >= EXPORT_JOBS_PER_USER:
+        raise ExportJobError(
+            f"You already have {EXPORT_JOBS_PER_USER} exports in progress; wait for one to finish", status=429,
+        )
+
+    job.save()
+    job_id = job.pk
+    transaction.on_commit(lambda: _job_executor().submit(run_export_job, job_id))
+    return job
+
+
+def run_export_job(job_id):
+    """Render one job's artifact (runs on a worker thread)."""
+    try:
+        job = ExportJob.objects.get(pk=job_id)
+        if not os.path.exists(job.path):
+            _render(job)
+        job.status = 'done'
+        job.finished_at = now()
+        job.save(update_fields=['status', 'rows_done', 'rows_total', 'finished_at', 'updated_at'])
+    except Exception as e:
+        ExportJob.objects.filter(pk=job_id).update(
+            status='failed', error=f"{type(e).__name__}: {e}", finished_at=now(), updated_at=now(),
+        )
+    finally:
+        # Pool threads outlive the job; do not keep their DB connection open
+        connection.close()
+
+
+def _render(job):
+    queryset = export_queryset(job.params)
+    job.status = 'running'
+    job.rows_total = queryset.count()
+    job.save(update_fields=['status', 'rows_total', 'updated_at'])
+
+    def progress(count):
+        job.rows_done = count
+        ExportJob.objects.filter(pk=job.pk).update(rows_done=count, updated_at=now())
+
+    # Render next to the final path and rename, so a half-written file is
+    # never picked up as a cached artifact
+    directory = os.path.dirname(job.path)
+    os.makedirs(directory, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            EXPORT_WRITERS[job.format](target, queryset, progress)
+        os.replace(partial, job.path)
+    except BaseException:
+        os.remove(partial)
+        raise
+
+
+def export_job_payload(job):
+    payload = {
+        'id': str(job.id),
+        'format': job.format,
+        'status': job.status,
+        'rows_done': job.rows_done,
+        'rows_total': job.rows_total,
+        'progress': job.progress,
+        'status_url': reverse('export_job_status', args=[job.id]),
+        'download_url': None,
+        'error': job.error or None,
+    }
+    if job.status == 'done':
+        payload['download_url'] = reverse('export_job_download', args=[job.id])
+    return payload
@@ -0,0 +1,238 @@
+"""Table1 file exports that keep memory flat whatever the row count.
+
+Rows are read with values_list() + iterator(chunk_size), so the database
+cursor hands over EXPORT_CHUNK_SIZE tuples at a time and no model instances
+are built. The XLSX is produced by an openpyxl write-only workbook (rows are
+serialized to disk as they are appended) into a temporary file, which is then
+streamed back with FileResponse.
+
+CSV and NDJSON are plain row streams: a generator turns the same value tuples
+into text and StreamingHttpResponse sends it as it is produced, so the first
+bytes leave before the query is exhausted and nothing is spooled.
+
+The PDF is CPU-bound (reportlab), so the row stream is cut into partitions of
+PDF_PAGES_PER_PARTITION whole pages that a process pool renders in parallel
+(rest/pdf_render.py); the partial PDFs are concatenated in order with pypdf
+(which holds the merged page tree until it is written out).
+"""
+
+import csv
+import datetime
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.timezone import is_aware
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from pypdf import PdfWriter
+
+from .models import Table1
+from .pdf_render import PDF_FIELDS, PDF_FIRST_PAGE_ROWS, PDF_PAGE_ROWS, render_pdf_partition
+
+# Rows fetched per database round-trip
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# (header, field, column width)
+EXCEL_COLUMNS = [
+    ("ID", 'id', 5),
+    ("Integer", 'integer_field', 10),
+    ("Float", 'float_field', 10),
+    ("Char", 'char_field', 15),
+    ("Text", 'text_field', 25),
+    ("Boolean", 'boolean_field', 20),
+    ("Date", 'date_field', 15),
+    ("Time", 'time_field', 12),
+    ("Datetime", 'datetime_field', 22),
+]
+
+
+def table1_rows(fields, queryset=None, progress=None):
+    """Iterate value tuples for fields in id order, one chunk in memory at a time.
+
+    progress, if given, is called with the number of rows read so far after
+    every chunk and once at the end.
+    """
+    queryset = Table1.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return rows if progress is None else _reporting(rows, progress)
+
+
+def _reporting(rows, progress):
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            progress(count)
+    progress(count)
+
+
+def _excel_value(value):
+    # Excel cannot store timezone-aware datetimes/times
+    if isinstance(value, (datetime.datetime, datetime.time)) and is_aware(value):
+        return value.replace(tzinfo=None)
+    return value
+
+
+def write_table1_xlsx(target, queryset=None, progress=None):
+    """Write Table1 as an XLSX workbook to target (a path or binary file)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Table1")
+    # Write-only sheets accept column widths only before the first row
+    for index, (_, _, width) in enumerate(EXCEL_COLUMNS, start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    ws.append([header for header, _, _ in EXCEL_COLUMNS])
+    for row in table1_rows([field for _, field, _ in EXCEL_COLUMNS], queryset, progress):
+        ws.append([_excel_value(value) for value in row])
+    wb.save(target)
+
+
+def excel_response(queryset=None, filename='table1.xlsx'):
+    """Build the workbook in a temp file and stream it back in file-sized chunks."""
+    spool = tempfile.TemporaryFile()
+    try:
+        write_table1_xlsx(spool, queryset)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    # FileResponse closes (and so deletes) the temp file once it is sent
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+# Columns of the CSV / NDJSON row exports (relations as ids, files as stored names)
+ROW_EXPORT_FIELDS = [
+    'id', 'char_field', 'text_field', 'integer_field', 'float_field', 'boolean_field',
+    'date_field', 'time_field', 'datetime_field', 'foreign_key', 'one_to_one',
+    'image_field', 'file_field',
+]
+ROW_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _joined(lines):
+    # One string per EXPORT_CHUNK_SIZE lines: a few large writes, not one per row
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+class _Echo:
+    """Write target for csv.writer that hands each formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_table1_csv(queryset=None):
+    """Yield Table1 as CSV text, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(ROW_EXPORT_FIELDS)
+    yield from _joined(writer.writerow(row) for row in table1_rows(ROW_EXPORT_FIELDS, queryset))
+
+
+def iter_table1_ndjson(queryset=None):
+    """Yield Table1 as one JSON object per line."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    yield from _joined(
+        encoder.encode(dict(zip(ROW_EXPORT_FIELDS, row))) + '\n'
+        for row in table1_rows(ROW_EXPORT_FIELDS, queryset)
+    )
+
+
+def rows_response(export_format, queryset=None):
+    """StreamingHttpResponse of Table1 rows as 'csv' or 'ndjson'."""
+    rows = iter_table1_csv(queryset) if export_format == 'csv' else iter_table1_ndjson(queryset)
+    response = StreamingHttpResponse(rows, content_type=ROW_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="table1.{export_format}"'
+    return response
+
+
+# Pages rendered per worker task; big enough to amortize process hand-off
+PDF_PAGES_PER_PARTITION = 20
+PDF_EXPORT_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pdf_pool():
+    """Process pool shared by all PDF exports, started on first use.
+
+    'spawn' workers import only rest.pdf_render (no Django setup, no
+    inherited DB connections or server threads).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_EXPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _pdf_partitions(rows):
+    """Yield (rows, with_title) chunks made of whole pages, first page first."""
+    rows = iter(rows)
+    size = PDF_FIRST_PAGE_ROWS + (PDF_PAGES_PER_PARTITION - 1) * PDF_PAGE_ROWS
+    with_title = True
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk and not with_title:
+            return
+        yield chunk, with_title
+        if len(chunk) < size:
+            return
+        size = PDF_PAGES_PER_PARTITION * PDF_PAGE_ROWS
+        with_title = False
+
+
+def write_table1_pdf(target, queryset=None, progress=None):
+    """Render Table1 to target (binary file) with partitions in parallel."""
+    partitions = _pdf_partitions(table1_rows(PDF_FIELDS, queryset, progress))
+    writer = PdfWriter()
+    if PDF_EXPORT_WORKERS == 1:
+        for chunk, with_title in partitions:
+            writer.append(io.BytesIO(render_pdf_partition(chunk, with_title)))
+    else:
+        pool = _pdf_pool()
+        # A bounded window of in-flight partitions keeps memory flat while
+        # results are appended in submission (= row) order
+        pending = deque()
+        for chunk, with_title in partitions:
+            pending.append(pool.submit(render_pdf_partition, chunk, with_title))
+            if len(pending) >= PDF_EXPORT_WORKERS * 2:
+                writer.append(io.BytesIO(pending.popleft().result()))
+        while pending:
+            writer.append(io.BytesIO(pending.popleft().result()))
+    writer.write(target)
+
+
+def pdf_response(queryset=None, filename='table1.pdf'):
+    spool = tempfile.TemporaryFile()
+    try:
+        write_table1_pdf(spool, queryset)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type='application/pdf')
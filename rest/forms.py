@@ -21,4 +21,19 @@ class Table1Form(forms.ModelForm):
             'date_field': forms.DateInput(attrs={'type': 'date'}),
             'time_field': forms.TimeInput(attrs={'type': 'time'}),
             'datetime_field': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
-        }
\ No newline at end of file
+        }
+
+class UserLogFilterForm(forms.Form):
+    # Exact matches only: each one is the leading column of a UserLog index
+    username = forms.CharField(max_length=150, required=False)
+    ip_address = forms.GenericIPAddressField(required=False, label='IP address')
+    event_type = forms.ChoiceField(choices=[('', 'All events')] + models.UserLog.EVENT_CHOICES, required=False)
+    since = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    until = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError("'Since' must not be after 'Until'.")
+        return cleaned_data
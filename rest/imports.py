@@ -0,0 +1,333 @@
+"""Streaming Table1 imports from CSV, JSONL or XLSX (manage.py import_table1).
+
+Input is read one record at a time: csv.reader, one json.loads per
+line, or an openpyxl read-only workbook, which parses the sheet XML as it
+goes. Only the current batch is held in memory, plus the keys memoized
+for the relation checks below (all from this file). Each batch of
+IMPORT_BATCH_SIZE records is:
+
+1. built into unsaved Table1 instances and cleaned with clean_fields()
+   (type conversion and field validators, no queries)
+2. checked against the relation lookups: foreign_key / one_to_one Table2
+   ids, and many_to_many references given as Table3 emails or ids. Unknown
+   keys are looked up in one query per batch and memoized, so a key is
+   fetched at most once per import. one_to_one values already taken are
+   rejected: in the table (one query per batch for the batch's values) or
+   earlier in the file.
+3. written in one transaction: bulk_create for the rows, bulk_create for the
+   through-table links, one version bump and one Table1Stats update.
+
+Invalid records are skipped and reported with their line / row number. The
+columns are the Table1 field names, as written by the CSV / NDJSON exports;
+'id' is ignored and rows always get new ids. The headers of the XLSX export
+(EXCEL_COLUMNS) are accepted too, so exported files can be imported back.
+many_to_many holds Table3 emails or ids: a JSON list, or a string split on
+';', ',' or whitespace. File columns keep the stored names as given.
+"""
+
+import csv
+import json
+import os
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .deletion import DELETE_BATCH_SIZE
+from .exports import EXCEL_COLUMNS
+from .models import Table1, Table2, Table3
+from .stats import record_table1_change, stats_values
+from .versioning import bump_version, coalesce_version_bumps
+
+IMPORT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.xlsx': 'xlsx'}
+IMPORT_BATCH_SIZE = 2000
+# Rows per INSERT statement and ids per IN (...): the SQLite bound shared with deletion.py
+# (Django lowers it further for wide rows)
+INSERT_BATCH_SIZE = DELETE_BATCH_SIZE
+# Invalid records kept with their messages; the rest are only counted
+REPORTED_ERRORS = 50
+
+_FIELDS = {f.name: f for f in Table1._meta.concrete_fields if not f.primary_key}
+_RELATIONS = ('foreign_key', 'one_to_one')
+_M2M = 'many_to_many'
+_COLUMNS = set(_FIELDS) | {_M2M}
+_HEADER_ALIASES = {header.lower(): field for header, field, _ in EXCEL_COLUMNS}
+_IGNORED = {'id'}
+_SPLIT_REFERENCES = re.compile(r'[;,\s]+')
+
+
+class Table1ImportError(ValueError):
+    """Raised for input the importer cannot read at all (bad format or header)."""
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise Table1ImportError(f"Cannot tell the format of '{path}'; pass one of: csv, jsonl, xlsx")
+    return IMPORT_FORMATS[extension]
+
+
+def _column(header):
+    """Table1 column for a header cell, None for ignored ones."""
+    name = str(header or '').strip()
+    name = _HEADER_ALIASES.get(name.lower(), name)
+    if name in _IGNORED or not name:
+        return None
+    if name not in _COLUMNS:
+        raise Table1ImportError(f"Unknown column '{header}'. Columns: {', '.join(sorted(_COLUMNS))}")
+    return name
+
+
+def _read_csv(path, sheet=None):
+    with open(path, newline='', encoding='utf-8-sig') as source:
+        reader = csv.reader(source)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_column(name) for name in header]
+        for row in reader:
+            # Line numbers count the header as line 1
+            yield reader.line_num, {column: value for column, value in zip(columns, row) if column}
+
+
+def _read_jsonl(path, sheet=None):
+    with open(path, encoding='utf-8-sig') as source:
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, ValueError(f'Invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict):
+                yield number, ValueError('Expected a JSON object')
+                continue
+            try:
+                columns = {key: _column(key) for key in record}
+            except Table1ImportError as e:
+                yield number, ValueError(str(e))
+                continue
+            yield number, {columns[key]: value for key, value in record.items() if columns[key]}
+
+
+def _read_xlsx(path, sheet=None):
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_column(name) if name is not None else None for name in header]
+        for number, row in enumerate(rows, start=2):
+            if all(value is None for value in row):
+                continue
+            yield number, {column: value for column, value in zip(columns, row) if column}
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+
+READERS = {'csv': _read_csv, 'jsonl': _read_jsonl, 'xlsx': _read_xlsx}
+
+
+def read_records(path, import_format=None, sheet=None):
+    """Yield (line or row number, {column: value}) pairs; unreadable records come as exceptions."""
+    import_format = import_format or detect_format(path)
+    if import_format not in READERS:
+        raise Table1ImportError(f"format must be one of: {', '.join(READERS)}")
+    if sheet and import_format != 'xlsx':
+        raise Table1ImportError('--sheet only applies to xlsx input')
+    return READERS[import_format](path, sheet)
+
+
+class _Lookups:
+    """Memoized Table2 ids and Table3 emails/ids, filled one query per batch."""
+
+    def __init__(self):
+        self.table2 = {}        # id -> exists
+        self.table3_ids = {}    # id -> exists
+        self.emails = {}        # email -> Table3 id or None
+        self.one_to_one_seen = set()    # one_to_one ids claimed earlier in this file
+
+    @staticmethod
+    def _fill(cache, wanted, queryset, key):
+        missing = [value for value in wanted if value not in cache]
+        for start in range(0, len(missing), INSERT_BATCH_SIZE):
+            chunk = missing[start:start + INSERT_BATCH_SIZE]
+            found = dict(queryset.filter(**{f'{key}__in': chunk}).values_list(key, 'pk'))
+            for value in chunk:
+                cache[value] = found.get(value)
+
+    def load(self, table2_ids, table3_ids, emails):
+        self._fill(self.table2, table2_ids, Table2.objects.all(), 'pk')
+        self._fill(self.table3_ids, table3_ids, Table3.objects.all(), 'pk')
+        self._fill(self.emails, emails, Table3.objects.all(), 'email_field')
+
+    @staticmethod
+    def one_to_one_taken(ids):
+        """The given Table2 ids already linked one-to-one by a stored Table1."""
+        ids = list(ids)
+        taken = set()
+        for start in range(0, len(ids), INSERT_BATCH_SIZE):
+            chunk = ids[start:start + INSERT_BATCH_SIZE]
+            taken.update(Table1.objects.filter(one_to_one_id__in=chunk).values_list('one_to_one_id', flat=True))
+        return taken
+
+
+class _Record:
+    def __init__(self, number):
+        self.number = number
+        self.instance = Table1()
+        self.references = []    # Table3 ids (int) or emails (str)
+        self.links = []
+        self.errors = {}
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _references(value):
+    if _blank(value):
+        return []
+    items = value if isinstance(value, list) else _SPLIT_REFERENCES.split(str(value).strip())
+    references = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('id', item.get('email_field'))
+        if isinstance(item, int) or (isinstance(item, str) and item.isdigit()):
+            references.append(int(item))
+        elif isinstance(item, str) and item:
+            references.append(item.strip())
+    return list(dict.fromkeys(references))
+
+
+def _build(number, values):
+    """Unsaved Table1 for one input record; problems go to record.errors."""
+    record = _Record(number)
+    if isinstance(values, Exception):
+        record.errors['__all__'] = [str(values)]
+        return record
+    instance = record.instance
+    for column, value in values.items():
+        if column == _M2M:
+            record.references = _references(value)
+            continue
+        field = _FIELDS[column]
+        if column in _RELATIONS:
+            try:
+                setattr(instance, field.attname, None if _blank(value) else int(value))
+            except (TypeError, ValueError):
+                record.errors[column] = ['Expected a Table2 id']
+            continue
+        if _blank(value):
+            value = None if field.null else field.get_default()
+        setattr(instance, column, value)
+
+    # Relations are checked per batch against the lookups, not per row
+    try:
+        instance.clean_fields(exclude=_RELATIONS)
+    except ValidationError as e:
+        for name, messages in e.message_dict.items():
+            record.errors.setdefault(name, []).extend(messages)
+    if settings.USE_TZ and instance.datetime_field and timezone.is_naive(instance.datetime_field):
+        instance.datetime_field = timezone.make_aware(instance.datetime_field)
+    return record
+
+
+def _check_relations(records, lookups):
+    table2_ids, table3_ids, emails = set(), set(), set()
+    for record in records:
+        table2_ids.update(value for value in (record.instance.foreign_key_id, record.instance.one_to_one_id) if value)
+        for reference in record.references:
+            (table3_ids if isinstance(reference, int) else emails).add(reference)
+    lookups.load(table2_ids, table3_ids, emails)
+    taken = lookups.one_to_one_taken(
+        {record.instance.one_to_one_id for record in records} - {None} - lookups.one_to_one_seen
+    )
+
+    for record in records:
+        instance = record.instance
+        for column in _RELATIONS:
+            value = getattr(instance, f'{column}_id')
+            if value is not None and not lookups.table2.get(value):
+                record.errors.setdefault(column, []).append(f'Table2 {value} not found')
+        missing = []
+        for reference in record.references:
+            if isinstance(reference, int):
+                pk = reference if lookups.table3_ids.get(reference) else None
+            else:
+                pk = lookups.emails.get(reference)
+            if pk is None:
+                missing.append(reference)
+            else:
+                record.links.append(pk)
+        if missing:
+            record.errors.setdefault(_M2M, []).append(f'Table3 not found: {missing}')
+        record.links = list(dict.fromkeys(record.links))
+        # one_to_one is unique: taken in the table or earlier in this file
+        if not record.errors and instance.one_to_one_id is not None:
+            if instance.one_to_one_id in taken or instance.one_to_one_id in lookups.one_to_one_seen:
+                record.errors['one_to_one'] = [f'Table2 {instance.one_to_one_id} is already linked one-to-one']
+            else:
+                lookups.one_to_one_seen.add(instance.one_to_one_id)
+
+
+def _write(records):
+    """Insert one validated batch with its links."""
+    through = Table1.many_to_many.through
+    with transaction.atomic(), coalesce_version_bumps():
+        Table1.objects.bulk_create([r.instance for r in records], batch_size=INSERT_BATCH_SIZE)
+        links = [through(table1_id=r.instance.pk, table3_id=pk) for r in records for pk in r.links]
+        through.objects.bulk_create(links, batch_size=INSERT_BATCH_SIZE)
+        # bulk_create sends no post_save, so bump and count explicitly
+        bump_version(Table1)
+        record_table1_change(added=[stats_values(r.instance) for r in records], links=len(links))
+
+
+class ImportResult:
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.links = 0
+        self.invalid = 0
+        self.errors = []    # (line or row number, {column: [messages]}), first REPORTED_ERRORS only
+
+
+def import_table1(records, batch_size=IMPORT_BATCH_SIZE, dry_run=False, max_errors=None, progress=None):
+    """Validate and insert (number, values) records from read_records() batch by batch.
+
+    progress, if given, is called with the ImportResult after every batch.
+    Stops with Table1ImportError once more than max_errors records were
+    invalid; batches written before that stay committed.
+    """
+    result = ImportResult()
+    lookups = _Lookups()
+    records = iter(records)
+    while True:
+        batch = [_build(number, values) for number, values in islice(records, batch_size)]
+        if not batch:
+            break
+        result.read += len(batch)
+        _check_relations([r for r in batch if not r.errors], lookups)
+        valid = [r for r in batch if not r.errors]
+        for record in batch:
+            if record.errors:
+                result.invalid += 1
+                if len(result.errors) < REPORTED_ERRORS:
+                    result.errors.append((record.number, record.errors))
+        if max_errors is not None and result.invalid > max_errors:
+            raise Table1ImportError(f'More than {max_errors} invalid records, stopping at line/row {batch[-1].number}')
+        if valid and not dry_run:
+            _write(valid)
+        result.created += len(valid)
+        result.links += sum(len(r.links) for r in valid)
+        if progress is not None:
+            progress(result)
+    return result
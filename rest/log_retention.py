@@ -0,0 +1,94 @@
+"""Batched UserLog retention with an optional gzip JSONL archive (manage.py delete_logs).
+
+delete_logs used to run UserLog.objects.filter(timestamp__lt=threshold).delete():
+one DELETE over every expired row in a single transaction. On SQLite the write
+lock was held for the whole purge, so every login and logout written in the
+meantime waited behind it (or failed with "database is locked").
+
+purge_user_logs() walks the expired rows in batches of LOG_PURGE_BATCH_SIZE,
+oldest first:
+
+1. it reads one batch on the (timestamp, id) index. The walk is a keyset walk:
+   the next batch starts after the last key of this one, not from the top
+   of the index again;
+2. if an archive is open, it appends the batch to it as one gzip member of
+   JSON lines (one object per row) and flushes it to disk;
+3. it deletes the batch's ids in its own short transaction, in
+   DELETE_BATCH_SIZE chunks.
+
+So the lock is held for one batch at a time, and other writers get in between
+batches (pause adds a sleep there). Rows are archived before they are deleted.
+A run that stops between 2 and 3 leaves those rows in the table, and the next
+run archives them again. Archived rows keep their id, so duplicates can be
+dropped when the archive is read. gzip.open() reads the concatenated members
+as one stream.
+"""
+
+import gzip
+import json
+import os
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .deletion import DELETE_BATCH_SIZE
+from .models import UserLog
+
+LOG_RETENTION_DAYS = 90
+LOG_PURGE_BATCH_SIZE = 5000
+ARCHIVE_FIELDS = ('id', 'user_id', 'username', 'event_type', 'ip_address', 'timestamp', 'details')
+
+
+def archive_path(directory, started=None):
+    """New archive file name for a run, e.g. userlog-20260118T020000.jsonl.gz."""
+    started = started or timezone.now()
+    return os.path.join(directory, f"userlog-{started:%Y%m%dT%H%M%S}.jsonl.gz")
+
+
+def _archive(archive, rows):
+    lines = []
+    for row in rows:
+        row = dict(row, timestamp=row['timestamp'].isoformat())
+        lines.append(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+    # A member per batch: what is on disk is complete before the batch is deleted
+    archive.write(gzip.compress(('\n'.join(lines) + '\n').encode()))
+    archive.flush()
+    os.fsync(archive.fileno())
+
+
+def _batches(before, batch_size):
+    expired = UserLog.objects.filter(timestamp__lt=before).order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)
+    last = None
+    while True:
+        queryset = expired
+        if last is not None:
+            # (timestamp, id) > last, with the redundant bound that makes it an index range
+            queryset = queryset.filter(timestamp__gte=last[0]).exclude(timestamp=last[0], id__lte=last[1])
+        rows = list(queryset[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]['timestamp'], rows[-1]['id']
+
+
+def purge_user_logs(before, batch_size=LOG_PURGE_BATCH_SIZE, archive=None, pause=0, progress=None):
+    """Delete UserLog rows with timestamp < before in batches; return how many were deleted.
+
+    archive, if given, is a binary file opened for appending; each batch is
+    written to it before it is deleted. progress, if given, is called with the
+    running total after every batch.
+    """
+    deleted = 0
+    for rows in _batches(before, batch_size):
+        if archive is not None:
+            _archive(archive, rows)
+        ids = [row['id'] for row in rows]
+        with transaction.atomic():
+            for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                deleted += UserLog.objects.filter(pk__in=ids[start:start + DELETE_BATCH_SIZE]).delete()[0]
+        if progress is not None:
+            progress(deleted)
+        if pause:
+            time.sleep(pause)
+    return deleted
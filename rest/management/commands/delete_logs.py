@@ -1,16 +1,58 @@
+import os
+from datetime import timedelta
 
-from django.core.management.base import BaseCommand
-from rest.models import UserLog
+from django.core.management.base import BaseCommand, CommandError
 from django.utils.timezone import now
-from datetime import timedelta
 
-# Management command to delete user logs older than 90 days
+from rest.log_retention import LOG_PURGE_BATCH_SIZE, LOG_RETENTION_DAYS, archive_path, purge_user_logs
+
+# Management command to delete user logs older than the retention window (90 days by default)
 class Command(BaseCommand):
-    help = 'Delete user logs older than 90 days.'
+    help = 'Delete user logs older than --days (default 90) in short batches, optionally archiving them to gzip JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=LOG_RETENTION_DAYS, help='Keep this many days of logs')
+        parser.add_argument('--batch-size', type=int, default=LOG_PURGE_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+        parser.add_argument('--archive-dir',
+                            help='Append the deleted rows to a userlog-<time>.jsonl.gz file in this directory first')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches so other writers get the lock')
 
     def handle(self, *args, **options):
-        """Delete UserLog entries older than 90 days."""
-        threshold = now() - timedelta(days=90)
-        deleted_count, _ = UserLog.objects.filter(timestamp__lt=threshold).delete()
-        self.stdout.write(self.style.SUCCESS(f"{deleted_count} old user logs deleted."))
+        """Delete expired UserLog rows batch by batch through rest.log_retention."""
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        started = now()
+        threshold = started - timedelta(days=options['days'])
+
+        def progress(deleted):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"{deleted} deleted")
+
+        archive = None
+        path = None
+        if options['archive_dir']:
+            path = archive_path(options['archive_dir'], started)
+            try:
+                os.makedirs(options['archive_dir'], exist_ok=True)
+                archive = open(path, 'ab')
+            except OSError as e:
+                raise CommandError(f"Cannot open archive: {e}")
+        try:
+            deleted_count = purge_user_logs(
+                threshold, batch_size=options['batch_size'], archive=archive,
+                pause=options['pause'], progress=progress,
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+                if not os.path.getsize(path):
+                    os.remove(path)
 
+        message = f"{deleted_count} user logs older than {options['days']} days deleted."
+        if deleted_count and path:
+            message += f" Archived to {path}."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest.imports import IMPORT_BATCH_SIZE, Table1ImportError, import_table1, read_records
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+# Management command to load Table1 rows in bulk from a CSV, JSONL or XLSX file
+class Command(BaseCommand):
+    help = 'Import Table1 rows from a CSV, JSONL/NDJSON or XLSX file in validated batches (see rest/imports.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'xlsx'], help='Default: from the file extension')
+        parser.add_argument('--sheet', help='Worksheet to read (xlsx; default: the active sheet)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=1000,
+                            help='Stop once more records than this were invalid')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        """Stream the file through rest.imports and report progress and invalid records."""
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        started = time.monotonic()
+        last_report = started
+
+        def progress(result):
+            nonlocal last_report
+            current = time.monotonic()
+            if options['verbosity'] >= 1 and current - last_report >= PROGRESS_INTERVAL:
+                last_report = current
+                rate = result.read / (current - started)
+                self.stdout.write(
+                    f"{result.read} read, {result.created} valid, {result.invalid} invalid ({rate:,.0f} rows/s)"
+                )
+
+        try:
+            records = read_records(options['path'], options['format'], options['sheet'])
+            result = import_table1(
+                records, batch_size=options['batch_size'], dry_run=options['dry_run'],
+                max_errors=options['max_errors'], progress=progress,
+            )
+        except (Table1ImportError, OSError) as e:
+            raise CommandError(str(e))
+
+        for number, errors in result.errors:
+            details = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in errors.items())
+            self.stderr.write(f"Line/row {number}: {details}")
+        if result.invalid > len(result.errors):
+            self.stderr.write(f"... and {result.invalid - len(result.errors)} more invalid records")
+
+        elapsed = time.monotonic() - started
+        verb = 'would be imported (dry run)' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} Table1 rows {verb} with {result.links} links, "
+            f"{result.invalid} invalid records skipped, in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from datetime import timedelta
+
+from rest.models import ExportJob
+
+# Management command to remove old export jobs and the artifacts nobody points at anymore
+class Command(BaseCommand):
+    help = 'Delete export jobs not touched for N hours (default 24) and unreferenced files in MEDIA_ROOT/exports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        """Drop stale job rows, then artifacts (and abandoned .part files) no remaining job uses."""
+        threshold = now() - timedelta(hours=options['hours'])
+        jobs_deleted, _ = ExportJob.objects.filter(updated_at__lt=threshold).delete()
+
+        directory = os.path.join(settings.MEDIA_ROOT, 'exports')
+        referenced = set(ExportJob.objects.values_list('cache_key', flat=True))
+        files_deleted = 0
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                key = entry.name.split('.', 1)[0]
+                if key in referenced or entry.stat().st_mtime >= threshold.timestamp():
+                    continue
+                os.remove(entry.path)
+                files_deleted += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{jobs_deleted} old export jobs and {files_deleted} export files deleted."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from rest.stats import rebuild_table1_stats
+
+# Management command to recompute the Table1Stats summary row from the table
+class Command(BaseCommand):
+    help = 'Recompute the Table1 statistics summary (count, sums, min/max, links) with one aggregate query.'
+
+    def handle(self, *args, **options):
+        """Rebuild Table1Stats, e.g. after raw SQL writes or to reset float drift."""
+        stats = rebuild_table1_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Table1 statistics rebuilt: {stats.row_count} rows, {stats.link_count} links."
+        ))
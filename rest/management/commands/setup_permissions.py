@@ -3,6 +3,7 @@ from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
 from rest.models import Table1, Table2, Table3
+from rest.versioning import bump_version
 
 # Management command to set up groups and permissions
 class Command(BaseCommand):
@@ -56,6 +57,10 @@ class Command(BaseCommand):
             manage_users_perm
         ]
         admin_group.permissions.set(all_admin_permissions)
+
+        # Cached permission profiles (rest.permission_cache) are keyed on this version;
+        # new Permission rows also change what superusers hold
+        bump_version(Group.permissions.through)
         
         self.stdout.write(
             self.style.SUCCESS('Successfully created groups and permissions')
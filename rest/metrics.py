@@ -0,0 +1,221 @@
+"""Per-route request latency histograms, shared across worker processes (/metrics).
+
+ExecutionTimeMiddleware used to print() every request's time.time() delta
+to stdout: a blocking write on every request, and nothing anyone could
+aggregate. The middleware now measures with time.perf_counter() and
+calls request_metrics.observe(route, method, seconds). That is a bisect
+and a dict update under a lock, with no I/O. Series are keyed by URL name
+(resolver_match.view_name) and HTTP method, so there is a fixed, small
+number of them. Unresolved paths share UNMATCHED_ROUTE and unknown methods
+share 'OTHER', so a scanner cannot create series.
+
+Every gunicorn / uvicorn worker has its own copy of the histograms. A
+background thread writes this process's copy to a shard file in
+settings.METRICS_DIR every METRICS_FLUSH_INTERVAL seconds, if it changed
+(write to a temp file, then os.replace(), so readers never see half a file).
+No thread is started while METRICS_DIR is unset. The /metrics view in any
+worker merges:
+
+- every shard in the directory,
+- its own live histograms instead of its shard.
+
+Other workers are at most one interval behind. Shards of exited processes
+stay in the directory, so the merged counters never go down while the
+server runs. Clear the directory when the server is (re)started, as with
+prometheus_client's multiprocess mode. METRICS_DIR is empty by default,
+which keeps the metrics in-process (single-process servers, tests): a
+shared default directory would mix in shards left by earlier runs.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds (the Prometheus client defaults); +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FLUSH_INTERVAL = 2.0  # seconds
+UNMATCHED_ROUTE = '<unmatched>'
+METRIC_NAME = 'http_request_duration_seconds'
+
+_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+_SHARD_PREFIX = 'latency-'
+
+
+def route_label(request):
+    """URL name of the matched route ('app:name', or the view path for unnamed routes)."""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNMATCHED_ROUTE
+
+
+def method_label(request):
+    return request.method if request.method in _METHODS else 'OTHER'
+
+
+def _merge(into, series):
+    for key, counts in series.items():
+        current = into.get(key)
+        if current is None:
+            into[key] = list(counts)
+        else:
+            for index, value in enumerate(counts):
+                current[index] += value
+
+
+class RequestMetrics:
+    """Latency histograms of this process, flushed to a shard file by a background thread."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.buckets = tuple(buckets)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # (route, method) -> [one count per bucket..., +Inf count, sum of seconds]
+        self._series = {}
+        self._changed = False
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._shard = None
+        self._stopping = False
+
+    def observe(self, route, method, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._ensure_thread()
+            series = self._series.get((route, method))
+            if series is None:
+                series = self._series[(route, method)] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+            self._changed = True
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(counts) for key, counts in self._series.items()}
+
+    def _directory(self):
+        return getattr(settings, 'METRICS_DIR', None) or None
+
+    def flush(self):
+        """Write this process's histograms to its shard file if they changed."""
+        directory = self._directory()
+        with self._lock:
+            if not self._changed or directory is None or self._shard is None:
+                return False
+            self._changed = False
+            payload = {
+                'pid': self._pid,
+                'buckets': self.buckets,
+                'series': [[route, method, counts] for (route, method), counts in self._series.items()],
+            }
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'w') as handle:
+                json.dump(payload, handle, separators=(',', ':'))
+            os.replace(temporary, os.path.join(directory, self._shard))
+        except BaseException:
+            os.unlink(temporary)
+            with self._lock:
+                self._changed = True
+            raise
+        return True
+
+    def collect(self):
+        """Histograms merged over every process sharing METRICS_DIR, this one live."""
+        merged = {}
+        directory = self._directory()
+        own_shard = self._shard if self._pid == os.getpid() else None
+        if directory is not None and os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if not name.startswith(_SHARD_PREFIX) or name == own_shard:
+                    continue
+                try:
+                    with open(os.path.join(directory, name)) as handle:
+                        payload = json.load(handle)
+                except (OSError, ValueError):
+                    logger.warning("Skipping unreadable metrics shard %s", name)
+                    continue
+                if tuple(payload.get('buckets', ())) != self.buckets:
+                    # Written with other buckets (older deploy): counts would not line up
+                    continue
+                _merge(merged, {(route, method): counts for route, method, counts in payload['series']})
+        _merge(merged, self.snapshot())
+        return merged
+
+    def _ensure_thread(self):
+        # Called with the lock held. A forked worker starts empty, with its own
+        # shard: the parent's requests are already in the parent's shard
+        if self._pid != os.getpid():
+            if self._pid is not None:
+                self._series = {}
+                self._changed = False
+                self._thread = None
+            self._pid = os.getpid()
+            self._shard = f"{_SHARD_PREFIX}{self._pid}-{uuid.uuid4().hex[:8]}.json"
+        # Without METRICS_DIR there is nowhere to write: no thread, no atexit hook
+        if self._thread is not None or self._directory() is None:
+            return
+        self._stopping = False
+        self._wakeup.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Metrics flush failed")
+
+    def stop(self, timeout=5.0):
+        """Stop the background thread and write the final shard (runs at exit)."""
+        thread = self._thread
+        self._stopping = True
+        self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread() and self._pid == os.getpid():
+            thread.join(timeout)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Metrics flush failed")
+
+
+request_metrics = RequestMetrics()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(series, buckets=LATENCY_BUCKETS):
+    """Prometheus text exposition (format 0.0.4) of collect() output."""
+    lines = [
+        f'# HELP {METRIC_NAME} Time from the request entering the middleware stack to the response leaving it.',
+        f'# TYPE {METRIC_NAME} histogram',
+    ]
+    bounds = [_number(float(bound)) for bound in buckets] + ['+Inf']
+    for (route, method), counts in sorted(series.items()):
+        labels = f'route="{_escape(route)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{{labels}}} {_number(counts[-1])}')
+        lines.append(f'{METRIC_NAME}_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
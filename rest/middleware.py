@@ -1,17 +1,39 @@
 import time
-from django.utils.deprecation import MiddlewareMixin
-
-class ExecutionTimeMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        # Save the start time when the request arrives
-        request.start_time = time.time()
-
-    def process_response(self, request, response):
-        # Calculate the elapsed time
-        if hasattr(request, "start_time"):
-            elapsed = time.time() - request.start_time
-            # Print to console
-            print(f"Execution time: {elapsed:.4f} seconds - {request.path}")
-            # Optional: add the elapsed time as a response header
-            response["X-Execution-Time"] = f"{elapsed:.4f}s"
-        return response
\ No newline at end of file
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import method_label, request_metrics, route_label
+
+class ExecutionTimeMiddleware:
+    """Request latency into the per-route histograms of rest.metrics, plus a Server-Timing header.
+
+    Sync + async, so it does not push ASGI requests into a thread itself.
+    Listed first in MIDDLEWARE so the time covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _finish(self, request, response, started):
+        elapsed = time.perf_counter() - started
+        request_metrics.observe(route_label(request), method_label(request), elapsed)
+        timing = f"app;dur={elapsed * 1000:.1f}"
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        response['X-Execution-Time'] = f"{elapsed:.4f}s"
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        return self._finish(request, self.get_response(request), started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        return self._finish(request, await self.get_response(request), started)
+
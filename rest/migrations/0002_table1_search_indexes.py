@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='table1',
+            index=models.Index(fields=['char_field', 'id'], name='rest_table1_char_fi_73aec4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='table1',
+            index=models.Index(fields=['integer_field', 'id'], name='rest_table1_integer_d2ae26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='table1',
+            index=models.Index(fields=['float_field', 'id'], name='rest_table1_float_f_823d01_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='table1',
+            index=models.Index(fields=['date_field', 'id'], name='rest_table1_date_fi_b06b8a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='table1',
+            index=models.Index(fields=['datetime_field', 'id'], name='rest_table1_datetim_dea34e_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest', '0004_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table1Stats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_count', models.PositiveBigIntegerField(default=0)),
+                ('integer_count', models.PositiveBigIntegerField(default=0)),
+                ('integer_sum', models.BigIntegerField(default=0)),
+                ('integer_min', models.IntegerField(blank=True, null=True)),
+                ('integer_max', models.IntegerField(blank=True, null=True)),
+                ('float_count', models.PositiveBigIntegerField(default=0)),
+                ('float_sum', models.FloatField(default=0)),
+                ('float_min', models.FloatField(blank=True, null=True)),
+                ('float_max', models.FloatField(blank=True, null=True)),
+                ('date_min', models.DateField(blank=True, null=True)),
+                ('date_max', models.DateField(blank=True, null=True)),
+                ('link_count', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
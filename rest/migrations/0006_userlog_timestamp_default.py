@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest', '0005_table1stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest', '0006_userlog_timestamp_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userlog',
+            index=models.Index(fields=['timestamp', 'id'], name='rest_userlo_timesta_f4760e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlog',
+            index=models.Index(fields=['username', 'timestamp', 'id'], name='rest_userlo_usernam_48c966_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlog',
+            index=models.Index(fields=['event_type', 'timestamp', 'id'], name='rest_userlo_event_t_46d968_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlog',
+            index=models.Index(fields=['ip_address', 'timestamp', 'id'], name='rest_userlo_ip_addr_5c8d97_idx'),
+        ),
+    ]
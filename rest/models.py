@@ -1,4 +1,9 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils.timezone import now
 from django.contrib.auth.models import User
 
 
@@ -48,6 +53,16 @@ class Table1(models.Model):
     image_field = models.ImageField(upload_to='images/', null=True, blank=True)  # For image files
     file_field = models.FileField(upload_to='files/', null=True, blank=True)     # For general files
 
+    class Meta:
+        # (column, id) indexes back the json_app search filters and keyset sort order
+        indexes = [
+            models.Index(fields=['char_field', 'id']),
+            models.Index(fields=['integer_field', 'id']),
+            models.Index(fields=['float_field', 'id']),
+            models.Index(fields=['date_field', 'id']),
+            models.Index(fields=['datetime_field', 'id']),
+        ]
+
     def __str__(self):
         return f"Table1 ID: {self.id}"
     
@@ -67,8 +82,101 @@ class UserLog(models.Model):
     username = models.CharField(max_length=150)  
     event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded (rest/audit.py may insert it a moment later)
+    timestamp = models.DateTimeField(default=now, editable=False)
     details = models.TextField(blank=True) 
 
+    class Meta:
+        # Each filter of the user_logs viewer leads an index that continues with
+        # (timestamp, id), the keyset order, so a filtered page is one index range
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['username', 'timestamp', 'id']),
+            models.Index(fields=['event_type', 'timestamp', 'id']),
+            models.Index(fields=['ip_address', 'timestamp', 'id']),
+        ]
+
+    def __str__(self):
+        return f"[{self.timestamp}] {self.username} - {self.get_event_type_display()}"
+
+class TableVersion(models.Model):
+    # One row per tracked model (e.g. 'rest.table2'); bumped on every write
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
+
+class Table1Stats(models.Model):
+    """Single row (pk=1) of Table1 aggregates, maintained by rest/stats.py."""
+    row_count = models.PositiveBigIntegerField(default=0)
+    integer_count = models.PositiveBigIntegerField(default=0)       # Non-null values (what AVG divides by)
+    integer_sum = models.BigIntegerField(default=0)
+    integer_min = models.IntegerField(null=True, blank=True)
+    integer_max = models.IntegerField(null=True, blank=True)
+    float_count = models.PositiveBigIntegerField(default=0)
+    float_sum = models.FloatField(default=0)
+    float_min = models.FloatField(null=True, blank=True)
+    float_max = models.FloatField(null=True, blank=True)
+    date_min = models.DateField(null=True, blank=True)
+    date_max = models.DateField(null=True, blank=True)
+    link_count = models.PositiveBigIntegerField(default=0)          # Table1 <-> Table3 many_to_many rows
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Table1Stats ({self.row_count} rows)"
+
+    @property
+    def integer_avg(self):
+        return self.integer_sum / self.integer_count if self.integer_count else None
+
+    @property
+    def float_avg(self):
+        return self.float_sum / self.float_count if self.float_count else None
+
+class ExportJob(models.Model):
+    """A PDF/XLSX export rendered in the background (see rest/export_jobs.py).
+
+    The artifact is stored under MEDIA_ROOT/exports/ and named after
+    cache_key (format + filters + table versions), so jobs asking for the same
+    export of unchanged data share one file.
+    """
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('xlsx', 'Excel'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    params = models.JSONField(default=dict, blank=True)             # Table1 filters (json_app.filters syntax)
+    cache_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    rows_done = models.PositiveBigIntegerField(default=0)
+    rows_total = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)                # Refreshed on every progress report
+    finished_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
-        return f"[{self.timestamp}] {self.username} - {self.get_event_type_display()}"
\ No newline at end of file
+        return f"ExportJob {self.id} ({self.format}, {self.status})"
+
+    @property
+    def path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'exports', f"{self.cache_key}.{self.format}")
+
+    @property
+    def progress(self):
+        """Percent of rows written (100 once done)."""
+        if self.status == 'done':
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(99, self.rows_done * 100 // self.rows_total)
@@ -0,0 +1,146 @@
+"""Per-user permission cache shared across requests.
+
+ModelBackend keeps a user's permissions on the User instance, and
+AuthenticationMiddleware loads a new instance on every request. So each
+request paid two permission queries for the first has_perm() /
+@permission_required check. The profile pages and base.html also walked
+user.groups for the role label.
+
+CachedPermissionBackend keeps one "permission profile" per user in Django's
+cache: the user and group permission sets, the group names, the role label
+and the group permission names for the profile pages. The cache key holds a
+version token made of the TableVersion counters (rest.versioning) of:
+
+    auth_user_groups             group membership
+    auth_user_user_permissions   direct user permissions
+    auth_group_permissions       group permissions
+
+plus the user's is_superuser flag. The counters are bumped by the
+m2m_changed receivers in rest.signals, by user_roles.set_role() and by
+setup_permissions. A changed counter makes every existing entry
+unreachable, so an entry is never served stale, whatever the cache backend.
+The counters are global, not per user. Role changes are rare admin actions,
+and each user recomputes their profile once on their next request.
+
+get_user() reads the counters in the same query that loads the session's
+user, as subqueries. With a warm cache, a request's permission checks and
+role label need no further queries. With the default per-process LocMemCache,
+each server process builds its own entries. Configure a shared CACHES backend
+to share them across processes.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db.models import Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import TableVersion
+from .versioning import version_token
+
+# Tables whose writes change what a user is allowed to do
+PERMISSION_TABLES = (User.groups.through, User.user_permissions.through, Group.permissions.through)
+PERMISSION_CACHE_TIMEOUT = 60 * 60  # seconds; entries are also dropped on version change
+
+ROLE_BY_GROUP = {'Admins': 'Administrator', 'Customers': 'Customer'}
+NO_ROLE = 'No role assigned'
+
+_VERSION_ATTRS = tuple(f'permission_version_{index}' for index in range(len(PERMISSION_TABLES)))
+
+
+def _version_annotations():
+    return {
+        attr: Coalesce(
+            Subquery(TableVersion.objects.filter(label=model._meta.label_lower).values('version')[:1]),
+            Value(0),
+        )
+        for attr, model in zip(_VERSION_ATTRS, PERMISSION_TABLES)
+    }
+
+
+def permission_version(user):
+    """Version token of the permission tables (read with the user row when possible)."""
+    if all(hasattr(user, attr) for attr in _VERSION_ATTRS):
+        return '.'.join(str(getattr(user, attr)) for attr in _VERSION_ATTRS)
+    return version_token(*PERMISSION_TABLES)
+
+
+def _cache_key(user, token):
+    return f'rest:permissions:{user.pk}:{int(user.is_superuser)}:{token}'
+
+
+def _build_profile(user):
+    backend = ModelBackend()
+    groups = list(user.groups.order_by('id').values_list('name', flat=True))
+    role = next((ROLE_BY_GROUP[name] for name in ('Admins', 'Customers') if name in groups), NO_ROLE)
+    return {
+        'user_permissions': backend.get_user_permissions(user),
+        'group_permissions': backend.get_group_permissions(user),
+        'groups': groups,
+        'role': role,
+        # What the profile pages list: names of the permissions granted through groups
+        'group_permission_names': list(
+            Permission.objects.filter(group__user=user).order_by('id').values_list('name', flat=True).distinct()
+        ),
+    }
+
+
+def get_permission_profile(user):
+    """Cached permission profile of an authenticated user.
+
+    {'user_permissions', 'group_permissions': {'app.codename', ...},
+     'groups': [names], 'role': label, 'group_permission_names': [names]}
+    """
+    profile = getattr(user, '_permission_profile', None)
+    if profile is None:
+        key = _cache_key(user, permission_version(user))
+        profile = cache.get(key)
+        if profile is None:
+            profile = _build_profile(user)
+            cache.set(key, profile, PERMISSION_CACHE_TIMEOUT)
+        user._permission_profile = profile
+    return profile
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend whose permission sets come from get_permission_profile()."""
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.annotate(**_version_annotations()).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await User._default_manager.annotate(**_version_annotations()).aget(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def _prime(self, user_obj, obj):
+        # Fill ModelBackend's per-instance caches so its own lookups skip the database
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return
+        if not hasattr(user_obj, '_user_perm_cache') or not hasattr(user_obj, '_group_perm_cache'):
+            profile = get_permission_profile(user_obj)
+            user_obj._user_perm_cache = set(profile['user_permissions'])
+            user_obj._group_perm_cache = set(profile['group_permissions'])
+
+    def get_user_permissions(self, user_obj, obj=None):
+        self._prime(user_obj, obj)
+        return super().get_user_permissions(user_obj, obj)
+
+    def get_group_permissions(self, user_obj, obj=None):
+        self._prime(user_obj, obj)
+        return super().get_group_permissions(user_obj, obj)
+
+    async def aget_user_permissions(self, user_obj, obj=None):
+        await sync_to_async(self._prime)(user_obj, obj)
+        return await super().aget_user_permissions(user_obj, obj)
+
+    async def aget_group_permissions(self, user_obj, obj=None):
+        await sync_to_async(self._prime)(user_obj, obj)
+        return await super().aget_group_permissions(user_obj, obj)
@@ -1,8 +1,11 @@
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from django.contrib.auth.models import User
-from .models import UserLog
+from django.contrib.auth.models import User, Group
+from .models import Table1, Table2, Table3
+from .audit import record_user_event
+from .versioning import bump_version
+from .stats import STATS_FIELDS, in_batch, record_table1_change, stats_values, table1_links
 from django.utils.timezone import now
 
 # Helper function to get client IP address
@@ -21,47 +24,156 @@ def get_client_ip(request):
 # Signal handlers
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
-    # Log the login event
-    UserLog.objects.create(
-        user=user,
-        username=user.username,
-        event_type='login',
-    ip_address=get_client_ip(request),
-    )
+    # Log the login event (queued; rest/audit.py writes it in the background)
+    record_user_event('login', user.username, user=user, ip_address=get_client_ip(request))
 
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
-    # Log the logout event
-    UserLog.objects.create(
-        user=user,
-        username=user.username,
-        event_type='logout',
-    ip_address=get_client_ip(request),
-    )
+    # Log the logout event (user is None when the session had no authenticated user)
+    if user is not None:
+        record_user_event('logout', user.username, user=user, ip_address=get_client_ip(request))
 
 @receiver(user_login_failed)
 def log_user_login_failed(sender, credentials, request, **kwargs):
     # Log the failed login attempt
-    UserLog.objects.create(
-        user=None,
-        username=credentials.get('username', 'unknown'),
-        event_type='login_failed',
-        ip_address=get_client_ip(request),
-    )
+    record_user_event('login_failed', credentials.get('username', 'unknown'), ip_address=get_client_ip(request))
+
+# Password changes: the hash a User was loaded with is kept on the instance,
+# so saves compare against it instead of re-reading the row
+@receiver(post_init, sender=User)
+def remember_loaded_password(sender, instance, **kwargs):
+    # A deferred password (only()/defer()) stays unloaded; reading it here would cost a query
+    if 'password' in instance.__dict__:
+        instance._loaded_password = instance.password
 
 @receiver(pre_save, sender=User)
-def log_password_change(sender, instance, **kwargs):
-    # Check if the password has changed
-    if instance.pk:
-        try:
-            old_user = User.objects.get(pk=instance.pk)
-            if old_user.password != instance.password:
-                UserLog.objects.create(
-                    user=instance,
-                    username=instance.username,
-                    event_type='password_change',
-                    ip_address=None,  # Puede que no tengas el request acá
-                    details="Password was changed.",
-                )
-        except User.DoesNotExist:
-            pass
\ No newline at end of file
+def log_password_change(sender, instance, update_fields=None, **kwargs):
+    # New users, and saves that leave the password out (e.g. the last_login update on login), cannot change it
+    if instance._state.adding or (update_fields is not None and 'password' not in update_fields):
+        return
+    if 'password' not in instance.__dict__:
+        return
+    loaded = getattr(instance, '_loaded_password', None)
+    if instance.password is loaded:
+        # Still the very string that was loaded (or last saved)
+        return
+    if loaded is None or instance._password is None:
+        # Not from set_password(): the password was deferred when the User was loaded
+        # (and read lazily or assigned since), reloaded by refresh_from_db(), or assigned
+        # directly. None of that updates _loaded_password, so compare with the stored hash
+        loaded = User.objects.filter(pk=instance.pk).values_list('password', flat=True).first()
+    if instance.password != loaded:
+        record_user_event(
+            'password_change', instance.username, user=instance,
+            details="Password was changed.",
+        )
+
+@receiver(post_save, sender=User)
+def remember_saved_password(sender, instance, **kwargs):
+    if 'password' in instance.__dict__:
+        instance._loaded_password = instance.password
+
+# Table versions: any write invalidates caches/ETags keyed on the table version
+@receiver(post_save, sender=Table1)
+@receiver(post_delete, sender=Table1)
+@receiver(post_save, sender=Table2)
+@receiver(post_delete, sender=Table2)
+@receiver(post_save, sender=Table3)
+@receiver(post_delete, sender=Table3)
+def bump_table_version(sender, **kwargs):
+    bump_version(sender)
+
+@receiver(m2m_changed, sender=Table1.many_to_many.through)
+def bump_table1_links_version(sender, action, **kwargs):
+    # Links are part of the Table1 payload, so they version Table1
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(Table1)
+
+# Permission cache (rest/permission_cache.py): membership or permission changes
+# move the version its entries are keyed on
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def bump_permission_version(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(sender)
+
+@receiver(post_delete, sender=Group)
+def bump_permission_version_on_group_delete(sender, **kwargs):
+    # Membership and group permission rows go with the group without m2m_changed
+    bump_version(User.groups.through, Group.permissions.through)
+
+# Table1 statistics (rest/stats.py): apply each write's delta to the summary row.
+# The tracked values a row was loaded with are kept on the instance, as the
+# password is for User, so updates compare against them instead of re-reading the row
+@receiver(post_init, sender=Table1)
+def remember_table1_stats_values(sender, instance, **kwargs):
+    # Deferred columns (only()/defer()) are left out; pre_save reads just those
+    loaded = instance.__dict__
+    instance._stats_loaded = {field: loaded[field] for field in STATS_FIELDS if field in loaded}
+
+@receiver(pre_save, sender=Table1)
+def complete_table1_stats_values(sender, instance, update_fields=None, **kwargs):
+    # Values being replaced are needed to take them out of sums and min/max
+    instance._stats_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(STATS_FIELDS):
+        return
+    loaded = getattr(instance, '_stats_loaded', {})
+    missing = [field for field in STATS_FIELDS if field not in loaded]
+    if missing:
+        row = Table1.objects.filter(pk=instance.pk).values_list(*missing).first()
+        if row is None:
+            return
+        loaded = {**loaded, **dict(zip(missing, row))}
+    instance._stats_before = tuple(loaded[field] for field in STATS_FIELDS)
+
+@receiver(post_save, sender=Table1)
+def update_table1_stats_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        after = stats_values(instance)
+        record_table1_change(added=[after])
+    else:
+        before = getattr(instance, '_stats_before', None)
+        if before is None:
+            return
+        # Columns left out of the UPDATE (update_fields, still deferred) keep their stored value
+        written = STATS_FIELDS if update_fields is None else update_fields
+        after = tuple(
+            instance.__dict__[field] if field in written and field in instance.__dict__ else value
+            for field, value in zip(STATS_FIELDS, before)
+        )
+        if before != after:
+            record_table1_change(added=[after], removed=[before])
+    instance._stats_loaded = dict(zip(STATS_FIELDS, after))
+
+@receiver(pre_delete, sender=Table1)
+def count_table1_links_on_delete(sender, instance, **kwargs):
+    # Link rows go with the Table1 row without m2m_changed; batches report them from delete().
+    # Outside a batch that is one COUNT per deleted row: the views delete through
+    # rest.deletion.delete_table1, so this only runs for instance.delete() / queryset.delete()
+    if not in_batch():
+        record_table1_change(links=-table1_links().objects.filter(table1_id=instance.pk).count())
+
+@receiver(post_delete, sender=Table1)
+def update_table1_stats_on_delete(sender, instance, **kwargs):
+    record_table1_change(removed=[stats_values(instance)])
+
+@receiver(pre_delete, sender=Table3)
+def count_table3_links_on_delete(sender, instance, **kwargs):
+    if not in_batch():
+        record_table1_change(links=-table1_links().objects.filter(table3_id=instance.pk).count())
+
+@receiver(m2m_changed, sender=Table1.many_to_many.through)
+def update_table1_link_count(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        # Django only reports the ids it actually inserted
+        record_table1_change(links=len(pk_set))
+    elif action in ('pre_remove', 'pre_clear'):
+        # Count the rows about to go (pk_set may name ids that are not linked)
+        source, target = ('table3_id', 'table1_id') if reverse else ('table1_id', 'table3_id')
+        links = sender.objects.filter(**{source: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{target}__in': pk_set})
+        record_table1_change(links=-links.count())
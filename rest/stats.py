@@ -0,0 +1,191 @@
+"""Table1 aggregates kept in a one-row summary table (Table1Stats).
+
+query_values_example used to run count(), six aggregate() calls and a per-row
+Count('many_to_many') annotation on every page view, each one a full scan.
+The numbers now live in Table1Stats and are maintained as Table1 changes:
+
+- Table1 save/delete signals (rest.signals) add or remove the row's values.
+  Counts and sums move with F() expressions, and min/max only widen, so
+  the common write is a single UPDATE.
+- When the value leaving a column is its current min or max, that extreme is
+  re-read with Min()/Max(), which the (column, id) indexes answer with one
+  index seek.
+- m2m_changed and deletes keep the Table1 <-> Table3 link total.
+- Bulk writes that bypass signals (json_app.bulk) report their changes with
+  record_table1_change(). Inside batch_table1_stats(), all changes are
+  applied as one UPDATE on exit, and the caller reports link changes itself
+  (delete() returns the link rows it removed).
+
+The row is built on first use, and rebuilt whenever it is missing, by one
+aggregate query. `python manage.py rebuild_table1_stats` does the same on
+demand, e.g. after raw SQL writes or to clear float rounding drift.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.timezone import now
+
+from .models import Table1, Table1Stats
+
+# Table1 columns tracked by the summary, in stats_values() order
+STATS_FIELDS = ('integer_field', 'float_field', 'date_field')
+# Column prefix in Table1Stats; summed columns also keep _count/_sum for the average
+_PREFIX = {'integer_field': 'integer', 'float_field': 'float', 'date_field': 'date'}
+_SUMMED = ('integer_field', 'float_field')
+
+STATS_PK = 1
+
+_pending = threading.local()
+
+
+def stats_values(obj):
+    """Tracked values of a Table1 instance, as a tuple in STATS_FIELDS order."""
+    return tuple(getattr(obj, field) for field in STATS_FIELDS)
+
+
+def table1_links():
+    return Table1.many_to_many.through
+
+
+def deleted_links(delete_counts):
+    """Table1 <-> Table3 link rows in the per-model counts returned by delete()."""
+    return delete_counts.get(table1_links()._meta.label, 0)
+
+
+class _Delta:
+    """Pending change to Table1Stats."""
+
+    def __init__(self):
+        self.rows = 0
+        self.links = 0
+        self.counts = defaultdict(int)
+        self.sums = defaultdict(int)
+        self.low = {}       # Smallest / largest added value per field (may widen min/max)
+        self.high = {}
+        self.gone_low = {}  # Smallest / largest removed value per field (may narrow min/max)
+        self.gone_high = {}
+
+    def add(self, values, sign):
+        self.rows += sign
+        low, high = (self.low, self.high) if sign > 0 else (self.gone_low, self.gone_high)
+        for field, value in zip(STATS_FIELDS, values):
+            if value is None:
+                continue
+            if field in _SUMMED:
+                self.counts[field] += sign
+                self.sums[field] += sign * value
+            if field not in low or value < low[field]:
+                low[field] = value
+            if field not in high or value > high[field]:
+                high[field] = value
+
+
+def in_batch():
+    return getattr(_pending, 'delta', None) is not None
+
+
+@contextmanager
+def batch_table1_stats():
+    """Collect changes made inside the block and apply them once on exit.
+
+    Use it inside the transaction doing the writes so the summary commits (or
+    rolls back) with them. Link changes are not counted by the delete
+    signals inside a batch; report them with record_table1_change(links=...).
+    """
+    outermost = not in_batch()
+    if outermost:
+        _pending.delta = _Delta()
+    try:
+        yield
+        if outermost:
+            _apply(_pending.delta)
+    finally:
+        if outermost:
+            _pending.delta = None
+
+
+def record_table1_change(added=(), removed=(), links=0):
+    """Account for Table1 rows added/removed (stats_values() tuples) and link changes."""
+    delta = _pending.delta if in_batch() else _Delta()
+    for values in removed:
+        delta.add(values, -1)
+    for values in added:
+        delta.add(values, 1)
+    delta.links += links
+    if not in_batch():
+        _apply(delta)
+
+
+def _apply(delta):
+    changes = {}
+    if delta.rows:
+        changes['row_count'] = F('row_count') + delta.rows
+    if delta.links:
+        changes['link_count'] = F('link_count') + delta.links
+    for field in _SUMMED:
+        prefix = _PREFIX[field]
+        if delta.counts[field]:
+            changes[f'{prefix}_count'] = F(f'{prefix}_count') + delta.counts[field]
+        if delta.sums[field]:
+            changes[f'{prefix}_sum'] = F(f'{prefix}_sum') + delta.sums[field]
+    for field, value in delta.low.items():
+        column = f'{_PREFIX[field]}_min'
+        changes[column] = Least(Coalesce(F(column), Value(value)), Value(value))
+    for field, value in delta.high.items():
+        column = f'{_PREFIX[field]}_max'
+        changes[column] = Greatest(Coalesce(F(column), Value(value)), Value(value))
+    if not changes and not delta.gone_low:
+        return
+
+    if changes and not Table1Stats.objects.filter(pk=STATS_PK).update(updated_at=now(), **changes):
+        # No summary yet: build it from the table, which already includes this change
+        rebuild_table1_stats()
+        return
+    if delta.gone_low:
+        _refresh_extremes(delta)
+
+
+def _refresh_extremes(delta):
+    """Re-read min/max of fields whose current extreme may just have been removed."""
+    stats = get_table1_stats()
+    lookups = {}
+    for field, value in delta.gone_low.items():
+        column = f'{_PREFIX[field]}_min'
+        current = getattr(stats, column)
+        if current is None or value <= current:
+            lookups[column] = Min(field)
+    for field, value in delta.gone_high.items():
+        column = f'{_PREFIX[field]}_max'
+        current = getattr(stats, column)
+        if current is None or value >= current:
+            lookups[column] = Max(field)
+    if lookups:
+        Table1Stats.objects.filter(pk=STATS_PK).update(updated_at=now(), **Table1.objects.aggregate(**lookups))
+
+
+def rebuild_table1_stats():
+    """Recompute the summary from scratch (one aggregate query plus a link count)."""
+    aggregates = {'row_count': Count('id')}
+    for field in STATS_FIELDS:
+        prefix = _PREFIX[field]
+        if field in _SUMMED:
+            aggregates[f'{prefix}_count'] = Count(field)
+            aggregates[f'{prefix}_sum'] = Sum(field)
+        aggregates[f'{prefix}_min'] = Min(field)
+        aggregates[f'{prefix}_max'] = Max(field)
+    values = Table1.objects.aggregate(**aggregates)
+    for field in _SUMMED:
+        values[f'{_PREFIX[field]}_sum'] = values[f'{_PREFIX[field]}_sum'] or 0
+    values['link_count'] = table1_links().objects.count()
+    stats, _ = Table1Stats.objects.update_or_create(pk=STATS_PK, defaults=values)
+    return stats
+
+
+def get_table1_stats():
+    """The summary row (built on first use)."""
+    stats = Table1Stats.objects.filter(pk=STATS_PK).first()
+    return stats if stats is not None else rebuild_table1_stats()
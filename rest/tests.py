@@ -1,3 +1,778 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User, update_last_login
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.forms.models import model_to_dict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from pypdf import PdfReader
+
+from . import deletion, export_jobs, exports, user_log_search, user_roles
+from .audit import AuditLogWriter
+from .metrics import RequestMetrics, render_prometheus
+from .models import ExportJob, Table1, Table2, Table3, UserLog
+from .pdf_render import PDF_FIRST_PAGE_ROWS, PDF_PAGE_ROWS
+from .permission_cache import CachedPermissionBackend, get_permission_profile
+from .stats import get_table1_stats, rebuild_table1_stats
+
+
+# Password-change auditing compares against the hash the User was loaded with (rest/signals.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class PasswordChangeLogTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('alice', 'alice@example.com', 'first-Passw0rd')
+        self.user = User.objects.get(username='alice')
+
+    def password_changes(self):
+        return UserLog.objects.filter(event_type='password_change').count()
+
+    def test_last_login_update_costs_one_query(self):
+        # What django.contrib.auth.login() runs on every login
+        with self.assertNumQueries(1):
+            update_last_login(None, self.user)
+        self.assertEqual(self.password_changes(), 0)
+
+    def test_full_save_without_password_change_costs_one_query(self):
+        self.user.email = 'new@example.com'
+        with self.assertNumQueries(1):
+            self.user.save()
+        self.assertEqual(self.password_changes(), 0)
+
+    def test_password_change_is_logged(self):
+        self.user.set_password('second-Passw0rd')
+        # UPDATE auth_user + INSERT rest_userlog
+        with self.assertNumQueries(2):
+            self.user.save()
+        log = UserLog.objects.get(event_type='password_change')
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.username, 'alice')
+
+    def test_saving_again_after_a_change_is_not_logged_twice(self):
+        self.user.set_password('second-Passw0rd')
+        self.user.save()
+        self.user.save()
+        self.assertEqual(self.password_changes(), 1)
+
+    def test_password_assigned_on_deferred_instance_is_logged(self):
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+        user.set_password('second-Passw0rd')
+        user.save()
+        self.assertEqual(self.password_changes(), 1)
+
+    def test_password_read_lazily_on_deferred_instance_is_not_logged(self):
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+        self.assertTrue(user.check_password('first-Passw0rd'))
+        user.save()
+        self.assertEqual(self.password_changes(), 0)
+
+    def test_same_password_assigned_on_deferred_instance_is_not_logged(self):
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+        user.password = self.user.password
+        user.save()
+        self.assertEqual(self.password_changes(), 0)
+
+    def test_save_after_refresh_from_db_is_not_logged(self):
+        # Changed through another instance (e.g. another request) after self.user was loaded
+        other = User.objects.get(pk=self.user.pk)
+        other.set_password('second-Passw0rd')
+        other.save()
+        self.user.refresh_from_db()
+        self.user.email = 'new@example.com'
+        # The reloaded hash is compared with the stored one: SELECT + UPDATE
+        with self.assertNumQueries(2):
+            self.user.save()
+        self.assertEqual(self.password_changes(), 1)
+
+    def test_save_of_deferred_instance_without_password_is_not_logged(self):
+        user = User.objects.only('id', 'username', 'email').get(pk=self.user.pk)
+        user.email = 'other@example.com'
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertEqual(self.password_changes(), 0)
+
+
+# Auth events are buffered and written in batches (rest/audit.py)
+@override_settings(AUDIT_LOG_SYNC=False)
+class AuditLogWriterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='x')
+        self.writer = AuditLogWriter(flush_size=10, max_buffer=3)
+        # Flushes are driven by the test, not by the background thread
+        patcher = mock.patch.object(self.writer, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_events_wait_for_one_bulk_insert(self):
+        self.writer.record(user=self.user, username='alice', event_type='login', ip_address='10.0.0.1')
+        recorded_at = self.writer._buffer[0].timestamp
+        self.writer.record(username='mallory', event_type='login_failed')
+        self.assertFalse(UserLog.objects.exists())
+        with self.assertNumQueries(1):
+            self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(self.writer.flush(), 0)
+        login = UserLog.objects.get(event_type='login')
+        self.assertEqual((login.user, login.ip_address, login.timestamp), (self.user, '10.0.0.1', recorded_at))
+
+    def test_full_buffer_is_written_by_the_caller(self):
+        for _ in range(3):
+            self.writer.record(username='mallory', event_type='login_failed')
+        self.assertEqual(UserLog.objects.count(), 3)
+        self.assertEqual(self.writer._buffer, [])
+
+    def test_sync_setting_writes_at_once(self):
+        with override_settings(AUDIT_LOG_SYNC=True):
+            self.client.post('/login_rest_basic/', {'username': 'alice', 'password': 'wrong'})
+            self.client.post('/login_rest_basic/', {'username': 'alice', 'password': 'x'})
+        events = list(UserLog.objects.order_by('id').values_list('event_type', 'username'))
+        self.assertEqual(events, [('login_failed', 'alice'), ('login', 'alice')])
+
+
+
+# Table1Stats is kept up to date by deltas (rest/stats.py); it must match a full rebuild
+class Table1StatsTests(TestCase):
+    def setUp(self):
+        self.table3 = Table3.objects.create(duration_field=datetime.timedelta(0), email_field='a@example.com')
+        self.rows = [
+            Table1.objects.create(char_field=str(n), integer_field=n, float_field=n / 2,
+                                  date_field=datetime.date(2024, 1, n + 1))
+            for n in range(5)
+        ]
+        self.rows[0].many_to_many.add(self.table3)
+
+    def assertMatchesRebuild(self):
+        kept = model_to_dict(get_table1_stats(), exclude=['id', 'updated_at'])
+        self.assertEqual(kept, model_to_dict(rebuild_table1_stats(), exclude=['id', 'updated_at']))
+        return kept
+
+    def test_update_does_not_reread_the_row(self):
+        row = Table1.objects.get(pk=self.rows[2].pk)
+        row.integer_field = 40
+        with CaptureQueriesContext(connection) as queries:
+            row.save()
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('SELECT') and '"rest_table1"' in q['sql']])
+        self.assertEqual(self.assertMatchesRebuild()['integer_max'], 40)
+
+    def test_saving_twice_counts_the_change_once(self):
+        row = self.rows[1]
+        row.integer_field = 10
+        row.save()
+        row.save()
+        self.assertEqual(self.assertMatchesRebuild()['integer_sum'], 0 + 10 + 2 + 3 + 4)
+
+    def test_deferred_values_are_read_once(self):
+        row = Table1.objects.only('id', 'char_field', 'integer_field').get(pk=self.rows[4].pk)
+        row.integer_field = None
+        row.float_field = -1.0
+        row.save()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['integer_count'], stats['float_min']), (4, -1.0))
+
+    def test_removing_the_extreme_re_reads_it(self):
+        self.rows[4].delete()
+        self.rows[0].integer_field = 3
+        self.rows[0].save(update_fields=['integer_field'])
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['integer_min'], stats['integer_max'], stats['link_count']), (1, 3, 1))
+
+    def test_bulk_update_and_delete(self):
+        payload = [{'id': row.pk, 'integer_field': row.integer_field * 10} for row in self.rows[:3]]
+        self.client.put('/json_app/table1/', json.dumps(payload), content_type='application/json')
+        self.client.delete('/json_app/table1/', json.dumps({'id': self.rows[0].pk}), content_type='application/json')
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['row_count'], stats['integer_sum'], stats['link_count']), (4, 10 + 20 + 3 + 4, 0))
+
+
+# Permission profiles are cached across requests (rest/permission_cache.py) and keyed on table versions
+@override_settings(AUDIT_LOG_SYNC=True)
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        self.user = User.objects.create_user('alice', password='x')
+        self.backend = CachedPermissionBackend()
+
+    def load(self):
+        # What AuthenticationMiddleware does on every request
+        return self.backend.get_user(self.user.pk)
+
+    def test_warm_cache_needs_no_queries(self):
+        self.assertFalse(self.load().has_perm('rest.manage_users'))
+        user = self.load()
+        with self.assertNumQueries(0):
+            self.assertFalse(user.has_perm('rest.manage_users'))
+            self.assertEqual(get_permission_profile(user)['role'], 'No role assigned')
+
+    def test_group_membership_change_is_seen_on_the_next_request(self):
+        self.assertFalse(self.load().has_perm('rest.manage_users'))
+        self.user.groups.add(Group.objects.get(name='Admins'))
+        user = self.load()
+        self.assertTrue(user.has_perm('rest.manage_users'))
+        self.assertEqual(get_permission_profile(user)['role'], 'Administrator')
+
+    def test_group_permission_change_is_seen_on_the_next_request(self):
+        self.user.groups.add(Group.objects.get(name='Customers'))
+        self.assertTrue(self.load().has_perm('rest.view_data'))
+        Group.objects.get(name='Customers').permissions.clear()
+        self.assertFalse(self.load().has_perm('rest.view_data'))
+
+    def test_sessions_logged_in_through_model_backend_stay_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get('/profile_rest_basic/').status_code, 200)
+
+
+# Background exports (rest/export_jobs.py): one job per export, artifacts reused while the data is unchanged
+@override_settings(AUDIT_LOG_SYNC=True)
+class ExportJobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        # Jobs run in the test's thread and connection instead of the pool
+        for name, value in (('_job_executor', mock.Mock()), ('connection', mock.Mock())):
+            patcher = mock.patch.object(export_jobs, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('alice', password='x')
+        self.client.force_login(self.user)
+        Table1.objects.create(char_field='row', integer_field=7)
+
+    def start(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/export_jobs', {'format': 'xlsx', **params})
+
+    def run_jobs(self):
+        for call in export_jobs._job_executor().submit.call_args_list:
+            export_jobs.run_export_job(*call.args[1:])
+        export_jobs._job_executor().submit.reset_mock()
+
+    def test_repeat_request_joins_the_active_job(self):
+        first = self.start().json()
+        self.assertEqual(self.start().json()['id'], first['id'])
+        self.assertEqual(export_jobs._job_executor().submit.call_count, 1)
+
+    def test_stale_job_is_not_joined(self):
+        first = self.start().json()
+        ExportJob.objects.update(updated_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertNotEqual(self.start().json()['id'], first['id'])
+
+    def test_artifact_is_reused_until_the_data_changes(self):
+        job = self.start().json()
+        self.run_jobs()
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual((status['status'], status['rows_done']), ('done', 1))
+        self.assertTrue(os.path.exists(ExportJob.objects.get(pk=job['id']).path))
+        response = self.start()
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'done'))
+        Table1.objects.create(char_field='new')
+        response = self.start()
+        self.assertEqual((response.status_code, response.json()['status']), (202, 'queued'))
+
+    def test_active_jobs_per_user_are_capped(self):
+        for n in range(export_jobs.EXPORT_JOBS_PER_USER):
+            self.assertEqual(self.start(integer_field__gte=n).status_code, 202)
+        response = self.start(integer_field__gte=99)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('error', response.json())
+
+    def test_jobs_need_login_and_stay_private(self):
+        job = self.start().json()
+        self.client.force_login(User.objects.create_user('bob', password='x'))
+        self.assertEqual(self.client.get(job['status_url']).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.post('/export_jobs', {'format': 'xlsx'}).status_code, 302)
+
+
+# export_excel writes a write-only workbook chunk by chunk (rest/exports.py)
+class ExcelExportTests(TestCase):
+    def test_workbook_has_every_row_in_id_order(self):
+        moment = datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=datetime.timezone.utc)
+        for n in range(5):
+            Table1.objects.create(char_field=f'row{n}', integer_field=n, datetime_field=moment)
+        # Several cursor chunks for five rows
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 2):
+            response = self.client.get('/export_excel')
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Type'], exports.XLSX_CONTENT_TYPE)
+        rows = list(load_workbook(BytesIO(content), read_only=True)['Table1'].iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), [header for header, _, _ in exports.EXCEL_COLUMNS])
+        self.assertEqual([row[3] for row in rows[1:]], [f'row{n}' for n in range(5)])
+        # Excel has no time zones: the UTC value is written naive
+        self.assertEqual(rows[1][8], datetime.datetime(2024, 5, 6, 7, 8, 9))
+
+
+# export_pdf renders whole-page partitions and concatenates them in row order
+class PdfExportTests(TestCase):
+    def setUp(self):
+        Table1.objects.bulk_create(
+            Table1(char_field=f'row{n}', integer_field=n) for n in range(PDF_FIRST_PAGE_ROWS + PDF_PAGE_ROWS + 3)
+        )
+        # One page per partition: three pages, three partitions
+        patcher = mock.patch.object(exports, 'PDF_PAGES_PER_PARTITION', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_partitions_are_whole_pages(self):
+        total = PDF_FIRST_PAGE_ROWS + 2 * PDF_PAGE_ROWS + 1
+        sizes = [(len(chunk), with_title) for chunk, with_title in exports._pdf_partitions(range(total))]
+        self.assertEqual(sizes[0], (PDF_FIRST_PAGE_ROWS, True))
+        self.assertTrue(all(size == PDF_PAGE_ROWS and not title for size, title in sizes[1:-1]))
+        self.assertEqual(sizes[-1], (1, False))
+        self.assertEqual(sum(size for size, _ in sizes), total)
+        # An empty table still gets the title page
+        self.assertEqual(list(exports._pdf_partitions([])), [([], True)])
+
+    def pages(self):
+        response = self.client.get('/export_pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return [page.extract_text() for page in PdfReader(BytesIO(b''.join(response.streaming_content))).pages]
+
+    def test_pages_keep_row_order(self):
+        with mock.patch.object(exports, 'PDF_EXPORT_WORKERS', 1):
+            pages = self.pages()
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(pages[0].startswith('Table1 Data Export'))
+        self.assertIn('Text: row0 ', pages[0])
+        self.assertIn(f'Text: row{PDF_FIRST_PAGE_ROWS} ', pages[1])
+        self.assertIn(f'Text: row{PDF_FIRST_PAGE_ROWS + PDF_PAGE_ROWS + 2} ', pages[2])
+
+    def test_process_pool_gives_the_same_document(self):
+        with mock.patch.object(exports, 'PDF_EXPORT_WORKERS', 1):
+            expected = self.pages()
+        with mock.patch.object(exports, 'PDF_EXPORT_WORKERS', 2), mock.patch.object(exports, '_pool', None):
+            pages = self.pages()
+            pool = exports._pool
+        self.assertIsNotNone(pool)
+        self.addCleanup(pool.shutdown)
+        self.assertEqual(pages, expected)
+
+
+# Bulk Table1 deletes with file cleanup once the transaction commits (rest/deletion.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class DeleteTable1Tests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        self.rows = []
+        for n in range(5):
+            row = Table1.objects.create(char_field=f'row{n}', file_field=ContentFile(b'data', name=f'row{n}.txt'))
+            row.many_to_many.add(email)
+            self.rows.append(row)
+        self.paths = [row.file_field.path for row in self.rows]
+
+    def wait_for_cleanup(self):
+        # One worker: anything queued before this has run once it returns
+        deletion._cleanup_executor().submit(lambda: None).result()
+
+    def test_rows_links_and_files_go_in_batches(self):
+        ids = [row.pk for row in self.rows[:4]]
+        with mock.patch.object(deletion, 'DELETE_BATCH_SIZE', 3), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(deletion.delete_table1(ids + ids[:1]), 4)
+        self.wait_for_cleanup()
+        self.assertEqual(list(Table1.objects.values_list('char_field', flat=True)), ['row4'])
+        self.assertEqual([os.path.exists(path) for path in self.paths], [False] * 4 + [True])
+        stats = get_table1_stats()
+        self.assertEqual((stats.row_count, stats.link_count), (1, 1))
+
+    def test_files_stay_when_the_transaction_rolls_back(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                deletion.delete_table1([self.rows[0].pk])
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertTrue(Table1.objects.filter(pk=self.rows[0].pk).exists())
+        self.assertTrue(os.path.exists(self.paths[0]))
+
+    def test_checked_rows_are_deleted_from_the_page(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        user = User.objects.create_user('alice', password='x')
+        user.groups.add(Group.objects.get(name='Admins'))
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/delete_data_2', {'delete_ids': [self.rows[0].pk, self.rows[1].pk]}, follow=True)
+        self.assertIn('2 record(s) permanently deleted.', response.content.decode())
+        self.assertEqual(Table1.objects.count(), 3)
+
+
+# user_management lists users with annotated roles, paged by username (rest/user_roles.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class UserManagementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        self.admins, self.customers = Group.objects.get(name='Admins'), Group.objects.get(name='Customers')
+        self.admin = User.objects.create_user('admin', password='x')
+        self.admin.groups.add(self.admins)
+        self.both = User.objects.create_user('both', 'both@example.com', password='x')
+        self.both.groups.add(self.admins, self.customers)
+        self.customer = User.objects.create_user('customer', password='x')
+        self.customer.groups.add(self.customers)
+        self.plain = User.objects.create_user('plain', 'plain@example.org', password='x')
+        self.client.force_login(self.admin)
+
+    def listing(self, **params):
+        response = self.client.get('/user_management', params)
+        self.assertEqual(response.status_code, 200)
+        return {user.username: user.role for user in response.context['users']}, response.context['pagination']
+
+    def test_roles_are_annotated_with_admins_first(self):
+        roles, _ = self.listing()
+        self.assertEqual(roles, {'admin': 'admin', 'both': 'admin', 'customer': 'customer', 'plain': 'none'})
+
+    def test_pages_and_search(self):
+        with mock.patch.object(user_roles, 'USER_PAGE_SIZE', 3):
+            first, pagination = self.listing()
+            second, _ = self.listing(cursor=pagination['next_cursor'])
+        self.assertEqual((list(first), list(second)), (['admin', 'both', 'customer'], ['plain']))
+        self.assertEqual(list(self.listing(q='example.org')[0]), ['plain'])
+
+    def test_bulk_role_change(self):
+        response = self.client.post('/user_management', {'user_ids': [self.both.pk, self.plain.pk], 'role': 'customer'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(self.both.groups.all()), [self.customers])
+        self.assertEqual(list(self.plain.groups.all()), [self.customers])
+        # The permission cache sees the new membership at once
+        self.assertTrue(CachedPermissionBackend().get_user(self.plain.pk).has_perm('rest.view_data'))
+
+    def test_single_row_removes_every_role(self):
+        self.client.post('/user_management', {'user_id': self.customer.pk, f'role_{self.customer.pk}': 'none'})
+        self.assertFalse(self.customer.groups.exists())
+
+    def test_unknown_role_changes_nothing(self):
+        response = self.client.post('/user_management', {'user_ids': [self.plain.pk], 'role': 'root'}, follow=True)
+        self.assertIn("Unknown role 'root'", response.content.decode())
+        self.assertFalse(self.plain.groups.exists())
+
+
+# user_logs filters on indexed columns and pages newest first (rest/user_log_search.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class UserLogViewerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        admin = User.objects.create_user('admin', password='x')
+        admin.groups.add(Group.objects.get(name='Admins'))
+        self.client.force_login(admin)
+        UserLog.objects.all().delete()
+
+        def at(day, hour):
+            return timezone.make_aware(datetime.datetime(2024, 3, day, hour))
+
+        self.logs = UserLog.objects.bulk_create([
+            UserLog(username='alice', event_type='login', ip_address='10.0.0.1', timestamp=at(1, 9)),
+            UserLog(username='bob', event_type='login_failed', ip_address='10.0.0.2', timestamp=at(1, 23)),
+            UserLog(username='alice', event_type='logout', ip_address='10.0.0.1', timestamp=at(2, 0)),
+            UserLog(username='alice', event_type='login', ip_address='10.0.0.3', timestamp=at(3, 12)),
+        ])
+
+    def page(self, **params):
+        response = self.client.get('/user_logs', params)
+        self.assertEqual(response.status_code, 200)
+        return [log.pk for log in response.context['logs']], response.context
+
+    def ids(self, *positions):
+        return [self.logs[position].pk for position in positions]
+
+    def test_filters_are_exact_and_dates_inclusive(self):
+        self.assertEqual(self.page()[0], self.ids(3, 2, 1, 0))
+        self.assertEqual(self.page(username='alice', event_type='login')[0], self.ids(3, 0))
+        self.assertEqual(self.page(username='ali')[0], [])
+        self.assertEqual(self.page(ip_address='10.0.0.1')[0], self.ids(2, 0))
+        self.assertEqual(self.page(since='2024-03-01', until='2024-03-01')[0], self.ids(1, 0))
+
+    def test_pages_keep_the_filters(self):
+        with mock.patch.object(user_log_search, 'LOG_PAGE_SIZE', 1):
+            first, context = self.page(username='alice')
+            second, _ = self.page(username='alice', cursor=context['pagination']['next_cursor'])
+        self.assertEqual((first, second), (self.ids(3), self.ids(2)))
+        self.assertEqual(context['filter_query'], 'username=alice')
+
+    def test_invalid_filters_show_no_rows(self):
+        logs, context = self.page(since='2024-03-02', until='2024-03-01')
+        self.assertEqual(logs, [])
+        self.assertFalse(context['form'].is_valid())
+
+    def test_manage_users_permission_is_required(self):
+        self.client.force_login(User.objects.create_user('mallory', password='x'))
+        session = self.client.session
+        session['home_url'] = 'home_rest_basic'
+        session.save()
+        self.assertEqual(self.client.get('/user_logs').status_code, 403)
+
+
+# delete_logs purges expired UserLog rows in batches, archiving them first (rest/log_retention.py)
+class LogRetentionTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        old = timezone.now() - datetime.timedelta(days=100)
+        # Equal timestamps: the keyset walk must not skip or repeat ties at batch edges
+        self.expired = UserLog.objects.bulk_create(
+            UserLog(username=f'user{n}', event_type='login', timestamp=old + datetime.timedelta(seconds=n // 3))
+            for n in range(7)
+        )
+        self.kept = UserLog.objects.create(username='recent', event_type='logout')
+
+    def purge(self, *args):
+        stdout = StringIO()
+        call_command('delete_logs', '--batch-size', '3', *args, verbosity=2, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_batches_are_archived_then_deleted(self):
+        out = self.purge('--archive-dir', self.directory)
+        self.assertIn('3 deleted\n6 deleted\n7 deleted\n', out)
+        self.assertIn('7 user logs older than 90 days deleted. Archived to', out)
+        self.assertEqual(list(UserLog.objects.all()), [self.kept])
+
+        [name] = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name), 'rb') as handle:
+            data = handle.read()
+        members = []
+        while data:
+            member = zlib.decompressobj(wbits=31)
+            members.append(member.decompress(data).decode().splitlines())
+            data = member.unused_data
+        self.assertEqual([len(lines) for lines in members], [3, 3, 1])
+        rows = [json.loads(line) for lines in members for line in lines]
+        self.assertEqual([row['id'] for row in rows], [log.pk for log in self.expired])
+        self.assertEqual(rows[0]['username'], 'user0')
+
+    def test_nothing_expired_leaves_no_archive(self):
+        UserLog.objects.filter(pk__in=[log.pk for log in self.expired]).delete()
+        out = self.purge('--archive-dir', self.directory)
+        self.assertIn('0 user logs older than 90 days deleted.', out)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_days_window(self):
+        self.purge('--days', '101')
+        self.assertEqual(UserLog.objects.count(), 8)
+
+
+# Server-side pages for the CRUD tables in the DataTables protocol (rest/datatables.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class DataTablesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        user = User.objects.create_user('alice', password='x')
+        user.groups.add(Group.objects.get(name='Customers'))
+        self.client.force_login(user)
+        email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+        self.rows = [Table1.objects.create(char_field=f'row{n}', integer_field=n % 3) for n in range(6)]
+        self.rows[4].many_to_many.add(email)
+
+    def page(self, table='table1', **params):
+        columns = {f'columns[{index}][data]': name for index, name in enumerate(['id', 'integer_field', 'many_to_many'])}
+        response = self.client.get(f'/datatables/{table}', {**columns, **params})
+        return response.status_code, response.json()
+
+    def test_page_is_ordered_and_sliced(self):
+        status, body = self.page(**{'draw': 7, 'start': 1, 'length': 3, 'order[0][column]': 1, 'order[0][dir]': 'desc'})
+        self.assertEqual(status, 200)
+        self.assertEqual((body['draw'], body['recordsTotal'], body['recordsFiltered']), (7, 6, 6))
+        # integer_field 2, 2, 1, 1, 0, 0 with id breaking ties
+        expected = [self.rows[5], self.rows[1], self.rows[4]]
+        self.assertEqual([row['DT_RowId'] for row in body['data']], [f'table1-{row.pk}' for row in expected])
+        self.assertEqual(body['data'][2]['many_to_many'], 'bob@example.com')
+        self.assertEqual(body['data'][2]['DT_RowData']['integer_field'], 1)
+
+    def test_search_counts_the_filtered_rows(self):
+        status, body = self.page(**{'search[value]': 'bob@'})
+        self.assertEqual((status, body['recordsTotal'], body['recordsFiltered']), (200, 6, 1))
+        self.assertEqual(body['data'][0]['id'], self.rows[4].pk)
+
+    def test_table3_page(self):
+        status, body = self.page('table3', **{'columns[0][data]': 'email_field', 'order[0][column]': 0})
+        self.assertEqual((status, body['recordsTotal']), (200, 1))
+        self.assertEqual(body['data'][0]['DT_RowData']['email_field'], 'bob@example.com')
+
+    def test_bad_requests_are_400(self):
+        self.assertEqual(self.page('table9')[0], 400)
+        self.assertEqual(self.page(**{'order[0][column]': 9})[0], 400)
+        self.assertEqual(self.page(start='first')[0], 400)
+
+    def test_view_data_permission_is_required(self):
+        self.client.force_login(User.objects.create_user('mallory', password='x'))
+        # Set by the login view; the 403 page links back to it
+        session = self.client.session
+        session['home_url'] = 'home_rest_basic'
+        session.save()
+        self.assertEqual(self.client.get('/datatables/table1').status_code, 403)
+
+
+# CSV / NDJSON row exports stream filtered Table1 rows (rest/exports.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class RowExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('alice', password='x'))
+        for n in range(3):
+            Table1.objects.create(char_field=f'row, "{n}"', integer_field=n, date_field=datetime.date(2024, 1, 1))
+
+    def body(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_is_filtered_and_quoted(self):
+        rows = list(csv.reader(self.body('/export_csv', integer_field__gte=1).splitlines()))
+        self.assertEqual(rows[0][:4], ['id', 'char_field', 'text_field', 'integer_field'])
+        self.assertEqual([row[1] for row in rows[1:]], ['row, "1"', 'row, "2"'])
+
+    def test_ndjson_has_one_object_per_row(self):
+        items = [json.loads(line) for line in self.body('/export_ndjson').splitlines()]
+        self.assertEqual([item['integer_field'] for item in items], [0, 1, 2])
+        self.assertEqual(items[0]['date_field'], '2024-01-01')
+
+    def test_invalid_filter_and_anonymous_client_are_refused(self):
+        self.assertEqual(self.client.get('/export_csv', {'integer_field__gte': 'many'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get('/export_ndjson').status_code, 302)
+
+
+# Latency histograms behind /metrics (rest/metrics.py)
+@override_settings(AUDIT_LOG_SYNC=True)
+class MetricsTests(TestCase):
+    def make_metrics(self):
+        recorder = RequestMetrics(buckets=(0.1, 1.0))
+        self.addCleanup(recorder.stop)
+        return recorder
+
+    def test_no_writer_thread_without_metrics_dir(self):
+        recorder = self.make_metrics()
+        with override_settings(METRICS_DIR=''):
+            recorder.observe('home', 'GET', 0.05)
+        self.assertIsNone(recorder._thread)
+        self.assertEqual(recorder.collect(), {('home', 'GET'): [1, 0, 0, 0.05]})
+
+    def test_prometheus_buckets_are_cumulative(self):
+        recorder = self.make_metrics()
+        for seconds in (0.05, 0.5, 5.0):
+            recorder.observe('home', 'GET', seconds)
+        text = render_prometheus(recorder.collect(), buckets=(0.1, 1.0))
+        labels = 'route="home",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1\n', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="1.0"}} 2\n', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3\n', text)
+        self.assertIn(f'http_request_duration_seconds_sum{{{labels}}} 5.55\n', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 3\n', text)
+
+    def test_collect_merges_other_workers_shards(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        with override_settings(METRICS_DIR=directory):
+            worker = self.make_metrics()
+            worker.observe('home', 'GET', 0.5)
+            self.assertIsNotNone(worker._thread)
+            worker.stop()
+            scraper = self.make_metrics()
+            scraper.observe('home', 'GET', 0.05)
+            self.assertEqual(scraper.collect(), {('home', 'GET'): [1, 1, 0, 0.55]})
+
+    def test_view_needs_manage_users_or_an_allowed_ip(self):
+        cache.clear()
+        call_command('setup_permissions', stdout=StringIO())
+        user = User.objects.create_user('alice', password='x')
+        self.client.force_login(user)
+        # Set by the login view; the 403 page links back to it
+        session = self.client.session
+        session['home_url'] = 'home_rest_basic'
+        session.save()
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+        user.groups.add(Group.objects.get(name='Admins'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+        self.assertRegex(response['Server-Timing'], r'^app;dur=\d+\.\d$')
+
+
+# Batched Table1 imports (rest/imports.py, manage.py import_table1)
+class ImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.linked, self.free = Table2.objects.create(), Table2.objects.create()
+        Table1.objects.create(char_field='stored', one_to_one=self.linked)
+        self.email = Table3.objects.create(email_field='bob@example.com', duration_field=datetime.timedelta(hours=1))
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+        return path
+
+    def run_import(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_table1', path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_valid_rows_are_written_with_links(self):
+        path = self.write('rows.csv', (
+            'id,char_field,integer_field,date_field,foreign_key,many_to_many\n'
+            f'99,first,1,2024-01-02,{self.free.pk},bob@example.com\n'
+            f',second,,,,{self.email.pk}\n'
+        ))
+        out, err = self.run_import(path)
+        self.assertIn('2 Table1 rows imported with 2 links', out)
+        self.assertEqual(err, '')
+        first = Table1.objects.get(char_field='first')
+        self.assertNotEqual(first.pk, 99)
+        self.assertEqual(first.date_field, datetime.date(2024, 1, 2))
+        self.assertEqual(list(first.many_to_many.all()), [self.email])
+        self.assertEqual(get_table1_stats().row_count, 3)
+
+    def test_invalid_records_are_reported_by_line(self):
+        path = self.write('rows.jsonl', '\n'.join([
+            '{"char_field": "ok"}',
+            '{"char_field": "bad", "integer_field": "many"}',
+            'not json',
+            '{"char_field": "far", "foreign_key": 12345}',
+            '{"char_field": "who", "many_to_many": ["nobody@example.com"]}',
+        ]) + '\n')
+        out, err = self.run_import(path)
+        self.assertIn('1 Table1 rows imported', out)
+        self.assertIn('4 invalid records skipped', out)
+        self.assertIn('Line/row 2: integer_field:', err)
+        self.assertIn('Line/row 3: __all__: Invalid JSON', err)
+        self.assertIn('Line/row 4: foreign_key: Table2 12345 not found', err)
+        self.assertIn("Line/row 5: many_to_many: Table3 not found: ['nobody@example.com']", err)
+
+    def test_one_to_one_taken_in_the_table_or_earlier_in_the_file(self):
+        path = self.write('rows.csv', (
+            'char_field,one_to_one\n'
+            f'clash,{self.linked.pk}\n'
+            f'first,{self.free.pk}\n'
+            f'again,{self.free.pk}\n'
+        ))
+        # Batches of one: the in-file duplicate is caught across batches too
+        out, err = self.run_import(path, '--batch-size', '1')
+        self.assertIn('1 Table1 rows imported', out)
+        self.assertIn(f'Line/row 2: one_to_one: Table2 {self.linked.pk} is already linked', err)
+        self.assertIn(f'Line/row 4: one_to_one: Table2 {self.free.pk} is already linked', err)
+        self.assertEqual(Table1.objects.get(one_to_one=self.free).char_field, 'first')
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write('rows.csv', 'char_field\nfirst\n')
+        out, _ = self.run_import(path, '--dry-run')
+        self.assertIn('1 Table1 rows would be imported (dry run)', out)
+        self.assertEqual(Table1.objects.count(), 1)
@@ -14,6 +14,8 @@ urlpatterns = [
     path('profile_rest_basic/', views.profile, name='profile_rest_basic'),
     path('user_management', views.user_management, name='user_management'),
     path('user_logs', views.user_logs, name='user_logs'),
+    # Prometheus metrics (rest/metrics.py)
+    path('metrics', views.metrics, name='metrics'),
     # CRUD operations
     #path('crud', views.crud, name='crud'),
     path('get_data', views.get_data, name='get_data'),
@@ -28,6 +30,8 @@ urlpatterns = [
     path('update_form/<str:table>/<int:id>', views.update_form, name='update_form'),
     path('add_data_form', views.add_data_form, name='add_data_form'),
     path('update_data_form', views.update_data_form, name='update_data_form'),
+    # Server-side processing for the CRUD tables
+    path('datatables/<str:table>', views.datatables_data, name='datatables_data'),
     # DataTables integration
     path('making_queries', views.making_queries, name='making_queries'),
     path('all_example', views.all_example, name='all_example'),
@@ -49,6 +53,11 @@ urlpatterns = [
     path('export_to_file', views.export_to_file, name='export_to_file'),
     path('export_pdf', views.export_pdf, name='export_pdf'),
     path('export_excel', views.export_excel, name='export_excel'),
+    path('export_csv', views.export_csv, name='export_csv'),
+    path('export_ndjson', views.export_ndjson, name='export_ndjson'),
+    path('export_jobs', views.export_job_start, name='export_job_start'),
+    path('export_jobs/<uuid:job_id>', views.export_job_status, name='export_job_status'),
+    path('export_jobs/<uuid:job_id>/download', views.export_job_download, name='export_job_download'),
     # Email sending
     path('send_email', views.email_send, name='email_send'),
     # Template tags and filters
@@ -0,0 +1,61 @@
+"""Filtered, keyset-paginated reads of UserLog for the user_logs page.
+
+The page used to show the latest 15 rows and nothing else, and UserLog had
+no index besides its primary key and user_id. Every filter the page offers
+is now an equality on the leading column of an index:
+
+- (timestamp, id)                   no filter, date range only
+- (username, timestamp, id)
+- (event_type, timestamp, id)
+- (ip_address, timestamp, id)
+
+The date range and the page cursor are both ranges on timestamp, the next
+column of the same index. So the database reads one contiguous index range
+and stops after LOG_PAGE_SIZE + 1 rows, however large the table is. Pages
+are keyset pages on -timestamp (json_app.pagination). Nothing is counted:
+a COUNT(*) over months of history would cost more than the page itself.
+
+Username is matched exactly, not with icontains. A substring match cannot
+use the index and would scan the whole table. The username is stored on
+the row, so events of deleted users can still be found.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+from json_app.pagination import keyset_paginate
+from .models import UserLog
+
+LOG_PAGE_SIZE = 50
+
+
+def _start_of(day):
+    # Dates are whole days in the current time zone
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filter_logs(username='', ip_address=None, event_type='', since=None, until=None):
+    """UserLog rows matching the filters; since / until are inclusive dates."""
+    queryset = UserLog.objects.all()
+    if username:
+        queryset = queryset.filter(username=username)
+    if ip_address:
+        queryset = queryset.filter(ip_address=ip_address)
+    if event_type:
+        queryset = queryset.filter(event_type=event_type)
+    if since:
+        queryset = queryset.filter(timestamp__gte=_start_of(since))
+    if until:
+        queryset = queryset.filter(timestamp__lt=_start_of(until + datetime.timedelta(days=1)))
+    return queryset
+
+
+def log_page(filters=None, cursor=''):
+    """Return (logs, pagination) for one page, newest first.
+
+    filters are filter_logs() keyword arguments (UserLogFilterForm.cleaned_data).
+    Raises json_app.pagination.InvalidCursor for a tampered cursor.
+    """
+    queryset = filter_logs(**(filters or {}))
+    return keyset_paginate(queryset, {'cursor': cursor, 'sort': '-timestamp'}, LOG_PAGE_SIZE)
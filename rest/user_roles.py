@@ -0,0 +1,95 @@
+"""Role listing and bulk role changes for the user_management page.
+
+The page used to load every User and ask two groups.filter().exists()
+questions per user, so the query count and the page size grew with the
+user table. Now it uses one query per page:
+
+- is_admin / is_customer are Exists() subqueries on auth_user_groups, and
+  role is a Case() over them. Admins wins when a user is in both groups,
+  the same precedence the old loop used.
+- Pages are keyset pages on username (json_app.pagination), so page 500
+  costs the same as page 1. The username/email search (q) is applied before
+  paginating.
+
+Role changes take a list of user ids. Group rows are replaced with one
+DELETE and one bulk INSERT on the through table, inside a transaction. The
+old code called groups.clear() and groups.add() for each user instead.
+The write bumps the membership version, which invalidates the permission
+cache (rest.permission_cache).
+"""
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+
+from json_app.pagination import keyset_paginate
+from .versioning import bump_version
+
+# role value -> group name; 'none' removes the user from every group
+ROLE_GROUPS = {
+    'admin': 'Admins',
+    'customer': 'Customers',
+}
+ROLE_LABELS = {
+    'admin': 'Administrator',
+    'customer': 'Customer',
+    'none': 'No role',
+}
+USER_PAGE_SIZE = 50
+
+
+class RoleError(ValueError):
+    """Raised for a role change that cannot be applied."""
+
+
+def _member_of(group_name):
+    memberships = User.groups.through.objects.filter(user_id=OuterRef('pk'), group__name=group_name)
+    return Exists(memberships)
+
+
+def users_with_roles(queryset=None):
+    """Users annotated with is_admin, is_customer and role ('admin' | 'customer' | 'none')."""
+    queryset = User.objects.all() if queryset is None else queryset
+    return queryset.only('id', 'username', 'email').annotate(
+        is_admin=_member_of(ROLE_GROUPS['admin']),
+        is_customer=_member_of(ROLE_GROUPS['customer']),
+    ).annotate(
+        role=Case(
+            When(is_admin=True, then=Value('admin')),
+            When(is_customer=True, then=Value('customer')),
+            default=Value('none'),
+        ),
+    )
+
+
+def user_page(search='', cursor=''):
+    """Return (users, pagination) for one page ordered by username.
+
+    Raises json_app.pagination.InvalidCursor for a tampered cursor.
+    """
+    queryset = users_with_roles()
+    search = search.strip()
+    if search:
+        queryset = queryset.filter(Q(username__icontains=search) | Q(email__icontains=search))
+    return keyset_paginate(queryset, {'cursor': cursor, 'sort': 'username'}, USER_PAGE_SIZE)
+
+
+def set_role(user_ids, role):
+    """Give every user in user_ids exactly the group for role; return how many users matched."""
+    if role not in ROLE_LABELS:
+        raise RoleError(f"Unknown role '{role}'")
+    group = None
+    if role in ROLE_GROUPS:
+        group = Group.objects.filter(name=ROLE_GROUPS[role]).first()
+        if group is None:
+            raise RoleError(f"Group '{ROLE_GROUPS[role]}' does not exist (run setup_permissions)")
+
+    memberships = User.groups.through
+    with transaction.atomic():
+        ids = list(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        memberships.objects.filter(user_id__in=ids).delete()
+        if group is not None:
+            memberships.objects.bulk_create([memberships(user_id=pk, group_id=group.pk) for pk in ids])
+        # No m2m_changed for through-table writes: invalidate the permission cache here
+        bump_version(memberships)
+    return len(ids)
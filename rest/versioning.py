@@ -0,0 +1,118 @@
+"""Per-table version counters used to invalidate caches and build ETags.
+
+Every write to a tracked table bumps its TableVersion row (post_save /
+post_delete receivers in rest.signals). Bulk queryset operations such as
+update() or bulk_create() do not send those signals, so code using them must
+call bump_version() itself. Wrap bulk work in coalesce_version_bumps() so a
+set-based delete (which still sends post_delete per row) costs one bump per
+table instead of one per row.
+
+Readers compare a cheap version lookup instead of re-reading whole tables:
+    token = version_token(Table2, Table3)   # e.g. '4.17'
+
+    @condition(etag_func=versioned_etag(Table1, Table2, Table3))
+    def my_json_view(request): ...          # 304 without touching the rows
+"""
+
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+
+from .models import TableVersion
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+_pending = threading.local()
+
+
+@contextmanager
+def coalesce_version_bumps():
+    """Collect bumps made inside the block and apply one per table on exit.
+
+    Use it inside the transaction doing the writes so the bump commits (or
+    rolls back) together with them.
+    """
+    outermost = getattr(_pending, 'labels', None) is None
+    if outermost:
+        _pending.labels = set()
+    try:
+        yield
+        if outermost:
+            _apply_bumps(_pending.labels)
+    finally:
+        if outermost:
+            _pending.labels = None
+
+
+def _apply_bumps(labels):
+    for label in sorted(labels):
+        updated = TableVersion.objects.filter(label=label).update(version=F('version') + 1)
+        if not updated:
+            TableVersion.objects.get_or_create(label=label, defaults={'version': 1})
+
+
+def bump_version(*models):
+    """Increment the version of each model's table (deferred inside coalesce_version_bumps)."""
+    labels = {_label(model) for model in models}
+    pending = getattr(_pending, 'labels', None)
+    if pending is not None:
+        pending.update(labels)
+    else:
+        _apply_bumps(labels)
+
+
+def get_versions(*models):
+    """Return {model: version} with a single query (0 for never-written tables)."""
+    labels = {_label(model): model for model in models}
+    stored = dict(
+        TableVersion.objects.filter(label__in=labels).values_list('label', 'version')
+    )
+    return {model: stored.get(label, 0) for label, model in labels.items()}
+
+
+async def aget_versions(*models):
+    """get_versions() for async views."""
+    return await sync_to_async(get_versions)(*models)
+
+
+def version_token(*models):
+    """Compact token that changes whenever any of the given tables changes."""
+    versions = get_versions(*models)
+    return '.'.join(str(versions[model]) for model in models)
+
+
+def _etag(request, versions):
+    parts = [request.get_full_path()]
+    parts += [f'{_label(model)}:{version}' for model, version in versions.items()]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def versioned_etag(*models):
+    """Build an etag_func for django.views.decorators.http.condition.
+
+    The ETag is a hash of the full request path (query string included) and
+    the current versions of every table the response is built from, so it
+    changes exactly when the body could change. Only GET/HEAD get an ETag;
+    writes skip the version lookup entirely.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        return _etag(request, get_versions(*models))
+    return etag_func
+
+
+def aversioned_etag(*models):
+    """Coroutine version of versioned_etag() (condition() calls etag_func
+    synchronously, so async views await this one themselves)."""
+    async def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        return _etag(request, await aget_versions(*models))
+    return etag_func
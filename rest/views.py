@@ -1,8 +1,8 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, HttpResponseRedirect, Http404
+from django.http import HttpResponse, HttpResponseRedirect, Http404, JsonResponse, FileResponse
 
 #data
-from .models import Table3, Table2, Table1, UserLog
+from .models import Table3, Table2, Table1, ExportJob
 import datetime
 from django.utils.dateparse import parse_duration, parse_date, parse_time, parse_datetime
 from django.utils import timezone
@@ -10,7 +10,7 @@ from django.utils import timezone
 #message
 from django.contrib import messages
 #forms
-from .forms import Table1Form, Table2Form, Table3Form
+from .forms import Table1Form, Table2Form, Table3Form, UserLogFilterForm
 
 #user
 from django.contrib.auth.models import User, Group
@@ -27,14 +27,22 @@ from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 
 # Django ORM imports
-from django.db.models import Max, Count, Q, Min, Avg, F
+from django.db import transaction
+from django.db.models import Max, Q, F
 
 #pdf / excel
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from openpyxl import Workbook
-from django.utils.timezone import is_aware
-from openpyxl.utils import get_column_letter
+from .exports import excel_response, pdf_response, rows_response
+from .export_jobs import start_export, export_job_payload, ExportJobError
+from .stats import get_table1_stats
+from .datatables import table_page, DataTablesError
+from .permission_cache import get_permission_profile
+from .deletion import delete_table1
+from .versioning import bump_version
+from .user_roles import user_page, set_role, RoleError, ROLE_LABELS
+from .user_log_search import log_page
+from .metrics import render_prometheus, request_metrics
+from json_app.filters import FilterError, filter_table1
+from json_app.pagination import InvalidCursor
 
 ###### 
 # Used to test the error 403
@@ -160,19 +168,10 @@ def user_login(request):
 def profile(request):
     user = request.user
     
-    # Determine user role
-    if user.groups.filter(name='Admins').exists():
-        role = 'Administrator'
-    elif user.groups.filter(name='Customers').exists():
-        role = 'Customer'
-    else:
-        role = 'No role assigned'
-    
-    # Get user permissions
-    user_permissions = []
-    for group in user.groups.all():
-        for permission in group.permissions.all():
-            user_permissions.append(permission.name)
+    # Role and permissions from the per-user permission cache
+    permission_profile = get_permission_profile(user)
+    role = permission_profile['role']
+    user_permissions = permission_profile['group_permission_names']
     
     # Remove duplicates
     context = {
@@ -197,14 +196,21 @@ def user_logout(request):
 def crud(request):
     return render(request, 'crud.html')
 
-# View to display data from all three tables
+# View to display data from all three tables (rows are loaded page by page from datatables_data)
 @require_GET
 @permission_required('rest.view_data', raise_exception=True)
 def get_data(request):
-    table3 = Table3.objects.all()
-    table2 = Table2.objects.all()
-    table1 = Table1.objects.all()
-    return render(request, 'get_data.html',{"table3":table3,"table2":table2,"table1":table1})
+    return render(request, 'get_data.html')
+
+# DataTables server-side processing endpoint used by the CRUD pages (see datatables.py)
+@require_GET
+@permission_required('rest.view_data', raise_exception=True)
+def datatables_data(request, table):
+    """One page of table1/table2/table3 in the DataTables protocol (draw, start, length, search, order)."""
+    try:
+        return JsonResponse(table_page(table, request.GET))
+    except DataTablesError as e:
+        return JsonResponse({'draw': request.GET.get('draw'), 'error': str(e)}, status=400)
 
 # View to add data to the tables
 @permission_required('rest.add_data', raise_exception=True)
@@ -311,12 +317,9 @@ def add_data(request):
 # View to update data in the tables
 @permission_required('rest.change_data', raise_exception=True)
 def update_data(request):
-    # Fetch all records from the three tables
-    table1 = Table1.objects.all()
-    table2 = Table2.objects.all()
-    table3 = Table3.objects.all()
+    # Rows are loaded page by page from datatables_data; only the relation options are rendered here
     table2_ids = Table2.objects.values_list('id', flat=True)
-    table3_ids = Table3.objects.values_list('id', flat=True)
+    table3_options = Table3.objects.values_list('id', 'email_field')
 
     editing = None
     editing_table = None
@@ -416,17 +419,19 @@ def update_data(request):
             editing = get_object_or_404(Table3, pk=pk)
 
     return render(request, 'update_data.html', {
-        "table1": table1,
-        "table2": table2,
-        "table3": table3,
         "editing": editing,
         "editing_table": editing_table,
         "selected_many": selected_many,
         "table2_ids": table2_ids,
-        "table3_ids": table3_ids,
+        "table3_options": table3_options,
         "table2_choices": Table2._meta.get_field('positive_small_int').choices,
     })
 
+# Ids checked in a bulk disable/delete form (None when nothing valid was checked)
+def _selected_ids(request):
+    ids = [int(value) for value in request.POST.getlist('delete_ids') if value.isdigit()]
+    return ids or None
+
 # View to delete data from Table1 (soft delete by marking as inactive)
 @permission_required('rest.change_data', raise_exception=True)
 def delete_data_1(request):
@@ -443,6 +448,19 @@ def delete_data_1(request):
         messages.success(request, "Record disabled successfully.")
         return redirect('delete_data_1')
 
+    # Checked rows are disabled with one UPDATE (no per-row save signals, so bump the version here)
+    elif request.method == 'POST':
+        ids = _selected_ids(request)
+        if ids is None:
+            messages.error(request, "Select at least one record.")
+        else:
+            with transaction.atomic():
+                disabled = Table1.objects.filter(pk__in=ids, boolean_field=True).update(boolean_field=False)
+                if disabled:
+                    bump_version(Table1)
+            messages.success(request, f"{disabled} record(s) disabled.")
+        return redirect('delete_data_1')
+
     # If a GET request is received with a delete_id, show the confirmation prompt
     elif request.GET.get('delete_id'):
         pk = request.GET.get('delete_id')
@@ -464,14 +482,19 @@ def delete_data_2(request):
     if request.method == 'POST' and request.POST.get('delete_id'):
         pk = request.POST.get('delete_id')
         entry = get_object_or_404(Table1, pk=pk)
-        # Delete associated files if they exist
-        if entry.image_field:
-            entry.image_field.delete(save=False)
-        if entry.file_field:
-            entry.file_field.delete(save=False)
-        entry.delete()
+        # Associated files are removed in the background once the delete commits
+        delete_table1([entry.pk])
         messages.success(request, "Record permanently deleted.")
         return redirect('delete_data_2')
+
+    # Checked rows go in one set-based delete
+    elif request.method == 'POST':
+        ids = _selected_ids(request)
+        if ids is None:
+            messages.error(request, "Select at least one record.")
+        else:
+            messages.success(request, f"{delete_table1(ids)} record(s) permanently deleted.")
+        return redirect('delete_data_2')
     # If an ID is provided in the request "GET", shows the confirmation
     elif request.GET.get('delete_id'):
         pk = request.GET.get('delete_id')
@@ -491,10 +514,7 @@ def delete_data_2(request):
 @require_GET
 @permission_required('rest.view_data', raise_exception=True)
 def get_data_form(request):
-    table3 = Table3.objects.all()
-    table2 = Table2.objects.all()
-    table1 = Table1.objects.all()
-    return render(request, 'get_data_form.html',{"table3":table3,"table2":table2,"table1":table1})
+    return render(request, 'get_data_form.html')
 
 # View to handle form submissions for adding new records
 @permission_required('rest.add_data', raise_exception=True)
@@ -568,67 +588,89 @@ def update_form(request,table,id):
 @require_GET
 @permission_required('rest.change_data', raise_exception=True)
 def update_data_form(request):
-    table3 = Table3.objects.all()
-    table2 = Table2.objects.all()
-    table1 = Table1.objects.all()
-    return render(request, 'update_data_form.html',{"table3":table3,"table2":table2,"table1":table1})
+    return render(request, 'update_data_form.html')
 
 # User management view (only for admins)
 @login_required
 @permission_required('rest.manage_users', raise_exception=True)
 def user_management(request):
     if request.method == 'POST':
+        # A row's Update button posts user_id (its select is role_<id>);
+        # the bulk action posts the checked user_ids and role
         user_id = request.POST.get('user_id')
-        new_role = request.POST.get('role')
-        
-        try:
-            target_user = User.objects.get(id=user_id)
-            
-            # Remove from all groups
-            target_user.groups.clear()
-            
-            # Assign new group
-            if new_role == 'admin':
-                admin_group = Group.objects.get(name='Admins')
-                target_user.groups.add(admin_group)
-            elif new_role == 'customer':
-                customer_group = Group.objects.get(name='Customers')
-                target_user.groups.add(customer_group)
-            
-            messages.success(request, f"Permissions updated for {target_user.username}")
-        except User.DoesNotExist:
-            messages.error(request, "User not found.")
-        except Exception as e:
-            messages.error(request, f"Error updating permissions: {e}")
-        return redirect('user_management')
-    
-    # Get all users with their roles
-    users_with_roles = []
-    for user in User.objects.all():
-        if user.groups.filter(name='Admins').exists():
-            role = 'Administrator'
-        elif user.groups.filter(name='Customers').exists():
-            role = 'Customer'
+        if user_id:
+            user_ids = [user_id]
+            new_role = request.POST.get(f'role_{user_id}')
         else:
-            role = 'No role'
-        
-        users_with_roles.append({
-            'user': user,
-            'role': role
-        })
-    
+            user_ids = request.POST.getlist('user_ids')
+            new_role = request.POST.get('role')
+
+        if not all(value.isdigit() for value in user_ids):
+            messages.error(request, "Invalid user selection.")
+        elif not user_ids:
+            messages.error(request, "Select at least one user.")
+        else:
+            try:
+                updated = set_role(user_ids, new_role)
+                if not updated:
+                    messages.error(request, "User not found.")
+                else:
+                    messages.success(request, f"Role set to {ROLE_LABELS[new_role]} for {updated} user(s)")
+            except RoleError as e:
+                messages.error(request, f"Error updating permissions: {e}")
+        # Back to the same search / page
+        return redirect(request.get_full_path())
+
+    search = request.GET.get('q', '')
+    try:
+        users, pagination = user_page(search, request.GET.get('cursor', ''))
+    except InvalidCursor:
+        messages.error(request, "That page link is no longer valid.")
+        return redirect('user_management')
+    for user in users:
+        user.role_label = ROLE_LABELS[user.role]
+
     return render(request, 'user_management.html', {
-        'users_with_roles': users_with_roles
+        'users': users,
+        'pagination': pagination,
+        'search': search,
+        'role_labels': ROLE_LABELS,
     })
 
 # View to display user activity logs (only for admins)
 @login_required
+@permission_required('rest.manage_users', raise_exception=True)
 def user_logs(request):
-    logs = UserLog.objects.filter().order_by('-timestamp')[:15]
+    form = UserLogFilterForm(request.GET)
+    logs, pagination = [], {}
+    if form.is_valid():
+        try:
+            logs, pagination = log_page(form.cleaned_data, request.GET.get('cursor', ''))
+        except InvalidCursor:
+            messages.error(request, "That page link is no longer valid.")
+            return redirect('user_logs')
+
+    # Page links keep the filters; the cursor is replaced
+    filter_query = request.GET.copy()
+    filter_query.pop('cursor', None)
     return render(request, 'user_logs.html', {
-        'logs': logs
+        'logs': logs,
+        'form': form,
+        'pagination': pagination,
+        'filter_query': filter_query.urlencode(),
     })
 
+# Prometheus scrape endpoint: request latency histograms of every worker process
+@require_GET
+def metrics(request):
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not allowed and not request.user.has_perm('rest.manage_users'):
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(request_metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
 # Views for making queries examples
 def making_queries(request):
     return render(request, 'making_queries.html')
@@ -837,18 +879,9 @@ def Q_example(request):
 
 # Agregate functions and counts
 def query_values_example(request):
-    # Count and basic aggregates
-    count_data = Table1.objects.count()
-    # max, min, avg for integer_field, float_field, date_field
-    max_value = Table1.objects.aggregate(Max('integer_field'))
-    min_integer = Table1.objects.aggregate(Min('integer_field'))
-    min_float = Table1.objects.aggregate(Min('float_field'))
-    min_date = Table1.objects.aggregate(Min('date_field'))
-    avg_integer = Table1.objects.aggregate(Avg('integer_field'))
-    avg_float = Table1.objects.aggregate(Avg('float_field'))
-    
-    # Count many-to-many relationships
-    count_many_to_many = Table1.objects.annotate(num_table3=Count('many_to_many'))
+    # Count, Max, Min and Avg come from the Table1Stats summary row (one query, see stats.py);
+    # rebuild_table1_stats() shows the equivalent Count/Sum/Max/Min aggregate
+    stats = get_table1_stats()
     
     # Prepare data for template
     value_names = [
@@ -870,18 +903,18 @@ def query_values_example(request):
         'Earliest date in date_field in Table1',
         'Average value of the integer_field in Table1',
         'Average value of the float_field in Table1',
-        'Count of related Table3 entries for each Table1 record'
+        'Total links from Table1 records to Table3 entries'
     ]
     # Values corresponding to the above names and descriptions
     values = [
-        count_data,
-        max_value['integer_field__max'],
-        min_integer['integer_field__min'],
-        min_float['float_field__min'],
-        min_date['date_field__min'],
-        round(avg_integer['integer_field__avg'], 2) if avg_integer['integer_field__avg'] else None,
-        round(avg_float['float_field__avg'], 2) if avg_float['float_field__avg'] else None,
-        count_many_to_many
+        stats.row_count,
+        stats.integer_max,
+        stats.integer_min,
+        stats.float_min,
+        stats.date_min,
+        round(stats.integer_avg, 2) if stats.integer_avg else None,
+        round(stats.float_avg, 2) if stats.float_avg else None,
+        stats.link_count
     ]
     # Combine names, descriptions, and values for template
     value_pairs = list(zip(value_names, value_description, values))
@@ -912,106 +945,77 @@ def html_example(request):
     })
 
 # Views for exporting data examples
+@login_required
 def export_to_file(request): 
     return render(request, 'export_to_file.html')
 
 # Export Table1 data to PDF
 def export_pdf(request):
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="table1.pdf"'
-
-    # Create the PDF object, using the response object as its "file."
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-    y = height - 50
-    x = 50
-    p.setFont("Helvetica", 10)
-    # Title
-    p.drawString(x, y, "Table1 Data Export")
-    y -= 30
-
-    registros = Table1.objects.all()
-    # Table headers
-    for reg in registros:
-        # Create a line of text for each record
-        texto = (
-            f"ID: {reg.id} | "
-            f"Int: {reg.integer_field} | "
-            f"Float: {reg.float_field} | "
-            f"Text: {reg.char_field} | "
-            f"Bool: {reg.boolean_field} | "
-            f"Date: {reg.datetime_field.strftime('%Y-%m-%d %H:%M')} |"
-        )
-        p.drawString(x, y, texto)
-        y -= 15
-        # If the y position is too low, create a new page
-        if y < 60:
-            p.showPage()
-            y = height - 50
-            p.setFont("Helvetica", 10)
-
-    p.showPage()
-    p.save()
-    return response
+    """Render Table1 to PDF with page partitions in a process pool (see exports.py)."""
+    return pdf_response()
 
 # Export Table1 data to Excel
 def export_excel(request):
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="table1.xlsx"'
-
-    # Create an in-memory workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Table1"
-
-    # Set up headers
-    ws.append([
-        "ID", "Integer", "Float", "Char", "Text",
-        "Boolean", "Date", "Time", "Datetime"
-    ])
-
-    registros = Table1.objects.all()
-
-    # Populate data rows
-    for reg in registros:
-        # Remove timezone info for Excel compatibility
-        datetime_val = reg.datetime_field
-        if datetime_val and is_aware(datetime_val):
-            datetime_val = datetime_val.replace(tzinfo=None)
-        else:
-            datetime_val = reg.datetime_field
+    """Stream Table1 as XLSX; memory stays flat whatever the row count (see exports.py)."""
+    return excel_response()
 
-        # time field
-        time_val = reg.time_field
-        if time_val and is_aware(time_val):
-            time_val = time_val.replace(tzinfo=None)
-        else:
-            time_val = reg.time_field
-
-        # Append the row
-        ws.append([
-            reg.id,
-            reg.integer_field,
-            reg.float_field,
-            reg.char_field,
-            reg.text_field,
-            reg.boolean_field,
-            reg.date_field,
-            time_val,
-            datetime_val,
-        ])
-
-    # Adjust column widths
-    width = [5, 10, 10, 15, 25, 20, 15, 12, 22]
-
-    # Set the column widths
-    for i, width2 in enumerate(width, start=1):
-        col_letter = get_column_letter(i)
-        ws.column_dimensions[col_letter].width = width2
-    wb.save(response)
-    return response
+# Stream Table1 rows as CSV / NDJSON, filtered like the json_app search (e.g. ?integer_field__gte=5)
+def _export_rows(request, export_format):
+    try:
+        queryset = filter_table1(Table1.objects.all(), request.GET)
+    except FilterError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return rows_response(export_format, queryset)
+
+@require_GET
+@login_required
+def export_csv(request):
+    """Stream filtered Table1 rows as CSV straight from the database cursor."""
+    return _export_rows(request, 'csv')
+
+@require_GET
+@login_required
+def export_ndjson(request):
+    """Stream filtered Table1 rows as newline-delimited JSON."""
+    return _export_rows(request, 'ndjson')
+
+# Background export jobs (see export_jobs.py); each user sees only their own
+@require_POST
+@login_required
+def export_job_start(request):
+    """Queue a PDF/XLSX export: format=pdf|xlsx plus optional Table1 filters."""
+    params = request.POST.dict()
+    params.pop('csrfmiddlewaretoken', None)
+    export_format = params.pop('format', '')
+    try:
+        job = start_export(request.user, export_format, params)
+    except ExportJobError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    except FilterError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(export_job_payload(job), status=200 if job.status == 'done' else 202)
+
+def _export_job_or_404(request, job_id):
+    return get_object_or_404(ExportJob, pk=job_id, user_id=request.user.id)
+
+@require_GET
+@login_required
+def export_job_status(request, job_id):
+    """Poll a job: status, rows written so far and the download URL once done."""
+    return JsonResponse(export_job_payload(_export_job_or_404(request, job_id)))
+
+@require_GET
+@login_required
+def export_job_download(request, job_id):
+    """Serve a finished job's artifact from MEDIA_ROOT/exports."""
+    job = _export_job_or_404(request, job_id)
+    if job.status != 'done':
+        return JsonResponse({'error': f'Export is {job.status}'}, status=409)
+    try:
+        artifact = open(job.path, 'rb')
+    except FileNotFoundError:
+        return JsonResponse({'error': 'Export expired, start it again'}, status=410)
+    return FileResponse(artifact, as_attachment=True, filename=f'table1.{job.format}')
 
 # View to handle email sending
 @login_required
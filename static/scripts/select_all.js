@@ -0,0 +1,9 @@
+// Header checkbox (class="select-all", data-form="<form id>") toggles every
+// checkbox on the page that belongs to that form through its form= attribute.
+document.querySelectorAll('input.select-all').forEach((toggle) => {
+    toggle.addEventListener('change', () => {
+        document.querySelectorAll(`input[type="checkbox"][form="${toggle.dataset.form}"]`).forEach((box) => {
+            box.checked = toggle.checked;
+        });
+    });
+});
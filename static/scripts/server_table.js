@@ -0,0 +1,197 @@
+// Server-side tables: <table data-server-table="url"> loads one page at a time from the
+// DataTables-protocol endpoint (draw, start, length, search[value], order, columns).
+// Header cells name their column with data-column; data-render picks how a cell is drawn
+// (image, file, edit-link with data-href, edit-button with data-table). Rows keep the
+// server's raw values in tr.rowData for edit forms.
+class ServerTable {
+    constructor(table) {
+        this.table = table;
+        this.url = table.dataset.serverTable;
+        this.emptyText = table.dataset.empty || 'No records';
+        this.headers = Array.from(table.querySelectorAll('thead th'));
+        this.tbody = table.querySelector('tbody');
+        this.draw = 0;
+        this.start = 0;
+        this.length = 10;
+        this.search = '';
+        this.order = null;  // {index, dir}
+        this.buildControls();
+        this.headers.forEach((th, index) => {
+            if (!th.dataset.column || th.dataset.orderable === 'false') return;
+            th.classList.add('server-table-sortable');
+            th.addEventListener('click', () => this.sortBy(index));
+        });
+        this.load();
+    }
+
+    buildControls() {
+        const container = this.table.closest('.table-container') || this.table;
+        this.controls = document.createElement('div');
+        this.controls.className = 'server-table-controls';
+        this.controls.innerHTML = `
+            <input class="input_field server-table-search" type="search" placeholder="Search">
+            <select class="input_field server-table-length">
+                <option>10</option><option>25</option><option>50</option><option>100</option>
+            </select>`;
+        container.before(this.controls);
+
+        this.footer = document.createElement('div');
+        this.footer.className = 'server-table-footer';
+        this.footer.innerHTML = `
+            <span class="server-table-info text"></span>
+            <button class="table-button-edit server-table-prev" type="button">Previous</button>
+            <button class="table-button-edit server-table-next" type="button">Next</button>`;
+        container.after(this.footer);
+
+        let timer;
+        this.controls.querySelector('.server-table-search').addEventListener('input', (event) => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                this.search = event.target.value.trim();
+                this.start = 0;
+                this.load();
+            }, 300);
+        });
+        this.controls.querySelector('.server-table-length').addEventListener('change', (event) => {
+            this.length = parseInt(event.target.value, 10);
+            this.start = 0;
+            this.load();
+        });
+        this.footer.querySelector('.server-table-prev').addEventListener('click', () => {
+            this.start = Math.max(0, this.start - this.length);
+            this.load();
+        });
+        this.footer.querySelector('.server-table-next').addEventListener('click', () => {
+            this.start += this.length;
+            this.load();
+        });
+    }
+
+    sortBy(index) {
+        const dir = this.order && this.order.index === index && this.order.dir === 'asc' ? 'desc' : 'asc';
+        this.order = {index, dir};
+        this.headers.forEach((th, i) => {
+            th.dataset.sorted = i === index ? dir : '';
+        });
+        this.start = 0;
+        this.load();
+    }
+
+    params() {
+        const params = new URLSearchParams({
+            draw: ++this.draw,
+            start: this.start,
+            length: this.length,
+            'search[value]': this.search,
+        });
+        this.headers.forEach((th, i) => params.append(`columns[${i}][data]`, th.dataset.column || ''));
+        if (this.order) {
+            params.append('order[0][column]', this.order.index);
+            params.append('order[0][dir]', this.order.dir);
+        }
+        return params;
+    }
+
+    async load() {
+        const params = this.params();
+        const draw = this.draw;
+        let payload;
+        try {
+            const response = await fetch(`${this.url}?${params.toString()}`, {headers: {'Accept': 'application/json'}});
+            payload = await response.json();
+        } catch (error) {
+            payload = {error: 'Could not load the table'};
+        }
+        // A newer request was sent meanwhile: its reply wins
+        if (draw !== this.draw) return;
+        if (payload.error) {
+            this.showMessage(payload.error);
+            return;
+        }
+        this.render(payload);
+    }
+
+    showMessage(text) {
+        const row = this.tbody.insertRow();
+        this.tbody.replaceChildren(row);
+        const cell = row.insertCell();
+        cell.colSpan = this.headers.length;
+        cell.textContent = text;
+    }
+
+    render(payload) {
+        if (!payload.data.length) {
+            this.showMessage(this.search ? 'No matching records' : this.emptyText);
+        } else {
+            this.tbody.replaceChildren(...payload.data.map((row) => this.renderRow(row)));
+        }
+        const first = payload.data.length ? this.start + 1 : 0;
+        const last = this.start + payload.data.length;
+        let info = `Showing ${first} to ${last} of ${payload.recordsFiltered} entries`;
+        if (payload.recordsFiltered !== payload.recordsTotal) {
+            info += ` (filtered from ${payload.recordsTotal} total entries)`;
+        }
+        this.footer.querySelector('.server-table-info').textContent = info;
+        this.footer.querySelector('.server-table-prev').disabled = this.start === 0;
+        this.footer.querySelector('.server-table-next').disabled = last >= payload.recordsFiltered;
+    }
+
+    renderRow(row) {
+        const tr = document.createElement('tr');
+        tr.id = row.DT_RowId;
+        tr.rowData = row.DT_RowData || {};
+        this.headers.forEach((th) => {
+            const cell = tr.insertCell();
+            const value = th.dataset.column ? row[th.dataset.column] : null;
+            switch (th.dataset.render) {
+                case 'image':
+                    if (value) {
+                        const img = document.createElement('img');
+                        img.src = value;
+                        img.alt = 'img';
+                        img.width = 50;
+                        cell.append(img);
+                    } else {
+                        cell.textContent = '-';
+                    }
+                    break;
+                case 'file':
+                    if (value) {
+                        const link = document.createElement('a');
+                        link.href = value;
+                        link.textContent = 'Download';
+                        cell.append(link);
+                    } else {
+                        cell.textContent = '-';
+                    }
+                    break;
+                case 'edit-link': {
+                    // data-href is the URL reversed for id 0
+                    const link = document.createElement('a');
+                    link.className = 'table-button-edit';
+                    link.href = th.dataset.href.replace(/\/0$/, `/${row.id}`);
+                    link.textContent = 'Edit';
+                    cell.append(link);
+                    break;
+                }
+                case 'edit-button': {
+                    const button = document.createElement('button');
+                    button.className = 'edit_button open-edit';
+                    button.type = 'button';
+                    button.dataset.table = th.dataset.table;
+                    button.dataset.id = row.id;
+                    button.textContent = 'Edit';
+                    cell.append(button);
+                    break;
+                }
+                default:
+                    cell.textContent = value ?? '';
+            }
+        });
+        return tr;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('table[data-server-table]').forEach((table) => new ServerTable(table));
+});